@@ -1,18 +1,72 @@
-from typing import Optional
-from app.plugins.contracts import RulesPluginProto
-from .gumshoe import create_plugin as create_plugin_gumshoe
-from .blades_in_the_dark import create_plugin as create_plugin_blades_in_the_dark
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from app.plugins.contracts import RulesPluginProto
+
+logger = logging.getLogger(__name__)
+
+# name -> модуль с create_plugin(); импортируется только при первом обращении
+PLUGIN_MODULES: dict[str, str] = {
+    "gumshoe": ".gumshoe.base.backend",
+    "blades_in_the_dark": ".blades_in_the_dark.base.backend",
+}
 
 plugins: dict[str, RulesPluginProto] = {}
+# name -> секунды на import + create_plugin()
+load_times: dict[str, float] = {}
+
+_lock = threading.Lock()
+
 
 def get_plugin(name: str) -> Optional[RulesPluginProto]:
-    if name not in plugins:
-        if name == "gumshoe":
-            plugins[name] = create_plugin_gumshoe()
-        elif name == "blades_in_the_dark":
-            plugins[name] = create_plugin_blades_in_the_dark()
-        else:
-            return None
-    
-    print(5*("!"*40 + "\n"), plugins, name)
-    return plugins[name]
+    plugin = plugins.get(name)
+    if plugin is not None:
+        return plugin
+
+    module_path = PLUGIN_MODULES.get(name)
+    if module_path is None:
+        return None
+
+    with _lock:
+        # другой поток мог загрузить плагин, пока мы ждали lock
+        plugin = plugins.get(name)
+        if plugin is None:
+            started = time.perf_counter()
+            module = importlib.import_module(module_path, __name__)
+            plugin = module.create_plugin()
+            load_times[name] = time.perf_counter() - started
+            plugins[name] = plugin
+            logger.info("Plugin %s loaded in %.1f ms", name, load_times[name] * 1000)
+    return plugin
+
+
+def warmup(names: Optional[Iterable[str]] = None) -> dict[str, float]:
+    """
+    Загружает плагины, строит фабрики и прогревает каталоги до приёма трафика.
+    Возвращает name -> секунды на полный прогрев (включая import).
+    """
+    report: dict[str, float] = {}
+    for name in (names if names is not None else PLUGIN_MODULES):
+        started = time.perf_counter()
+        plugin = get_plugin(name)
+        if plugin is None:
+            logger.warning("Plugin %s is not registered, skipping warmup", name)
+            continue
+
+        factory = plugin.get_factory()
+        warm = getattr(factory, "warmup", None)
+        if callable(warm):
+            warm()
+
+        report[name] = time.perf_counter() - started
+        logger.info(
+            "Plugin %s warmed up in %.1f ms (load %.1f ms)",
+            name, report[name] * 1000, load_times.get(name, 0.0) * 1000,
+        )
+    return report
@@ -0,0 +1 @@
+# Микробенчмарки плагинов. Запуск: python -m plugins.benchmarks.<name>
@@ -0,0 +1,40 @@
+"""handle_batch против цикла handle("validate", ...) на импорте сценария."""
+from __future__ import annotations
+
+from plugins import get_plugin
+
+from .common import per_call_us, report
+
+BLADES_CALLS = [
+    ("validate", "character", {
+        "playbookId": "cutter", "abilities": ["battleborn"], "actions": {"skirmish": 2, "wreck": 1},
+        "items": [{"tags": ["weapon"]}, {"tags": ["tool"], "quality": 1}],
+    }, {"crewTier": 1}),
+    ("validate", "item", {"tags": ["gear"], "quality": 2}, {}),
+] * 100
+
+GUMSHOE_CALLS = [
+    ("validate", "character", {
+        "skills": {"occult": 2, "research": 1, "athletics": 4, "shooting": 3},
+        "points": {"investigativeMax": 10, "generalMax": 30},
+    }, {}),
+    ("validate", "npc", {"skills": {"athletics": 5, "scuffling": 6}, "health": 8}, {}),
+    ("validate", "item", {"tags": ["weapon"], "weapon": {"type": "melee", "damage": "1d6"}}, {}),
+] * 100
+
+# маленький импорт: ростер меньше roster_min -> handle_batch не должен проигрывать циклу
+GUMSHOE_SMALL = GUMSHOE_CALLS[:3] * 2
+
+
+def main() -> None:
+    for name, calls in (("blades_in_the_dark", BLADES_CALLS), ("gumshoe", GUMSHOE_CALLS), ("gumshoe", GUMSHOE_SMALL)):
+        factory = get_plugin(name).get_factory()
+        assert factory.handle_batch(calls) == [factory.handle(*c) for c in calls]
+        report(f"{name}: {len(calls)} validate calls", [
+            ("handle() loop", per_call_us(lambda: [factory.handle(*c) for c in calls], number=5)),
+            ("handle_batch()", per_call_us(lambda: factory.handle_batch(calls), number=5)),
+        ])
+
+
+if __name__ == "__main__":
+    main()
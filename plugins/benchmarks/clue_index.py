@@ -0,0 +1,59 @@
+"""Какие улики/испытания доступны партии: инвертированный индекс против перебора всех препятствий."""
+from __future__ import annotations
+
+import random
+
+from plugins import get_plugin
+
+from .common import per_call_us, report
+
+N = 5000
+
+
+def scenario(skills, seed: int = 3) -> dict[str, dict]:
+    rnd = random.Random(seed)
+    inv = skills.skill_ids_by_kind("investigative")
+    gen = skills.skill_ids_by_kind("general")
+    out = {}
+    for i in range(N):
+        if i % 3:
+            out[f"ob{i}"] = {"type": "clue", "investigative_skills": rnd.sample(inv, rnd.randint(1, 2)), "spend_cost": rnd.choice([0, 0, 1, 2])}
+        else:
+            out[f"ob{i}"] = {"type": "challenge", "general_skill": rnd.choice(gen), "difficulty": rnd.randint(2, 8)}
+    return out
+
+
+def scan(obstacles: dict[str, dict], ratings: dict[str, int]) -> tuple[set[str], set[str]]:
+    # как сейчас в UI: каждое препятствие против лучших навыков партии
+    clues, challenges = set(), set()
+    for oid, ob in obstacles.items():
+        if ob["type"] == "clue":
+            need = max(1, ob["spend_cost"])
+            if not ob["investigative_skills"] or any(ratings.get(s, 0) >= need for s in ob["investigative_skills"]):
+                clues.add(oid)
+        elif ob["difficulty"] <= ratings.get(ob["general_skill"], 0) + 1:
+            challenges.add(oid)
+    return clues, challenges
+
+
+def main() -> None:
+    manager = get_plugin("gumshoe").get_factory().obstacles
+    obstacles = scenario(manager.skills)
+    for oid, data in obstacles.items():
+        assert manager.upsert("bench", oid, data).ok
+    index = manager.index("bench")
+    ratings = {sid: 2 for sid in manager.skills.skill_ids_by_kind("investigative")[:4]}
+    ratings.update({sid: 4 for sid in manager.skills.skill_ids_by_kind("general")[:5]})
+
+    assert scan(obstacles, ratings) == (index.findable_clues(ratings), index.challenges(ratings))
+    report(f"gumshoe: party query over {N} obstacles", [
+        ("scan all obstacles", per_call_us(lambda: scan(obstacles, ratings), number=20)),
+        ("inverted index", per_call_us(lambda: (index.findable_clues(ratings), index.challenges(ratings)), number=20)),
+    ])
+    edited = dict(obstacles["ob1"], spend_cost=3)
+    print(f"  incremental upsert: {per_call_us(lambda: manager.upsert('bench', 'ob1', edited), number=500):.1f} us")
+    manager.drop_index("bench")
+
+
+if __name__ == "__main__":
+    main()
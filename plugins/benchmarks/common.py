@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+
+def per_call_us(fn: Callable[[], Any], number: int = 1000, repeat: int = 5) -> float:
+    """Лучшее из repeat прогонов, в микросекундах на один вызов."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / number * 1e6
+
+
+def report(title: str, rows: list[tuple[str, float]]) -> None:
+    print(f"== {title}")
+    width = max(len(name) for name, _ in rows)
+    base = rows[0][1]
+    for name, us in rows:
+        speedup = f"x{base / us:.1f}" if us else "-"
+        print(f"  {name:<{width}}  {us:10.2f} us/call  {speedup}")
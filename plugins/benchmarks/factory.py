@@ -0,0 +1,23 @@
+"""Цена get_factory() на запрос: новая фабрика на каждый вызов против общей."""
+from __future__ import annotations
+
+from plugins import get_plugin
+from plugins.blades_in_the_dark.base.backend.plugin import RulesFactory as BladesFactory
+from plugins.gumshoe.base.backend.plugin import RulesFactory as GumshoeFactory
+
+from .common import per_call_us, report
+
+ITEM = {"tags": [" gear ", "tool", "gear"], "quality": 2}
+
+
+def main() -> None:
+    for name, factory_cls in (("blades_in_the_dark", BladesFactory), ("gumshoe", GumshoeFactory)):
+        plugin = get_plugin(name)
+        report(f"{name}: get_factory() + validate item", [
+            ("new factory", per_call_us(lambda: factory_cls().handle("validate", "item", ITEM, {}), number=200)),
+            ("shared factory", per_call_us(lambda: plugin.get_factory().handle("validate", "item", ITEM, {}), number=200)),
+        ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Граф локаций сценария: маршруты с кэшем против обхода на каждый запрос, правка локации против пересборки."""
+from __future__ import annotations
+
+import random
+
+from plugins import get_plugin
+
+from .common import per_call_us, report
+
+N = 500
+
+
+def scenario(seed: int = 7) -> dict[str, dict]:
+    # "город" из кварталов: соседние локации по кругу + случайные дальние связи
+    rnd = random.Random(seed)
+    out = {}
+    for i in range(N):
+        conns = [{"to": f"loc{(i + 1) % N}", "type": "road", "cost": rnd.randint(1, 3)}]
+        conns += [{"to": f"loc{rnd.randrange(N)}", "type": rnd.choice(["path", "door", "travel"]), "cost": rnd.randint(1, 9),
+                   "bidirectional": False} for _ in range(2)]
+        out[f"loc{i}"] = {"name": f"Location {i}", "connections": [c for c in conns if c["to"] != f"loc{i}"]}
+    return out
+
+
+def main() -> None:
+    manager = get_plugin("gumshoe").get_factory().locations
+    locs = scenario()
+    for lid, data in locs.items():
+        assert manager.upsert("bench", lid, data).ok
+    graph = manager.graph("bench")
+    queries = [(f"loc{i % 7}", f"loc{(i * 37) % N}") for i in range(50)]
+
+    def uncached() -> None:
+        for a, b in queries:
+            graph._trees.clear()
+            graph.route(a, b)
+
+    def cached() -> None:
+        for a, b in queries:
+            graph.route(a, b)
+
+    assert [graph.route(a, b) for a, b in queries] == [graph.route(a, b) for a, b in queries]
+    report(f"gumshoe: 50 shortest routes, {N} locations", [
+        ("search per query", per_call_us(uncached, number=5)),
+        ("cached trees", per_call_us(cached, number=5)),
+    ])
+
+    edited = dict(locs["loc3"], name="Renamed")
+    retimed = dict(locs["loc3"], connections=[dict(c, cost=c["cost"] + 1) for c in locs["loc3"]["connections"]])
+
+    def rebuild(data: dict) -> None:
+        manager.drop_graph("rebuild")
+        for lid, d in locs.items():
+            manager.upsert("rebuild", lid, data if lid == "loc3" else d)
+        cached_routes("rebuild")
+
+    def cached_routes(scenario_id: str) -> None:
+        g = manager.graph(scenario_id)
+        for a, b in queries:
+            g.route(a, b)
+
+    def incremental(data: dict) -> None:
+        manager.upsert("bench", "loc3", data)
+        cached_routes("bench")
+
+    for label, data in (("rename", edited), ("retime links", retimed)):
+        report(f"gumshoe: edit loc3 ({label}) + 50 routes", [
+            ("rebuild graph", per_call_us(lambda: rebuild(data), number=3)),
+            ("incremental upsert", per_call_us(lambda: incremental(data), number=3)),
+        ])
+    manager.drop_graph("bench")
+    manager.drop_graph("rebuild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Импорт сценария из NDJSON: handle() на каждую строку против потокового import_ndjson (inline и пул)."""
+from __future__ import annotations
+
+import tracemalloc
+
+from pydantic_core import from_json, to_json
+
+from plugins import get_plugin
+from plugins.executor import PluginExecutor
+from plugins.ndjson import import_ndjson
+
+from .batch import GUMSHOE_CALLS
+from .common import per_call_us, report
+
+LINES = [to_json({"entity": entity, "id": n, "data": data}) for n, (_, entity, data, _) in enumerate(GUMSHOE_CALLS * 10)]
+
+
+def per_line(factory) -> list:
+    out = []
+    for raw in LINES:
+        doc = from_json(raw)
+        out.append(factory.handle("validate", doc["entity"], doc["data"], {}))
+    return out
+
+
+def peak_kb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def whole_scenario(factory) -> int:
+    # как сейчас: весь сценарий в памяти, потом все результаты разом
+    calls = [("validate", doc["entity"], doc["data"], {}) for doc in map(from_json, LINES)]
+    return sum(1 for r in factory.handle_batch(calls) if r["ok"])
+
+
+def streamed() -> int:
+    return sum(1 for r in import_ndjson("gumshoe", iter(LINES)) if r["ok"])
+
+
+def main() -> None:
+    factory = get_plugin("gumshoe").get_factory()
+    executor = PluginExecutor(workers=4)
+    executor.start()
+    try:
+        expected = per_line(factory)
+        assert [r["ok"] for r in import_ndjson("gumshoe", LINES, executor=executor)] == [r["ok"] for r in expected]
+        report(f"gumshoe: import {len(LINES)} NDJSON lines", [
+            ("handle() per line", per_call_us(lambda: per_line(factory), number=1)),
+            ("import_ndjson inline", per_call_us(lambda: list(import_ndjson("gumshoe", LINES)), number=1)),
+            ("import_ndjson pool x4", per_call_us(lambda: list(import_ndjson("gumshoe", LINES, executor=executor)), number=1)),
+        ])
+        print(f"  peak memory: whole scenario {peak_kb(lambda: whole_scenario(factory)):.0f} KiB,"
+              f" import_ndjson {peak_kb(streamed):.0f} KiB")
+    finally:
+        executor.close()
+
+
+if __name__ == "__main__":
+    main()
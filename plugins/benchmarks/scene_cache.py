@@ -0,0 +1,47 @@
+"""workflow.submit в большой сессии: полная scene в каждом вызове против версии сцены из scene_cache."""
+from __future__ import annotations
+
+import random
+
+from pydantic_core import from_json, to_json
+
+from plugins import get_plugin
+
+from .common import per_call_us, report
+from .scene_index import BIG_SCENE
+from .workflow import states, submit_payload
+
+
+def main() -> None:
+    factory = get_plugin("blades_in_the_dark").get_factory()
+    blob = to_json(BIG_SCENE)
+    scene = from_json(blob)
+    for actor, wf, inp in states(factory):
+        if wf["stageKey"] not in ("choose_action", "prerollconfirm", "resist"):
+            continue
+        full = {**submit_payload(actor, wf, inp), "scene": BIG_SCENE}
+        cached = {k: v for k, v in full.items() if k != "scene"} | {"sessionId": "bench", "sceneVersion": 0}
+        factory.scene_cache.put("bench", scene, 0)
+        random.seed(2)
+        expected = factory.handle("workflow.submit", None, full, {})
+        random.seed(2)
+        got = factory.handle("workflow.submit", None, cached, {})
+        assert {k: v for k, v in got.items() if k != "sceneVersion"} == expected
+
+        def full_call() -> None:
+            # с полной сценой бэк каждый раз шлёт (а плагин разбирает) её JSON
+            factory.handle("workflow.submit", None, {**full, "scene": from_json(blob)}, {})
+
+        def cached_call() -> None:
+            factory.handle("workflow.submit", None, cached, {})
+            # sessionPatch (стресс) двигает версию -> откатываем, чтобы каждый прогон шёл с версии 0
+            factory.scene_cache.put("bench", scene, 0)
+
+        report(f"blades: submit {wf['stageKey']} (payload {len(to_json(full))} -> {len(to_json(cached))} bytes)", [
+            ("full scene", per_call_us(full_call, number=300)),
+            ("scene_cache", per_call_us(cached_call, number=300)),
+        ])
+
+
+if __name__ == "__main__":
+    main()
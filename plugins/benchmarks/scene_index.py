@@ -0,0 +1,61 @@
+"""Поиск персонажа в большой сцене за один submit: обход scene на каждый поиск против SceneIndex."""
+from __future__ import annotations
+
+import random
+
+from plugins import get_plugin
+from plugins.blades_in_the_dark.base.backend.workflows.roll_action.scene import (
+    SceneIndex, action_rating, character_data, find_character_ref, get_stress,
+)
+
+from .common import per_call_us, report
+from .workflow import SCENE, states, submit_payload
+
+# кампания: 60 игроков по 4 персонажа с тяжёлыми листами; наш персонаж — в конце обхода
+BIG_SCENE = {"players": {
+    **{f"p{u}": {"characters": [
+        {"id": f"p{u}c{n}", "name": f"NPC {u}/{n}", "data": {
+            "actions": {"skirmish": 1, "prowl": 2}, "stress": 1,
+            "items": [{"name": f"Item {i}", "tags": ["tool"]} for i in range(20)],
+        }} for n in range(4)
+    ]} for u in range(60)},
+    **SCENE["players"],
+}}
+
+
+def scan(scene: dict, cid: str) -> tuple[int, int]:
+    # как было: prerollconfirm ищет персонажа, apply_stress ищет его снова
+    rating = action_rating(character_data(find_character_ref(scene, cid)), "skirmish")
+    stress = get_stress(character_data(find_character_ref(scene, cid)))
+    return rating, stress
+
+
+def indexed(scene: dict, cid: str) -> tuple[int, int]:
+    index = SceneIndex(scene)
+    if not index.character(cid):
+        return 0, 0
+    return index.action_rating(cid, "skirmish"), index.stress(cid)
+
+
+def main() -> None:
+    assert scan(BIG_SCENE, "c1") == indexed(BIG_SCENE, "c1")
+    report("blades: character lookups per submit, 242 characters", [
+        ("find_character_ref x2", per_call_us(lambda: scan(BIG_SCENE, "c1"), number=2000)),
+        ("SceneIndex", per_call_us(lambda: indexed(BIG_SCENE, "c1"), number=2000)),
+    ])
+
+    factory = get_plugin("blades_in_the_dark").get_factory()
+    for actor, wf, inp in states(factory):
+        if wf["stageKey"] not in ("choose_action", "prerollconfirm", "resist"):
+            continue
+        small, big = submit_payload(actor, wf, inp), {**submit_payload(actor, wf, inp), "scene": BIG_SCENE}
+        random.seed(2)
+        assert factory.handle("workflow.submit", None, big, {})["ok"]
+        report(f"blades: submit {wf['stageKey']}", [
+            ("scene with 2 players", per_call_us(lambda: factory.handle("workflow.submit", None, small, {}), number=1000)),
+            ("scene with 62 players", per_call_us(lambda: factory.handle("workflow.submit", None, big, {}), number=1000)),
+        ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Память и бюджеты ростера: dict навыков против компактных векторов array('H') (SkillLayout) и матрицы ростера."""
+from __future__ import annotations
+
+import random
+import tracemalloc
+from typing import Any, Callable
+
+from plugins import get_plugin
+from plugins.gumshoe.base.backend.codex_skills import SkillsCodex
+
+from .common import per_call_us, report
+
+ROSTER_SIZE = 1000
+SKILLS_PER_SHEET = 24
+
+
+def _roster(codex: SkillsCodex, size: int) -> list[dict[str, int]]:
+    rnd = random.Random(7)
+    ids = [s.id for s in codex.skills]
+    return [{sid: rnd.randint(1, 4) for sid in rnd.sample(ids, SKILLS_PER_SHEET)} for _ in range(size)]
+
+
+def _allocated(build: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def _dict_totals(codex: SkillsCodex, skills: dict[str, int]) -> dict[str, int]:
+    totals = {"investigative": 0, "general": 0}
+    for sid, val in skills.items():
+        totals[codex.skill_kind(sid)] += val
+    return totals
+
+
+def main() -> None:
+    codex = SkillsCodex()
+    layout = codex.layout
+    roster = _roster(codex, ROSTER_SIZE)
+    vectors = [layout.encode(sk) for sk in roster]
+    assert all(layout.decode(v) == {sid: sk[sid] for sid in layout.ids if sid in sk} for v, sk in zip(vectors, roster))
+    assert all(layout.totals(v) == _dict_totals(codex, sk) for v, sk in zip(vectors, roster))
+
+    dict_bytes = _allocated(lambda: _roster(codex, ROSTER_SIZE))
+    vec_bytes = _allocated(lambda: [layout.encode(sk) for sk in roster])
+    print(f"== memory for {ROSTER_SIZE} sheets x {SKILLS_PER_SHEET} skills ({len(layout)} in codex)")
+    print(f"  dict[str, int]  {dict_bytes / 1024:8.1f} KiB")
+    print(f"  array('H')      {vec_bytes / 1024:8.1f} KiB  x{dict_bytes / vec_bytes:.1f} smaller")
+
+    report(f"per-kind totals over {ROSTER_SIZE} sheets", [
+        ("dict walk", per_call_us(lambda: [_dict_totals(codex, sk) for sk in roster], number=5)),
+        ("vector + kind masks", per_call_us(lambda: [layout.totals(v) for v in vectors], number=5)),
+        ("roster matrix", per_call_us(lambda: layout.roster_totals(vectors), number=5)),
+    ])
+
+    factory = get_plugin("gumshoe").get_factory()
+    sheets = [{"skills": sk, "points": {"investigativeMax": 60, "generalMax": 60}} for sk in roster]
+    assert [r.model_dump() for r in factory.characters.validate_roster(sheets)] == [
+        factory.characters.validate_and_enrich(sh).model_dump() for sh in sheets
+    ]
+    report(f"validate {ROSTER_SIZE} character sheets", [
+        ("validate_and_enrich loop", per_call_us(lambda: [factory.characters.validate_and_enrich(sh) for sh in sheets], number=3)),
+        ("validate_roster", per_call_us(lambda: factory.characters.validate_roster(sheets), number=3)),
+    ])
+
+
+if __name__ == "__main__":
+    main()
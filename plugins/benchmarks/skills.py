@@ -0,0 +1,52 @@
+"""Поиски по SkillsCodex: пересборка карт на каждый вызов (как было) против индексов кодекса."""
+from __future__ import annotations
+
+from plugins import get_plugin
+from plugins.gumshoe.base.backend.codex_skills import SkillsCodex
+
+from .common import per_call_us, report
+
+CHARACTER = {
+    "skills": {
+        "occult": 2, "research": 1, "architecture": 1, "cop_talk": 2, "interrogation": 1,
+        "fingerprinting": 1, "athletics": 4, "shooting": 3, "stealth": 2, "health": 8, "stability": 6,
+    },
+    "points": {"investigativeMax": 10, "generalMax": 30},
+}
+
+
+def _rebuilt_skill_kind(codex: SkillsCodex, skill_id: str) -> str:
+    # прежний путь: allowed_map() и group_map() заново на каждый вызов
+    skill = {s.id: s for s in codex.skills}.get(skill_id)
+    group = {g.id: g for g in codex.groups}.get(skill.group) if skill else None
+    return group.kind if group else "unknown"
+
+
+def _rebuilt_skills_by_kind(codex: SkillsCodex, kind: str) -> list:
+    return [s for s in codex.skills if _rebuilt_skill_kind(codex, s.id) == kind]
+
+
+def main() -> None:
+    codex = SkillsCodex()
+    ids = [s.id for s in codex.skills]
+    assert [_rebuilt_skill_kind(codex, sid) for sid in ids] == [codex.skill_kind(sid) for sid in ids]
+    assert _rebuilt_skills_by_kind(codex, "general") == codex.skills_by_kind("general")
+
+    report(f"skill_kind() over all {len(ids)} skills", [
+        ("rebuilt maps", per_call_us(lambda: [_rebuilt_skill_kind(codex, sid) for sid in ids], number=50)),
+        ("indexed codex", per_call_us(lambda: [codex.skill_kind(sid) for sid in ids], number=50)),
+    ])
+    report("skills_by_kind('general') (NPC config)", [
+        ("rebuilt maps", per_call_us(lambda: _rebuilt_skills_by_kind(codex, "general"), number=50)),
+        ("indexed codex", per_call_us(lambda: codex.skills_by_kind("general"), number=50)),
+    ])
+
+    factory = get_plugin("gumshoe").get_factory()
+    assert factory.handle("validate", "character", CHARACTER, {})["ok"]
+    report("gumshoe: validate character (indexed codex)", [
+        ("handle()", per_call_us(lambda: factory.handle("validate", "character", CHARACTER, {}), number=500)),
+    ])
+
+
+if __name__ == "__main__":
+    main()
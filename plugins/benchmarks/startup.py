@@ -0,0 +1,105 @@
+"""
+Бюджет холодного старта плагинов: время импорта и RSS по плагинам и модулям.
+
+Каждый замер — отдельный интерпретатор с `-X importtime`; строки агрегируются
+по модулям (медиана self/cumulative по повторам). `--defer` дополнительно
+прогоняет всё с RPG_PLUGINS_DEFER_BUILD=1 и показывает, сколько переезжает
+из импорта в первую валидацию.
+
+    python -m plugins.benchmarks.startup [--repeat 5] [--top 15] [--defer]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PLUGIN_PACKAGES: dict[str, str] = {
+    "gumshoe": "plugins.gumshoe.base.backend",
+    "blades_in_the_dark": "plugins.blades_in_the_dark.base.backend",
+}
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+# Дочерний процесс: импорт, первая валидация, RSS (ru_maxrss, KiB на Linux).
+_CHILD = """
+import json, resource, sys, time
+import pydantic
+rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+mod = __import__({module!r}, fromlist=["create_plugin"])
+t1 = time.perf_counter()
+factory = mod.create_plugin().get_factory()
+factory.handle("validate", "character", {{}}, {{}})
+t2 = time.perf_counter()
+rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+sys.stdout.write(json.dumps({{"import": t1 - t0, "first_call": t2 - t1, "rss_kib": rss1 - rss0}}))
+"""
+
+
+def _run_child(module: str, defer: bool) -> tuple[dict[str, float], dict[str, tuple[int, int]]]:
+    env = dict(os.environ)
+    env["RPG_PLUGINS_DEFER_BUILD"] = "1" if defer else "0"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module)],
+        capture_output=True, text=True, env=env, check=True,
+        cwd=Path(__file__).resolve().parents[2],
+    )
+    modules: dict[str, tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m and m.group(4).startswith("plugins."):
+            modules[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    summary = json.loads(proc.stdout.strip().splitlines()[-1])
+    return summary, modules
+
+
+def measure(module: str, repeat: int, defer: bool) -> tuple[dict[str, float], dict[str, tuple[float, float]]]:
+    runs = [_run_child(module, defer) for _ in range(repeat)]
+    summary = {key: statistics.median(r[0][key] for r in runs) for key in runs[0][0]}
+    modules: dict[str, tuple[float, float]] = {}
+    for name in runs[0][1]:
+        samples = [r[1][name] for r in runs if name in r[1]]
+        modules[name] = (
+            statistics.median(s[0] for s in samples),
+            statistics.median(s[1] for s in samples),
+        )
+    return summary, modules
+
+
+def _print_plugin(name: str, summary: dict[str, float], modules: dict[str, tuple[float, float]], top: int, label: str) -> None:
+    own_us = sum(self_us for self_us, _ in modules.values())
+    print(
+        f"== {name} [{label}]: import {summary['import'] * 1000:.1f} ms "
+        f"(plugin modules self {own_us / 1000:.1f} ms), "
+        f"first validate {summary['first_call'] * 1000:.1f} ms, "
+        f"RSS +{summary['rss_kib'] / 1024:.1f} MiB"
+    )
+    rows = sorted(modules.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+    for mod_name, (self_us, cum_us) in rows:
+        print(f"  {self_us / 1000:8.2f} ms self  {cum_us / 1000:8.2f} ms cum  {mod_name}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="сколько самых тяжёлых модулей показать")
+    parser.add_argument("--defer", action="store_true", help="сравнить с RPG_PLUGINS_DEFER_BUILD=1")
+    parser.add_argument("plugins", nargs="*", default=list(PLUGIN_PACKAGES))
+    args = parser.parse_args(argv)
+
+    for name in args.plugins:
+        module = PLUGIN_PACKAGES[name]
+        modes = [False, True] if args.defer else [False]
+        for defer in modes:
+            summary, modules = measure(module, args.repeat, defer)
+            _print_plugin(name, summary, modules, args.top, "defer_build" if defer else "eager")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""validate из сырых JSON-байтов (TypeAdapter.validate_json) против json.loads + dict-пути."""
+from __future__ import annotations
+
+import json
+
+from pydantic_core import to_json
+
+from plugins import get_plugin
+
+from .common import per_call_us, report
+
+PAYLOADS: dict[str, list[tuple[str, dict]]] = {
+    "blades_in_the_dark": [
+        ("character", {
+            "playbookId": "cutter", "abilities": ["battleborn"], "actions": {"skirmish": 2, "wreck": 1, "command": 1},
+            "stress": 3, "traumas": ["cold"], "load": "normal",
+            "harm": {"l3": None, "l2": ["Broken arm", None], "l1": ["Bruised", None]},
+            "items": [{"tags": ["weapon"], "name": "Blade"}, {"tags": ["tool"], "quality": 1}] * 4,
+        }),
+        ("item", {"tags": [" gear ", "tool", "gear"], "quality": 2}),
+    ],
+    "gumshoe": [
+        ("character", {
+            "skills": {"occult": 2, "research": 1, "cop_talk": 2, "athletics": 4, "shooting": 3, "health": 8},
+            "points": {"investigativeMax": 10, "generalMax": 30},
+            "items": [{"tags": ["weapon"], "weapon": {"type": "melee", "damage": "1d6"}}] * 3,
+        }),
+        ("npc", {"skills": {"athletics": 5, "scuffling": 6}, "health": 8}),
+        ("obstacle", {"type": "challenge", "general_skill": "athletics", "difficulty": 4}),
+    ],
+}
+
+
+def main() -> None:
+    for name, cases in PAYLOADS.items():
+        factory = get_plugin(name).get_factory()
+        for entity, payload in cases:
+            raw = to_json(payload)
+            expected = factory.handle("validate", entity, payload, {})
+            assert factory.handle("validate", entity, raw, {}) == expected
+            report(f"{name}: validate {entity} ({len(raw)} bytes)", [
+                ("json.loads + dict", per_call_us(lambda: factory.handle("validate", entity, json.loads(raw), {}), number=2000)),
+                ("raw bytes", per_call_us(lambda: factory.handle("validate", entity, raw, {}), number=2000)),
+            ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Инкрементальная валидация по JSON Patch против полной валидации пропатченного листа."""
+from __future__ import annotations
+
+from plugins import get_plugin
+from plugins.json_patch import apply_patch
+
+from .common import per_call_us, report
+
+BLADES_SHEET = {
+    "playbookId": "cutter", "abilities": ["battleborn"], "actions": {"skirmish": 2, "wreck": 1, "command": 1},
+    "stress": 3, "traumas": ["cold"], "load": "normal",
+    "harm": {"l3": None, "l2": ["Broken arm", None], "l1": ["Bruised", None]},
+    "items": [{"tags": ["weapon"], "name": f"Blade {i}", "description": "Sharp"} for i in range(30)],
+}
+
+GUMSHOE_SHEET = {
+    "name": "Agent",
+    "skills": {"occult": 2, "research": 1, "cop_talk": 2, "athletics": 4, "shooting": 3, "health": 8},
+    "points": {"investigativeMax": 10, "generalMax": 30},
+    "items": [{"tags": ["weapon"], "weapon": {"type": "melee", "damage": "1d6"}} for _ in range(30)],
+}
+
+CASES = [
+    ("blades_in_the_dark", BLADES_SHEET, {"crewTier": 1}, [
+        ("stress", [{"op": "replace", "path": "/stress", "value": 4}]),
+        ("harm cell", [{"op": "replace", "path": "/harm/l1/1", "value": "Cut"}]),
+        ("new item", [{"op": "add", "path": "/items/-", "value": {"tags": ["tool"]}}]),
+    ]),
+    ("gumshoe", GUMSHOE_SHEET, {}, [
+        ("skill rating", [{"op": "replace", "path": "/skills/athletics", "value": 5}]),
+        ("name", [{"op": "replace", "path": "/name", "value": "Agent X"}]),
+    ]),
+]
+
+
+def main() -> None:
+    for name, sheet, ctx, patches in CASES:
+        manager = get_plugin(name).get_factory().characters
+        prev = manager.validate_and_enrich(sheet, ctx).data
+        assert prev is not None
+        for label, patch in patches:
+            full = manager.validate_and_enrich(apply_patch(prev, patch), ctx)
+            assert manager.validate_patch(prev, patch, ctx) == full
+            report(f"{name}: character, patch {label}", [
+                ("full validate", per_call_us(lambda: manager.validate_and_enrich(apply_patch(prev, patch), ctx), number=500)),
+                ("validate_patch", per_call_us(lambda: manager.validate_patch(prev, patch, ctx), number=500)),
+            ])
+
+
+if __name__ == "__main__":
+    main()
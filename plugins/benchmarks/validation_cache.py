@@ -0,0 +1,28 @@
+"""Повторная валидация одинаковых листов (переподключения, ре-рендеры): без кэша против попадания в кэш."""
+from __future__ import annotations
+
+from plugins import get_plugin
+
+from .common import per_call_us, report
+from .validate_json import PAYLOADS
+
+
+def main() -> None:
+    for name, cases in PAYLOADS.items():
+        factory = get_plugin(name).get_factory()
+        for entity, payload in cases:
+            ctx = {"crewTier": 1}
+            factory.validation_cache = None
+            uncached = per_call_us(lambda: factory.handle("validate", entity, payload, ctx), number=2000)
+            expected = factory.handle("validate", entity, payload, ctx)
+
+            cache = factory.enable_validation_cache(maxsize=256)
+            assert factory.handle("validate", entity, payload, ctx) == expected
+            cached = per_call_us(lambda: factory.handle("validate", entity, payload, ctx), number=2000)
+            report(f"{name}: validate {entity}", [("no cache", uncached), ("cache hit", cached)])
+            print(f"  {cache.stats()}")
+        factory.validation_cache = None
+
+
+if __name__ == "__main__":
+    main()
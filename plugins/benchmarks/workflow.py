@@ -0,0 +1,68 @@
+"""Шаги RollActionWorkflow: ответ submit через второй model_dump против SubmitResult.to_response."""
+from __future__ import annotations
+
+import random
+
+from plugins import get_plugin
+
+from .common import per_call_us, report
+
+GM, INI, HELP = "gm", "u1", "u2"
+SCENE = {"players": {
+    INI: {"characters": [{"id": "c1", "name": "Cutter", "data": {"actions": {"skirmish": 2, "prowl": 1}, "stress": 2}}]},
+    HELP: {"characters": [{"id": "c2", "name": "Lurk", "data": {"actions": {"finesse": 1}, "stress": 0}}]},
+}}
+PARTICIPANTS = {"gmUserId": GM, "initiatorUserId": INI, "participants": [{"userId": HELP, "roles": ["assistant"]}]}
+STEPS = [
+    (INI, {"character_id": "c1", "action": "skirmish"}),
+    (GM, {"position": "risky", "effect": "standard", "consequence_hint": "harm"}),
+    (INI, {"push": True, "help": True, "helper_user_id": HELP}),
+    (HELP, {"accept_help": True}),
+    (GM, {"allow": True}),
+    (INI, {"choice": "accept"}),
+    (INI, {"choice": "resist"}),
+    (GM, {"attribute": "prowess"}),
+    (GM, {"summary": "done"}),
+]
+
+
+def states(factory) -> list[tuple[str, dict, dict]]:
+    # (актёр, состояние перед шагом, ввод) для каждой стадии одного прохода
+    random.seed(1)
+    wf = factory.handle("workflow.start", None, {"actionKey": "blades.roll_action", "participants": PARTICIPANTS}, {})["workflow"]
+    out = []
+    for actor, inp in STEPS:
+        out.append((actor, wf, inp))
+        res = factory.handle("workflow.submit", None, submit_payload(actor, wf, inp), {})
+        assert res["ok"], res
+        wf = res["workflow"]
+    return out
+
+
+def submit_payload(actor: str, wf: dict, inp: dict) -> dict:
+    return {"actionKey": "blades.roll_action", "scene": SCENE, "actorUserId": actor, "participants": PARTICIPANTS, "workflow": wf, "input": inp}
+
+
+def main() -> None:
+    factory = get_plugin("blades_in_the_dark").get_factory()
+    router = factory.workflow_router
+
+    def submit(actor: str, wf: dict, inp: dict) -> dict:
+        return router.submit(
+            "blades.roll_action", scene=SCENE, actor_user_id=actor, participants_dict=PARTICIPANTS, wf_dict=wf, input_dict=inp)
+
+    for actor, wf, inp in states(factory):
+        random.seed(2)
+        dumped = submit(actor, wf, inp).model_dump(mode="json")
+        random.seed(2)
+        assert factory.handle("workflow.submit", None, submit_payload(actor, wf, inp), {}) == dumped
+        report(f"blades: roll_action stage {wf['stageKey']}", [
+            ("submit + model_dump", per_call_us(lambda: submit(actor, wf, inp).model_dump(mode="json"), number=1000)),
+            ("submit + to_response", per_call_us(lambda: submit(actor, wf, inp).to_response(), number=1000)),
+            ("present", per_call_us(lambda: router.present(
+                "blades.roll_action", scene=SCENE, actor_user_id=actor, participants_dict=PARTICIPANTS, wf_dict=wf), number=1000)),
+        ])
+
+
+if __name__ == "__main__":
+    main()
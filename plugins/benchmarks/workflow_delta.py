@@ -0,0 +1,37 @@
+"""Ответы workflow.submit: полный workflow против патча от предыдущей ревизии (байты и время)."""
+from __future__ import annotations
+
+import random
+
+from pydantic_core import to_json
+
+from plugins import get_plugin
+from plugins.json_patch import apply_patch
+
+from .common import per_call_us, report
+from .workflow import states, submit_payload
+
+
+def main() -> None:
+    factory = get_plugin("blades_in_the_dark").get_factory()
+    full_total = delta_total = 0
+    for actor, wf, inp in states(factory):
+        payload = submit_payload(actor, wf, inp)
+        delta_payload = {**payload, "deltaFrom": wf["revision"]}
+        random.seed(2)
+        full = factory.handle("workflow.submit", None, payload, {})
+        random.seed(2)
+        delta = factory.handle("workflow.submit", None, delta_payload, {})
+        assert apply_patch(wf, delta["workflowPatch"]) == full["workflow"]
+        full_bytes, delta_bytes = len(to_json(full)), len(to_json(delta))
+        full_total += full_bytes
+        delta_total += delta_bytes
+        report(f"blades: submit {wf['stageKey']} ({full_bytes} -> {delta_bytes} bytes)", [
+            ("full workflow", per_call_us(lambda: factory.handle("workflow.submit", None, payload, {}), number=1000)),
+            ("deltaFrom", per_call_us(lambda: factory.handle("workflow.submit", None, delta_payload, {}), number=1000)),
+        ])
+    print(f"  bytes per pass: full {full_total}, delta {delta_total} ({delta_total / full_total:.0%})")
+
+
+if __name__ == "__main__":
+    main()
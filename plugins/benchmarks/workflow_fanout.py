@@ -0,0 +1,79 @@
+"""Рассылка шага roll_action участникам и зрителям: кодирование на каждого получателя против плана с общими кадрами."""
+from __future__ import annotations
+
+import random
+
+from pydantic_core import from_json, to_json
+
+from plugins import get_plugin
+
+from plugins.blades_in_the_dark.base.backend.workflows.fanout import participant_ids
+from plugins.blades_in_the_dark.base.backend.workflows.presentation import view_for
+
+from .common import per_call_us, report
+from .workflow import PARTICIPANTS, SCENE, STEPS
+
+SPECTATORS = (100, 500)
+PARTICIPANT_IDS = participant_ids(PARTICIPANTS)
+
+
+def main() -> None:
+    factory = get_plugin("blades_in_the_dark").get_factory()
+    router = factory.workflow_router
+    store = factory.workflow_store
+    random.seed(2)
+    wf = factory.handle("workflow.start", None, {
+        "actionKey": "blades.roll_action", "actionId": "bench", "participants": PARTICIPANTS, "scene": SCENE}, {})["workflow"]
+    for actor, inp in STEPS:
+        res = factory.handle("workflow.submit", None, {
+            "actionId": "bench", "expectedRevision": wf["revision"], "actorUserId": actor, "input": inp}, {})
+        assert res["ok"], res
+        wf = res["workflow"]
+        if not res["broadcasts"]:
+            continue
+        entry = store.get("bench")
+
+        def message(uid: str) -> dict:
+            # как собирает сообщение бэк без плана: envelope следующей стадии в виде получателя + broadcasts
+            data = router.present(
+                "blades.roll_action", scene=SCENE, actor_user_id=uid, participants_dict=PARTICIPANTS, wf_dict=wf).model_dump(mode="json")
+            if view_for(data["audience"], uid, PARTICIPANTS) == "observer":
+                data = {**data, "ui": None}
+            return {"actionId": "bench", "revision": wf["revision"], "broadcasts": res["broadcasts"], "stage": data}
+
+        plan = factory.fanout_plan("bench")
+        for g in plan.groups:
+            for uid in g.user_ids:
+                assert from_json(plan.frames[g.view]) == message(uid)
+
+        for spectators in SPECTATORS:
+            recipients = [*PARTICIPANT_IDS, *(f"spectator-{i}" for i in range(spectators))]
+            prebuilt = {uid: message(uid) for uid in recipients}
+
+            def per_recipient_present() -> None:
+                for uid in recipients:
+                    to_json(message(uid))
+
+            def per_recipient_encode() -> None:
+                for uid in recipients:
+                    to_json(prebuilt[uid])
+
+            def shared_frames() -> None:
+                # новая ревизия: план строится с нуля, дальше каждому сокету — ссылка на готовые байты
+                entry.frames = entry.fanout = None
+                plan = factory.fanout_plan("bench")
+                sockets = []
+                for g in plan.groups:
+                    frame = plan.frames[g.view]
+                    sockets.extend(frame for _ in g.user_ids)
+                    if g.rest:
+                        sockets.extend(frame for _ in range(len(recipients) - len(PARTICIPANT_IDS)))
+
+            report(f"blades: fan-out after {actor}'s {entry.journal.events[-1]['stageKey']} to {len(recipients)} recipients", [
+                ("present + encode per recipient", per_call_us(per_recipient_present, number=5, repeat=3)),
+                ("encode per recipient", per_call_us(per_recipient_encode, number=20, repeat=3)),
+                ("fanout plan, shared frames", per_call_us(shared_frames, number=20, repeat=3)),
+            ])
+
+if __name__ == "__main__":
+    main()
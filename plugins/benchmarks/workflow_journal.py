@@ -0,0 +1,54 @@
+"""Пакетное переигрывание журналов roll_action: с начального состояния против ближайшего снимка."""
+from __future__ import annotations
+
+import random
+
+from plugins import get_plugin
+from plugins.blades_in_the_dark.base.backend.workflows.journal import WorkflowJournal, replay_many
+
+from .common import per_call_us, report
+from .workflow import PARTICIPANTS, SCENE, STEPS
+
+JOURNALS = 1000
+
+
+def record(factory, n: int) -> tuple[WorkflowJournal, dict]:
+    # один проход workflow через workflow_store; журнал и итоговое состояние
+    action_id = f"bench-{n}"
+    wf = factory.handle("workflow.start", None, {
+        "actionKey": "blades.roll_action", "actionId": action_id, "participants": PARTICIPANTS, "scene": SCENE}, {})["workflow"]
+    for actor, inp in STEPS:
+        res = factory.handle("workflow.submit", None, {
+            "actionId": action_id, "expectedRevision": wf["revision"], "actorUserId": actor, "input": inp}, {})
+        assert res["ok"], res
+        wf = res["workflow"]
+    journal = factory.workflow_store.get(action_id).journal
+    factory.workflow_store.drop(action_id)
+    return journal, wf
+
+
+def main() -> None:
+    factory = get_plugin("blades_in_the_dark").get_factory()
+    router = factory.workflow_router
+    random.seed(1)
+    recorded = [record(factory, n) for n in range(JOURNALS)]
+    live = [j for j, _ in recorded]
+    # журнал без снимков (старый дамп): всё с начала; переигрывание достраивает снимки,
+    # поэтому на каждый прогон — свежие журналы
+    bare = [{k: v for k, v in j.to_dict().items() if k != "snapshots"} for j in live]
+    restored = [WorkflowJournal.from_dict(j.to_dict()) for j in live]
+    expected = [wf for _, wf in recorded]
+    assert [wf for wf, _ in replay_many(router, map(WorkflowJournal.from_dict, bare))] == expected
+    assert [wf for wf, _ in replay_many(router, restored)] == expected
+    assert [wf for wf, _ in replay_many(router, live)] == expected
+
+    steps = sum(len(j.events) for j in live)
+    report(f"blades: replay {JOURNALS} journals ({steps} events), ms per batch", [
+        ("from initial state", per_call_us(lambda: list(replay_many(router, map(WorkflowJournal.from_dict, bare))), number=1, repeat=3) / 1000),
+        ("from_dict + latest snapshot", per_call_us(lambda: list(replay_many(router, restored)), number=1, repeat=3) / 1000),
+        ("from latest snapshot", per_call_us(lambda: list(replay_many(router, live)), number=1, repeat=3) / 1000),
+    ])
+
+
+if __name__ == "__main__":
+    main()
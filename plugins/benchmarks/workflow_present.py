@@ -0,0 +1,50 @@
+"""Представление стадии roll_action для каждого зрителя: present() + сериализация против готовых байтов ревизии."""
+from __future__ import annotations
+
+from pydantic_core import from_json, to_json
+
+from plugins import get_plugin
+
+from plugins.blades_in_the_dark.base.backend.workflows.presentation import view_for
+from plugins.blades_in_the_dark.base.backend.workflows.store import StoredAction
+
+from .common import per_call_us, report
+from .workflow import GM, HELP, INI, PARTICIPANTS, SCENE, states
+
+# зрители одной ревизии: участники и их переподключения
+VIEWERS = [GM, INI, HELP] * 4
+
+
+def main() -> None:
+    factory = get_plugin("blades_in_the_dark").get_factory()
+    router = factory.workflow_router
+    store = factory.workflow_store
+    for _, wf, _ in states(factory):
+        def per_viewer() -> None:
+            for uid in VIEWERS:
+                to_json(router.present(
+                    "blades.roll_action", scene=SCENE, actor_user_id=uid, participants_dict=PARTICIPANTS, wf_dict=wf))
+
+        def cached() -> None:
+            frames = factory.present_frames("bench")
+            for uid in VIEWERS:
+                frames.frames[view_for(frames.audience, uid, PARTICIPANTS)]
+
+        def first_view() -> None:
+            # новая ревизия: первый зритель платит за present() и оба вида
+            store.put("bench", StoredAction(action_key="blades.roll_action", workflow=wf, participants=PARTICIPANTS, scene=SCENE))
+            factory.present_frames("bench")
+
+        store.put("bench", StoredAction(action_key="blades.roll_action", workflow=wf, participants=PARTICIPANTS, scene=SCENE))
+        frames = factory.present_frames("bench")
+        envelope = router.present("blades.roll_action", scene=SCENE, actor_user_id=GM, participants_dict=PARTICIPANTS, wf_dict=wf)
+        assert from_json(frames.frames["audience"]) == envelope.model_dump(mode="json")
+        report(f"blades: present {wf['stageKey']} to {len(VIEWERS)} viewers", [
+            ("present + to_json per viewer", per_call_us(per_viewer, number=200)),
+            ("present_frames, first of revision", per_call_us(first_view, number=200)),
+            ("present_frames, cached", per_call_us(cached, number=200)),
+        ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""workflow.submit с полным состоянием в payload против состояния в workflow_store (actionId + ревизия)."""
+from __future__ import annotations
+
+import random
+
+from pydantic_core import from_json, to_json
+
+from plugins import get_plugin
+
+from plugins.blades_in_the_dark.base.backend.scene_cache import apply_session_patch
+
+from .common import per_call_us, report
+from .workflow import PARTICIPANTS, SCENE, STEPS, submit_payload
+
+
+def main() -> None:
+    factory = get_plugin("blades_in_the_dark").get_factory()
+
+    def call(payload: dict, wire: bool) -> dict:
+        # wire — как через PluginExecutor: payload и ответ проходят через JSON
+        if not wire:
+            return factory.handle("workflow.submit", None, payload, {})
+        return from_json(to_json(factory.handle("workflow.submit", None, from_json(to_json(payload)), {})))
+
+    def full_pass(wire: bool) -> dict:
+        wf = factory.handle("workflow.start", None, {"actionKey": "blades.roll_action", "participants": PARTICIPANTS}, {})["workflow"]
+        scene = SCENE
+        for actor, inp in STEPS:
+            res = call({**submit_payload(actor, wf, inp), "scene": scene}, wire)
+            wf = res["workflow"]
+            # sessionPatch применяет бэк и шлёт обновлённую сцену со следующим шагом
+            if res.get("sessionPatch"):
+                scene = apply_session_patch(scene, res["sessionPatch"])
+        return wf
+
+    def stored_pass(wire: bool) -> dict:
+        # модель workflow после шага остаётся в записи стора — следующий шаг её не разбирает заново
+        wf = factory.handle("workflow.start", None, {
+            "actionKey": "blades.roll_action", "actionId": "bench", "participants": PARTICIPANTS, "scene": SCENE}, {})["workflow"]
+        for actor, inp in STEPS:
+            wf = call({"actionId": "bench", "expectedRevision": wf["revision"], "actorUserId": actor, "input": inp}, wire)["workflow"]
+        return wf
+
+    random.seed(2)
+    by_payload = full_pass(False)
+    random.seed(2)
+    assert stored_pass(False) == by_payload
+
+    full = submit_payload(*STEPS[-1], by_payload)
+    stored = {"actionId": "bench", "expectedRevision": 8, "actorUserId": STEPS[-1][0], "input": STEPS[-1][1]}
+    report(f"blades: roll_action pass of {len(STEPS)} submits (last payload {len(to_json(full))} -> {len(to_json(stored))} bytes)", [
+        ("full payload, in-process", per_call_us(lambda: full_pass(False), number=50, repeat=20)),
+        ("workflow_store, in-process", per_call_us(lambda: stored_pass(False), number=50, repeat=20)),
+        ("full payload, over JSON", per_call_us(lambda: full_pass(True), number=50, repeat=20)),
+        ("workflow_store, over JSON", per_call_us(lambda: stored_pass(True), number=50, repeat=20)),
+    ])
+
+
+if __name__ == "__main__":
+    main()
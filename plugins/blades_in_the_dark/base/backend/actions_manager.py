@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from typing import Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import Field
+from .types.base import PluginModel
 
 Role = Literal["gm", "initiator", "player"]
 
-class ActionInfo(BaseModel):
+class ActionInfo(PluginModel):
     key: str
     title: str
     roles: list[Role] = Field(default_factory=list)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 from typing import Any, Protocol, Literal, Optional, runtime_checkable
 from pydantic import BaseModel, Field, NonNegativeInt
-from .types import EntityKind, ValidateResult
+from ....config_cache import ConfigBlob
+from .common import EntityKind, Payload, ValidateResult
 
 
 @runtime_checkable
 class EntityManager(Protocol):
     kind: EntityKind
+    context_keys: tuple[str, ...]
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]: ...
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult: ...
+    def config_blob(self) -> ConfigBlob: ...
+    def validate_and_enrich(self, payload: Payload, context: dict[str, Any] | None = None) -> ValidateResult: ...
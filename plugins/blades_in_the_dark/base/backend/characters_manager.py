@@ -1,11 +1,12 @@
 # characters_manager.py
 from __future__ import annotations
 
-from typing import Any
+from copy import deepcopy
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
 
-from pydantic import ValidationError
-
-from .common import ValidateResult, ValidationIssue
+from .common import FieldParser, Payload, ValidateResult, ValidationIssue, parse_payload
 from .types import (
     CharacterData,
     ActionId,
@@ -14,8 +15,14 @@ from .types import (
     LoadId,
     LOAD_VALUE,
     PLAYBOOKS,
-    ItemData
 )
+from .types.base import make_adapter
+from ....config_cache import CachedConfig, ConfigBlob
+from ....json_patch import JsonPatchError, apply_patch, touched_roots
+
+_CHARACTER = make_adapter(CharacterData)
+_FIELDS = FieldParser(CharacterData)
+_CHARACTER_FIELDS = tuple(CharacterData.model_fields)
 
 ALL_ACTIONS: list[ActionId] = [
     "hunt", "study", "survey", "tinker",
@@ -54,23 +61,63 @@ ALL_TRAUMAS: list[TraumaId] = [
 
 ALL_LOADS: list[LoadId] = ["light", "normal", "heavy"]
 
+CONSTRAINTS: Mapping[str, int] = MappingProxyType({"stressMax": 9, "traumaMax": 4, "abilitiesMaxAtStart": 1})
+
 # --- Playbooks / Special abilities (RU) ---
 
 
+@dataclass(frozen=True)
+class PlaybookEntry:
+    id: str
+    ability_ids: frozenset[str]
+    starting_actions: Mapping[str, int]
+
+
+def _build_playbook_index() -> Mapping[str, PlaybookEntry]:
+    index: dict[str, PlaybookEntry] = {}
+    for p in PLAYBOOKS:
+        if not isinstance(p, dict) or not isinstance(p.get("id"), str):
+            continue
+        index[p["id"]] = PlaybookEntry(
+            id=p["id"],
+            ability_ids=frozenset(
+                a["id"] for a in p.get("abilities") or []
+                if isinstance(a, dict) and isinstance(a.get("id"), str)
+            ),
+            starting_actions=MappingProxyType(dict(p.get("startingActions") or {})),
+        )
+    return MappingProxyType(index)
+
+
+# PLAYBOOKS статичны -> индекс строим при импорте, валидация только читает его
+PLAYBOOK_INDEX: Mapping[str, PlaybookEntry] = _build_playbook_index()
 
 
 class CharactersManager:
     kind = "character"
+    # ключи context, влияющие на результат validate (для кэша результатов)
+    context_keys: tuple[str, ...] = ("defaultItemQuality", "crewTier")
+
+    def __init__(self) -> None:
+        self._config = CachedConfig(self._build_config)
 
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]:
+        # не зависит от context -> собирается один раз (см. CachedConfig), отдаётся копия
+        return self._config.get().copy()
+
+    def config_blob(self) -> ConfigBlob:
+        return self._config.get()
+
+    def _build_config(self) -> dict[str, Any]:
         actions0 = {a: 0 for a in ALL_ACTIONS}
         return {
             "attributes": [{"id": a, "title": ATTRIBUTE_TITLES[a]} for a in ("insight", "prowess", "resolve")],
             "actions": [{"id": a, "title": a, "attribute": ACTION_TO_ATTRIBUTE[a]} for a in ALL_ACTIONS],
             "traumas": [{"id": t, "title": t} for t in ALL_TRAUMAS],
             "loads": [{"id": lid, "value": LOAD_VALUE[lid]} for lid in ALL_LOADS],
-            "constraints": {"stressMax": 9, "traumaMax": 4, "abilitiesMaxAtStart": 1},
-            "playbooks": PLAYBOOKS,
+            "constraints": dict(CONSTRAINTS),
+            # свои копии: PLAYBOOKS — общий модульный каталог, из которого построен PLAYBOOK_INDEX
+            "playbooks": deepcopy(PLAYBOOKS),
             "initialData": {
                 "playbookId": None,
                 "abilities": [],
@@ -99,43 +146,108 @@ class CharactersManager:
                 res[attr] += 1
         return res
 
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult:
-        ctx = context or {}
-        issues: list[ValidationIssue] = []
-
+    def validate_and_enrich(self, payload: Payload, context: dict[str, Any] | None = None) -> ValidateResult:
         # --- parse ---
+        ch, issues = parse_payload(_CHARACTER, payload)
+        if ch is None:
+            return ValidateResult(ok=False, issues=issues, data=None)
+
+        # один dump на весь лист: items уже разобраны как ItemData внутри CharacterData
+        return self._check_and_enrich(ch.model_dump(), issues, context or {}, touched=None, derived={})
+
+    def validate_patch(
+        self,
+        prev: dict[str, Any],
+        patch: list[dict[str, Any]],
+        context: dict[str, Any] | None = None,
+    ) -> ValidateResult:
+        """
+        Инкрементальная валидация: prev — ранее принятые (обогащённые) данные, patch — JSON Patch
+        от клиента. Разбираются только изменённые поля, перепроверяются только правила, чьи входы
+        затронуты; результат совпадает с validate_and_enrich(apply_patch(prev, patch)).
+        prev не изменяется, неизменённые части результата разделяются с ним.
+        """
+        ctx = context or {}
         try:
-            ch = CharacterData.model_validate(payload) if hasattr(CharacterData, "model_validate") else CharacterData.parse_obj(payload)
-        except ValidationError as e:
-            for err in e.errors():
-                loc = ".".join(str(x) for x in err.get("loc", []))
-                issues.append(
-                    ValidationIssue(
-                        path=f"data.{loc}" if loc else "data",
-                        message=err.get("msg", "Invalid"),
-                        icon="error",
-                    )
-                )
+            doc = apply_patch(prev, patch)
+            touched = touched_roots(patch)
+        except JsonPatchError as e:
+            return ValidateResult(ok=False, issues=[ValidationIssue(path="patch", message=str(e), icon="error")], data=None)
+
+        prev_derived = prev.get("derived") if isinstance(prev, dict) else None
+        if (
+            touched is None
+            or not isinstance(doc, dict)
+            or not isinstance(prev_derived, dict)
+            or not {"attributes", "loadValue", "traumaCount"} <= prev_derived.keys()
+            or any(name not in prev for name in _CHARACTER_FIELDS)
+        ):
+            # патч корня или prev не из validate_and_enrich — честная полная валидация
+            return self.validate_and_enrich(doc, ctx)
+
+        fields, issues = _FIELDS.parse(doc, touched.intersection(_CHARACTER_FIELDS))
+        if issues:
+            return ValidateResult(ok=False, issues=issues, data=None)
+
+        data = {name: fields[name] if name in fields else doc[name] for name in _CHARACTER_FIELDS}
+        return self._check_and_enrich(data, issues, ctx, touched=touched, derived=dict(prev_derived))
+
+    def _check_and_enrich(
+        self,
+        data: dict[str, Any],
+        issues: list[ValidationIssue],
+        ctx: dict[str, Any],
+        *,
+        touched: set[str] | None,
+        derived: dict[str, Any],
+    ) -> ValidateResult:
+        # touched=None — полная валидация; иначе правило запускается, только если менялись его входы
+        # (предупреждение про stress не ошибка, поэтому в prev его нет — считаем всегда)
+        for inputs, rule in _RULES:
+            if touched is None or rule is CharactersManager._rule_stress or not touched.isdisjoint(inputs):
+                rule(self, data, issues, derived)
+
+        # --- items: fill quality if missing ---
+        default_q = self._default_item_quality(ctx)
+
+        # If any hard errors -> fail
+        if any(i.level == "error" for i in issues):
             return ValidateResult(ok=False, issues=issues, data=None)
 
+        # --- enrich ---
+        if touched is None or "items" in touched:
+            for it_data in data["items"]:
+                if it_data.get("quality") is None:
+                    it_data["quality"] = default_q
+
+        data["derived"] = {
+            "attributes": derived["attributes"],  # resistance dice pools [file:17]
+            "loadValue": derived["loadValue"],  # light=3, normal=5, heavy=6 [file:17]
+            "defaultItemQualityUsed": default_q,
+            "traumaCount": derived["traumaCount"],
+        }
+        return ValidateResult(ok=True, issues=issues, data=data)
+
+    # ---- правила по полям листа; data — dump CharacterData, правила не мутируют вложенные объекты ----
+
+    def _rule_actions(self, data: dict[str, Any], issues: list[ValidationIssue], derived: dict[str, Any]) -> None:
         # --- actions: unknown keys + normalize missing to 0 ---
-        for key in ch.actions.keys():
+        actions = data["actions"]
+        for key in actions.keys():
             if key not in ALL_ACTIONS:
                 issues.append(ValidationIssue(path=f"data.actions.{key}", message="Unknown action", icon="error"))
 
-        normalized_actions: dict[ActionId, int] = {a: int(ch.actions.get(a, 0)) for a in ALL_ACTIONS}
+        normalized_actions: dict[ActionId, int] = {a: int(actions.get(a, 0)) for a in ALL_ACTIONS}
+        data["actions"] = normalized_actions
+        derived["attributes"] = self._compute_attributes(normalized_actions)
 
+    def _rule_abilities(self, data: dict[str, Any], issues: list[ValidationIssue], derived: dict[str, Any]) -> None:
         # --- playbook / abilities ---
-
-        # Собираем доступные плейбуки и их способности из конфига (PLAYBOOKS)
-        valid_playbook_ids = {p.get("id") for p in PLAYBOOKS if isinstance(p, dict)}
-        playbook_map: dict[str, dict[str, Any]] = {
-            p["id"]: p for p in PLAYBOOKS
-            if isinstance(p, dict) and isinstance(p.get("id"), str)
-        }
+        playbook_id = data["playbookId"]
+        playbook = PLAYBOOK_INDEX.get(playbook_id) if playbook_id is not None else None
 
         # playbookId: либо None, либо валидный id
-        if ch.playbookId is not None and ch.playbookId not in valid_playbook_ids:
+        if playbook_id is not None and playbook is None:
             issues.append(
                 ValidationIssue(
                     path="data.playbookId",
@@ -145,7 +257,7 @@ class CharactersManager:
             )
 
         # abilities: нормализация + проверки
-        abilities = list(ch.abilities or [])
+        abilities = list(data["abilities"] or [])
 
         # уникальность
         if len(set(abilities)) != len(abilities):
@@ -158,32 +270,18 @@ class CharactersManager:
             )
 
         # проверка принадлежности к выбранному плейбуку
-        if ch.playbookId is not None and ch.playbookId in playbook_map:
-            pb = playbook_map[ch.playbookId]
-            pb_abilities = pb.get("abilities") or []
-            allowed_ability_ids = {
-                a.get("id")
-                for a in pb_abilities
-                if isinstance(a, dict) and isinstance(a.get("id"), str)
-            }
-
+        if playbook is not None:
             for ab in abilities:
-                if ab not in allowed_ability_ids:
+                if ab not in playbook.ability_ids:
                     issues.append(
                         ValidationIssue(
                             path="data.abilities",
-                            message=f"Ability '{ab}' is not available for playbook '{ch.playbookId}'",
+                            message=f"Ability '{ab}' is not available for playbook '{playbook_id}'",
                             icon="error",
                         )
                     )
 
-        # лимит на стартовые способности (из constraints; по умолчанию 1)
-        abilities_max = 1
-        try:
-            cfg = self.config(ctx)
-            abilities_max = int((cfg.get("constraints") or {}).get("abilitiesMaxAtStart", 1))
-        except Exception:
-            abilities_max = 1
+        abilities_max = CONSTRAINTS["abilitiesMaxAtStart"]
 
         if abilities_max >= 0 and len(abilities) > abilities_max:
             issues.append(
@@ -194,10 +292,12 @@ class CharactersManager:
                 )
             )
 
+        data["abilities"] = abilities
 
+    def _rule_stress(self, data: dict[str, Any], issues: list[ValidationIssue], derived: dict[str, Any]) -> None:
         # --- stress ---
         # RAW: max track 9; overflow means take trauma. Here we warn if > 9. [file:17]
-        if ch.stress > 9:
+        if data["stress"] > CONSTRAINTS["stressMax"]:
             issues.append(
                 ValidationIssue(
                     path="data.stress",
@@ -207,16 +307,23 @@ class CharactersManager:
                 )
             )
 
+    def _rule_traumas(self, data: dict[str, Any], issues: list[ValidationIssue], derived: dict[str, Any]) -> None:
         # --- traumas ---
-        if len(ch.traumas or []) > 4:
-            issues.append(ValidationIssue(path="data.traumas", message="Too many traumas (max 4)", icon="error"))
-        if len(set(ch.traumas or [])) != len(ch.traumas or []):
+        traumas = data["traumas"] or []
+        if len(traumas) > CONSTRAINTS["traumaMax"]:
+            issues.append(ValidationIssue(path="data.traumas", message=f"Too many traumas (max {CONSTRAINTS['traumaMax']})", icon="error"))
+        if len(set(traumas)) != len(traumas):
             issues.append(ValidationIssue(path="data.traumas", message="Traumas must be unique", icon="error"))
+        derived["traumaCount"] = len(traumas)
 
+    def _rule_load(self, data: dict[str, Any], issues: list[ValidationIssue], derived: dict[str, Any]) -> None:
         # --- load ---
-        if ch.load is not None and ch.load not in ALL_LOADS:
+        load = data["load"]
+        if load is not None and load not in ALL_LOADS:
             issues.append(ValidationIssue(path="data.load", message="Unknown load value", icon="error"))
+        derived["loadValue"] = LOAD_VALUE.get(load, None)
 
+    def _rule_harm(self, data: dict[str, Any], issues: list[ValidationIssue], derived: dict[str, Any]) -> None:
         # --- harm (2/2/1) + normalize ---
         def norm_cell(x: Any) -> Any:
             if x is None:
@@ -224,10 +331,10 @@ class CharactersManager:
             s = str(x).strip()
             return s if s else None
 
-        harm_obj = ch.harm
-        l1 = list(getattr(harm_obj, "l1", []) or [])
-        l2 = list(getattr(harm_obj, "l2", []) or [])
-        l3 = norm_cell(getattr(harm_obj, "l3", None))
+        harm = data["harm"] or {}
+        l1 = list(harm.get("l1") or [])
+        l2 = list(harm.get("l2") or [])
+        l3 = norm_cell(harm.get("l3"))
 
         if len(l1) != 2:
             issues.append(ValidationIssue(path="data.harm.l1", message="harm.l1 must have exactly 2 slots", icon="error"))
@@ -237,40 +344,15 @@ class CharactersManager:
         # normalize even if wrong length, so UI won't break after you fix validation errors
         l1 = (l1 + [None, None])[:2]
         l2 = (l2 + [None, None])[:2]
-        harm_l1 = [norm_cell(x) for x in l1]
-        harm_l2 = [norm_cell(x) for x in l2]
+        data["harm"] = {"l1": [norm_cell(x) for x in l1], "l2": [norm_cell(x) for x in l2], "l3": l3}
 
-        # --- items: fill quality if missing ---
-        default_q = self._default_item_quality(ctx)
-        enriched_items: list[dict[str, Any]] = []
-        for idx, it in enumerate(ch.items or []):
-            try:
-                it_obj = ItemData.model_validate(it) if hasattr(ItemData, "model_validate") else ItemData.parse_obj(it)  # type: ignore[arg-type]
-            except ValidationError:
-                issues.append(ValidationIssue(path=f"data.items.{idx}", message="Invalid item payload", icon="error"))
-                continue
-
-            it_data = it_obj.model_dump() if hasattr(it_obj, "model_dump") else it_obj.dict()
-            if it_data.get("quality") is None:
-                it_data["quality"] = default_q
-            enriched_items.append(it_data)
-
-        # If any hard errors -> fail
-        if any(i.level == "error" for i in issues):
-            return ValidateResult(ok=False, issues=issues, data=None)
-
-        # --- enrich ---
-        data = ch.model_dump() if hasattr(ch, "model_dump") else ch.dict()
-        data["actions"] = normalized_actions
-        data["playbookId"] = ch.playbookId
-        data["abilities"] = abilities
-        data["items"] = enriched_items
-        data["harm"] = {"l1": harm_l1, "l2": harm_l2, "l3": l3}
 
-        data.setdefault("derived", {})
-        data["derived"]["attributes"] = self._compute_attributes(normalized_actions)  # resistance dice pools [file:17]
-        data["derived"]["loadValue"] = LOAD_VALUE.get(data.get("load"), None)  # light=3, normal=5, heavy=6 [file:17]
-        data["derived"]["defaultItemQualityUsed"] = default_q
-        data["derived"]["traumaCount"] = len(data.get("traumas") or [])
-
-        return ValidateResult(ok=True, issues=issues, data=data)
+# (поля-входы, правило) в порядке issues полной валидации
+_RULES = (
+    (("actions",), CharactersManager._rule_actions),
+    (("playbookId", "abilities"), CharactersManager._rule_abilities),
+    (("stress",), CharactersManager._rule_stress),
+    (("traumas",), CharactersManager._rule_traumas),
+    (("load",), CharactersManager._rule_load),
+    (("harm",), CharactersManager._rule_harm),
+)
@@ -1,18 +1,85 @@
 from __future__ import annotations
 
-from typing import Any, Literal, Optional
-from pydantic import BaseModel
+from typing import Annotated, Any, Iterable, Literal, Optional, Union
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from .types.base import PluginModel
 
 # Контракт такой же, как в твоём примере
 EntityKind = Literal["character", "npc", "item", "location", "obstacle"]  # [file:1]
 
-class ValidationIssue(BaseModel):
+class ValidationIssue(PluginModel):
     path: str
     message: str
     icon: Optional[str] = None
     level: Literal["error", "warning"] = "error"
 
-class ValidateResult(BaseModel):
+class ValidateResult(PluginModel):
     ok: bool
     issues: list[ValidationIssue] = []
     data: Optional[Any] = None
+
+
+# payload с фронта: уже разобранный dict или сырые JSON-байты, как пришли по сети
+Payload = Union[dict[str, Any], bytes, bytearray]
+
+
+def parse_payload(adapter: TypeAdapter[Any], payload: Payload) -> tuple[Any, list[ValidationIssue]]:
+    """
+    Разбор payload через заранее созданный TypeAdapter: байты — сразу validate_json
+    (без промежуточного dict), остальное — validate_python (строка, как и любое не-объектное
+    значение, даёт обычную ошибку "должен быть объектом"). Ошибки -> issues с путями data.<loc>.
+    """
+    try:
+        if isinstance(payload, (bytes, bytearray)):
+            return adapter.validate_json(payload), []
+        return adapter.validate_python(payload), []
+    except ValidationError as e:
+        issues: list[ValidationIssue] = []
+        for err in e.errors(include_url=False):
+            loc = ".".join(str(x) for x in err.get("loc", []))
+            issues.append(ValidationIssue(path=f"data.{loc}" if loc else "data", message=err.get("msg", "Invalid"), icon="error"))
+        return None, issues
+
+
+class FieldParser:
+    """
+    Разбор отдельных полей модели — для инкрементальной валидации, когда патч меняет только
+    часть листа. Ошибки и dump каждого поля такие же, как при model_validate/model_dump всей модели.
+    """
+
+    def __init__(self, model: type[BaseModel]) -> None:
+        self.model = model
+        self._adapters: dict[str, TypeAdapter[Any]] = {}
+
+    def _adapter(self, name: str) -> TypeAdapter[Any]:
+        adapter = self._adapters.get(name)
+        if adapter is None:
+            field = self.model.model_fields[name]
+            tp = Annotated[(field.annotation, *field.metadata)] if field.metadata else field.annotation
+            adapter = self._adapters[name] = TypeAdapter(tp)
+        return adapter
+
+    def parse(self, doc: dict[str, Any], names: Iterable[str]) -> tuple[dict[str, Any], list[ValidationIssue]]:
+        """{поле: dump значения} для names; отсутствующие поля берут default модели."""
+        wanted = set(names)
+        out: dict[str, Any] = {}
+        issues: list[ValidationIssue] = []
+        # порядок полей модели — тот же порядок ошибок, что у model_validate
+        for name, field in self.model.model_fields.items():
+            if name not in wanted:
+                continue
+            adapter = self._adapter(name)
+            if name in doc:
+                try:
+                    value = adapter.validate_python(doc[name])
+                except ValidationError as e:
+                    for err in e.errors(include_url=False):
+                        loc = ".".join(str(x) for x in (name, *err.get("loc", ())))
+                        issues.append(ValidationIssue(path=f"data.{loc}", message=err.get("msg", "Invalid"), icon="error"))
+                    continue
+            else:
+                value = field.get_default(call_default_factory=True)
+            out[name] = adapter.dump_python(value)
+        return out, issues
@@ -2,15 +2,30 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import ValidationError
-
-from .common import ValidateResult, ValidationIssue
+from .common import Payload, ValidateResult, ValidationIssue, parse_payload
 from .types import ItemData
+from .types.base import make_adapter
+from ....config_cache import CachedConfig, ConfigBlob
+
+_ITEM = make_adapter(ItemData)
+
 
 class ItemsManager:
     kind = "item"
+    # ключи context, влияющие на результат validate (для кэша результатов)
+    context_keys: tuple[str, ...] = ()
+
+    def __init__(self) -> None:
+        self._config = CachedConfig(self._build_config)
 
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]:
+        # не зависит от context -> собирается один раз (см. CachedConfig), отдаётся копия
+        return self._config.get().copy()
+
+    def config_blob(self) -> ConfigBlob:
+        return self._config.get()
+
+    def _build_config(self) -> dict[str, Any]:
         return {
             "tags": ["gear", "weapon", "tool", "arcane", "misc"],
             "constraints": {
@@ -26,19 +41,13 @@ class ItemsManager:
             },
         }
 
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult:
+    def validate_and_enrich(self, payload: Payload, context: dict[str, Any] | None = None) -> ValidateResult:
         ctx = context or {}
-        issues: list[ValidationIssue] = []
-
-        try:
-            item = ItemData.model_validate(payload) if hasattr(ItemData, "model_validate") else ItemData.parse_obj(payload)
-        except ValidationError as e:
-            for err in e.errors():
-                loc = ".".join(str(x) for x in err.get("loc", []))
-                issues.append(ValidationIssue(path=f"data.{loc}" if loc else "data", message=err.get("msg", "Invalid"), icon="error"))
+        item, issues = parse_payload(_ITEM, payload)
+        if item is None:
             return ValidateResult(ok=False, issues=issues, data=None)
 
-        data = item.model_dump() if hasattr(item, "model_dump") else item.dict()
+        data = item.model_dump()
 
         # Нормализация tags: strip + unique (как у тебя в items_manager.py)
         tags = []
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Any
+import threading
+from typing import Any, Optional
+
+from pydantic_core import from_json
 
 from .types import EntityKind
 from .characters_manager import CharactersManager
@@ -8,52 +11,194 @@ from .items_manager import ItemsManager
 from .actions_manager import ActionsManager
 
 from .workflows import RollActionWorkflow, WorkflowRouter
+from .workflows.delta import delta_result
+from .workflows.fanout import FanoutPlan, build_fanout
+from .workflows.store import StoredAction, WorkflowStore
+from .workflows.journal import ReplayError, WorkflowJournal, replay_state
+from .workflows.presentation import StageFrames, build_frames, view_for
+from .workflows.roll_action.dice import recording
+from .scene_cache import SceneCache, SceneEntry, apply_session_patch
+from ....config_cache import ConfigBlob
+from ....json_patch import JsonPatchError, apply_patch
+from ....metrics import RouteMetrics, render_prometheus
+from ....validation_cache import ValidationCache, default_cache, render_prometheus as render_cache_prometheus
 
 
 class RulesFactory:
     system_id = "blades"
 
-    def __init__(self) -> None:
+    def __init__(self, version: str = "") -> None:
+        self.version = version
         self.characters = CharactersManager()
         self.items = ItemsManager()
         self.actions = ActionsManager()
 
+        self.route_metrics = RouteMetrics(self.system_id)
+        self.validation_cache: Optional[ValidationCache] = default_cache()
+
         self.roll_action = RollActionWorkflow()
-        self.workflow_router = WorkflowRouter()
+        self.workflow_router = WorkflowRouter(metrics=self.route_metrics)
         self.workflow_router.register(
             "blades.roll_action",
             start=self.roll_action.start,
             present=self.roll_action.present,
             submit=self.roll_action.submit,
+            load=self.roll_action.load,
         )
+        self.workflow_store = WorkflowStore()
+        self.scene_cache = SceneCache()
+
+    def warmup(self) -> None:
+        # прогреваем каталоги до приёма трафика (вызывается из plugins.warmup)
+        self.characters.config_blob()
+        self.items.config_blob()
+
+    def config_blob(self, entity: EntityKind) -> Optional[ConfigBlob]:
+        """Готовый config сущности: JSON-байты, gzip и ETag для ответа 304 на бэке."""
+        manager = {"character": self.characters, "item": self.items}.get(entity)
+        return manager.config_blob() if manager is not None else None
+
+    def present_frames(self, action_id: str) -> Optional[StageFrames]:
+        """
+        Готовое представление текущей стадии сохранённого workflow: JSON-байты по видам аудитории
+        (см. workflows.presentation). Один present() на ревизию, дальше — те же байты всем зрителям.
+        """
+        entry = self.workflow_store.get(action_id)
+        return self._frames(entry) if entry is not None else None
+
+    def _frames(self, entry: StoredAction) -> StageFrames:
+        frames = entry.frames
+        if frames is None:
+            envelope = self.workflow_router.present(
+                entry.action_key,
+                scene=entry.scene,
+                actor_user_id="",
+                participants_dict=entry.participants,
+                wf_dict=entry.workflow,
+            )
+            # гонка двух первых зрителей безвредна: обе сборки дают одинаковые байты
+            frames = entry.frames = build_frames(envelope, entry.revision)
+        return frames
+
+    def fanout_plan(self, action_id: str) -> Optional[FanoutPlan]:
+        """
+        План рассылки последнего шага сохранённого workflow: группы получателей и по кадру (JSON-байты)
+        на вид — бэк шлёт одни и те же байты сотням зрителей (см. workflows.fanout).
+        """
+        entry = self.workflow_store.get(action_id)
+        return self._fanout(action_id, entry) if entry is not None else None
+
+    def _fanout(self, action_id: str, entry: StoredAction) -> FanoutPlan:
+        plan = entry.fanout
+        if plan is None:
+            plan = entry.fanout = build_fanout(action_id, self._frames(entry), entry.broadcasts, entry.participants)
+        return plan
+
+    def enable_validation_cache(self, maxsize: int = 1024, ttl: float = 0.0) -> ValidationCache:
+        self.validation_cache = ValidationCache(maxsize, ttl)
+        return self.validation_cache
+
+    def validation_cache_stats(self) -> Optional[dict[str, int]]:
+        return self.validation_cache.stats() if self.validation_cache is not None else None
+
+    def metrics(self) -> list[dict[str, Any]]:
+        return self.route_metrics.snapshot()
+
+    def metrics_prometheus(self) -> str:
+        text = render_prometheus([self.route_metrics])
+        if self.validation_cache is not None:
+            text += render_cache_prometheus([(self.system_id, self.validation_cache)])
+        return text
 
     def handle(self, kind: str, entity: EntityKind, payload: Any, context: Any) -> Any:
+        m = self.route_metrics
+        if not m.enabled:
+            return self._handle(kind, entity, payload, context)
+        # один запрос — одна запись по kind; стадии внутри (и их переигрывание) WorkflowRouter пишет как stage.*
+        target = entity or (payload.get("actionKey") if isinstance(payload, dict) else None) or ""
+        return m.timed(kind, str(target), "", payload, lambda: self._handle(kind, entity, payload, context))
+
+    def _handle(self, kind: str, entity: EntityKind, payload: Any, context: Any) -> Any:
         ctx = context if isinstance(context, dict) else {}
         p = payload or {}
 
         if kind == "actions.list":
             role = p.get("role")
-            scene = p.get("scene") or {}
-            res = self.actions.list_actions(scene, role)
+            scene, err = self._resolve_scene(p)
+            if err is not None:
+                return err
+            res = self.actions.list_actions(scene.scene if isinstance(scene, SceneEntry) else scene, role)
             return [a.model_dump(mode="json") for a in res]
 
         if kind == "workflow.start":
             action_key = p.get("actionKey")
             res = self.workflow_router.start(action_key, payload=p)
             # оставляем ok для твоего SessionActionManager.create_action
-            return res.model_dump(mode="json") if hasattr(res, "model_dump") else res
+            out = res.to_response() if hasattr(res, "to_response") else res
+            started = isinstance(out, dict) and out.get("ok") and isinstance(out.get("workflow"), dict)
+            # сцена с sessionId — сразу в scene_cache, как у submit: первый submit обойдётся sceneVersion/sceneDelta
+            seeded = None
+            if started and isinstance(p.get("sessionId"), str) and isinstance(p.get("scene"), dict):
+                version = p.get("sceneVersion")
+                seeded = self.scene_cache.put(p["sessionId"], p["scene"], version if _is_int(version) else 0)
+            # с actionId состояние остаётся в плагине: дальше submit шлёт только input + expectedRevision
+            if started and isinstance(p.get("actionId"), str):
+                participants, scene = p.get("participants") or {}, p.get("scene") or {}
+                self.workflow_store.put(p["actionId"], StoredAction(
+                    action_key=action_key,
+                    workflow=out["workflow"],
+                    participants=participants,
+                    scene=scene,
+                    journal=WorkflowJournal(action_key, out["workflow"], participants, scene,
+                                            scene_version=seeded.version if seeded is not None else None),
+                ))
+                out["revision"] = out["workflow"].get("revision")
+            return out
+
+        if kind == "workflow.submit" and "workflow" not in p and p.get("actionId") is not None:
+            return self._submit_stored(p)
+
+        if kind == "workflow.present":
+            return self._present(p)
+
+        if kind == "workflow.snapshot":
+            ids = p.get("actionIds")
+            return {"ok": True, "actions": self.workflow_store.snapshot(ids if isinstance(ids, list) else None)}
+
+        if kind == "workflow.restore":
+            actions = p.get("actions")
+            return {"ok": True, "restored": self.workflow_store.restore(actions if isinstance(actions, list) else [])}
+
+        if kind == "workflow.journal":
+            entry = self.workflow_store.get(str(p.get("actionId") or ""))
+            if entry is None or entry.journal is None:
+                return {"ok": False, "issues": [_issue("actionId", f"Unknown action: {p.get('actionId')!r}")]}
+            return {"ok": True, "revision": entry.revision, "journal": entry.journal.to_dict()}
+
+        if kind == "workflow.replay":
+            return self._replay(p)
+
+        if kind == "workflow.drop":
+            return {"ok": True, "dropped": self.workflow_store.drop(str(p.get("actionId") or ""))}
 
         if kind == "workflow.submit":
             action_key = p.get("actionKey")
+            scene, err = self._resolve_scene(p)
+            if err is not None:
+                return err
             res = self.workflow_router.submit(
                 action_key,
-                scene=p.get("scene") or {},
+                scene=scene.index if isinstance(scene, SceneEntry) else scene,
                 actor_user_id=p.get("actorUserId") or "",
                 participants_dict=p.get("participants") or {},
                 wf_dict=p.get("workflow") or {},
                 input_dict=p.get("input") or {},
             )
-            return res.model_dump(mode="json") if hasattr(res, "model_dump") else res
+            out = self._scene_followup(p, scene, res.to_response() if hasattr(res, "to_response") else res)
+            # deltaFrom — получатели уже держат эту ревизию: отдаём патч вместо всего workflow
+            if p.get("deltaFrom") is not None and isinstance(out, dict):
+                return delta_result(out, p.get("workflow"), p["deltaFrom"])
+            return out
 
         # old entity routing
         if entity == "character":
@@ -74,14 +219,264 @@ class RulesFactory:
             return {"ok": False, "issues": [{"path": "", "message": "Unknown route", "icon": "error", "level": "error"}]}
 
         if kind == "config":
-            return manager.config(ctx)
+            # условный запрос: клиент прислал ETag своей копии -> не гоняем весь конфиг заново
+            etag = payload.get("etag") if isinstance(payload, dict) else None
+            current = manager.config_blob().etag
+            if etag and etag == current:
+                return {"notModified": True, "etag": etag}
+            # config() — своя копия; etag в ней — чтобы клиенту было что прислать в следующем условном запросе
+            out = manager.config(ctx)
+            out["etag"] = current
+            return out
 
         if kind == "validate":
-            res = manager.validate_and_enrich(payload or {}, ctx)
-            return res.model_dump() if hasattr(res, "model_dump") else res.dict()
+            return self._validate(manager, entity, payload, ctx)
+        if kind == "validate_patch":
+            return self._validate_patch(manager, payload if isinstance(payload, dict) else {}, ctx)
 
         return {"ok": False, "issues": [{"path": "", "message": "Unknown route", "icon": "error", "level": "error"}]}
 
+    def _resolve_scene(self, p: dict[str, Any], fallback: Optional[dict[str, Any]] = None) -> tuple[Any, Optional[dict[str, Any]]]:
+        """
+        Сцена вызова -> (dict | SceneEntry, None) или (None, ответ needScene).
+          "scene"                                   — целиком (с "sessionId" ещё и кладётся в scene_cache с "sceneVersion", по умолчанию 0);
+          "sessionId" + "sceneVersion"              — из scene_cache, если там ровно эта версия;
+          "sessionId" + "sceneDelta" {"from", "to", "patch"} — RFC 6902 поверх версии from.
+        На needScene бэк повторяет вызов с полной сценой.
+        """
+        session_id, scene = p.get("sessionId"), p.get("scene")
+        if not isinstance(session_id, str):
+            return (scene if isinstance(scene, dict) else (fallback if fallback is not None else {})), None
+        version = p.get("sceneVersion")
+        if isinstance(scene, dict):
+            return self.scene_cache.put(session_id, scene, version if _is_int(version) else 0), None
+        delta = p.get("sceneDelta")
+        entry = None
+        if isinstance(delta, dict):
+            if _is_int(delta.get("from")) and _is_int(delta.get("to")) and isinstance(delta.get("patch"), list):
+                entry = self.scene_cache.apply_delta(session_id, delta["from"], delta["to"], delta["patch"])
+        elif _is_int(version):
+            entry = self.scene_cache.get(session_id, version)
+        if entry is None:
+            current = self.scene_cache.version(session_id)
+            return None, {"ok": False, "needScene": True, "sceneVersion": current,
+                          "issues": [_issue("sceneVersion", f"Scene is not cached at this version (plugin has {current})")]}
+        return entry, None
+
+    def _scene_followup(self, p: dict[str, Any], scene: Any, out: Any) -> Any:
+        # свой sessionPatch сразу применяем к сцене сессии: следующая стадия видит новый стресс без полной сцены
+        if not isinstance(scene, SceneEntry) or not isinstance(out, dict):
+            return out
+        version = scene.version
+        patch = out.get("sessionPatch")
+        if out.get("ok") and isinstance(patch, dict):
+            version = self.scene_cache.apply_session_patch(p["sessionId"], scene.version, patch)
+        return {**out, "sceneVersion": version}
+
+    def _present(self, p: dict[str, Any]) -> dict[str, Any]:
+        """
+        {"actionId", "viewerUserId"?} -> {"ok", "revision", "view", "envelope"} из кэша ревизии (present_frames);
+        без actionId — {"actionKey", "participants", "workflow", "viewerUserId"?}, envelope собирается заново.
+        """
+        viewer = p.get("viewerUserId")
+        if "workflow" not in p and p.get("actionId") is not None:
+            action_id = p.get("actionId")
+            entry = self.workflow_store.get(action_id) if isinstance(action_id, str) else None
+            if entry is None:
+                return {"ok": False, "issues": [_issue("actionId", f"Unknown action: {action_id!r}")]}
+            frames, participants = self._frames(entry), entry.participants
+        else:
+            participants = p.get("participants") or {}
+            wf = p.get("workflow") if isinstance(p.get("workflow"), dict) else {}
+            envelope = self.workflow_router.present(
+                p.get("actionKey"),
+                scene=p.get("scene") or {},
+                actor_user_id=viewer or "",
+                participants_dict=participants,
+                wf_dict=wf,
+            )
+            if isinstance(envelope, dict) and envelope.get("ok") is False:
+                return envelope
+            frames = build_frames(envelope, _revision(wf))
+            view = view_for(frames.audience, viewer, participants)
+            return {"ok": True, "revision": frames.revision, "view": view, "envelope": frames.views[view]}
+        view = view_for(frames.audience, viewer, participants)
+        # кадры ревизии общие для всех зрителей -> каждому свой dict из готовых байтов
+        return {"ok": True, "revision": frames.revision, "view": view, "envelope": from_json(frames.frames[view])}
+
+    def _replay(self, p: dict[str, Any]) -> dict[str, Any]:
+        """
+        {"journal": {"actionKey", "participants", "workflow", "scene", "events", "snapshots"?}, "revision"?, "actionId"?}
+        -> состояние workflow на ревизии (по умолчанию последней), собранное переигрыванием событий
+        с ближайшего снимка.
+        С actionId результат кладётся в workflow_store вместе с журналом (восстановление после рестарта).
+        """
+        data = p.get("journal")
+        if not isinstance(data, dict):
+            return {"ok": False, "issues": [_issue("journal", "journal is required")]}
+        journal = WorkflowJournal.from_dict(data)
+        revision = p.get("revision") if _is_int(p.get("revision")) else None
+        try:
+            wf, scene, participants = replay_state(self.workflow_router, journal, revision)
+        except ReplayError as e:
+            return {"ok": False, "issues": [_issue("journal.events", str(e))]}
+        action_id = p.get("actionId")
+        if isinstance(action_id, str) and revision is None:
+            journal.track(scene, participants)
+            self.workflow_store.put(action_id, StoredAction(
+                action_key=journal.action_key, workflow=wf, participants=participants, scene=scene, journal=journal,
+            ))
+        return {"ok": True, "revision": _revision(wf), "workflow": wf}
+
+    def _submit_stored(self, p: dict[str, Any]) -> Any:
+        """
+        workflow.submit по состоянию из workflow_store: {"actionId", "expectedRevision", "actorUserId", "input"}
+        (+ "participants"/"scene" или "sessionId"/"sceneVersion", если поменялись). Принятый шаг кладётся
+        compare-and-set'ом, ответ — как у обычного submit плюс "revision" (с "deltaFrom" — дельта, см. delta_result;
+        с "fanout": true — план рассылки, см. fanout_plan).
+        Устаревшая ревизия или проигранная гонка -> ok=False с текущей "revision";
+        неизвестный actionId -> бэк делает workflow.restore и повторяет.
+        """
+        store = self.workflow_store
+        action_id, expected = p.get("actionId"), p.get("expectedRevision")
+        entry = store.get(action_id) if isinstance(action_id, str) else None
+        if entry is None:
+            return {"ok": False, "issues": [_issue("actionId", f"Unknown action: {action_id!r}")]}
+        if not isinstance(expected, int) or isinstance(expected, bool):
+            return {"ok": False, "issues": [_issue("expectedRevision", "expectedRevision is required")], "revision": entry.revision}
+        if expected != entry.revision:
+            return _stale(expected, entry.revision)
+
+        participants = p["participants"] if isinstance(p.get("participants"), dict) else entry.participants
+        scene, err = self._resolve_scene(p, entry.scene)
+        if err is not None:
+            return err
+        scene_dict = scene.scene if isinstance(scene, SceneEntry) else scene
+        actor, input_dict = p.get("actorUserId") or "", p.get("input") or {}
+        # модель прошлого шага забирает один submit; нет её (после start/restore или гонки) — разбираем dict
+        model = entry.take_model()
+        if model is None:
+            model = self.workflow_router.load(entry.action_key, entry.workflow)
+        with recording() as draws:
+            res = self.workflow_router.submit(
+                entry.action_key,
+                scene=scene.index if isinstance(scene, SceneEntry) else scene,
+                actor_user_id=actor,
+                participants_dict=participants,
+                wf_dict=entry.workflow,
+                input_dict=input_dict,
+                wf_model=model,
+            )
+        out = res.to_response() if hasattr(res, "to_response") else res
+        if not isinstance(out, dict):
+            return out
+        wf = out.get("workflow")
+        event = None
+        if out.get("ok") and isinstance(wf, dict):
+            journal = entry.journal
+
+            def record() -> None:
+                # под блокировкой стора: события журнала идут строго в порядке ревизий
+                nonlocal event
+                if journal is not None:
+                    event = journal.append(
+                        stage_key=str(entry.workflow.get("stageKey") or ""),
+                        actor=actor,
+                        input_dict=input_dict,
+                        draws=draws,
+                        workflow=wf,
+                        scene=scene_dict,
+                        session_patch=out.get("sessionPatch"),
+                        participants=participants,
+                        scene_version=scene.version if isinstance(scene, SceneEntry) else None,
+                        next_scene=next_scene,
+                    )
+
+            # свой sessionPatch сразу в сохранённую сцену: следующий шаг видит новый стресс
+            patch = out.get("sessionPatch")
+            next_scene = apply_session_patch(scene_dict, patch) if isinstance(patch, dict) else scene_dict
+            updated = StoredAction(action_key=entry.action_key, workflow=wf, participants=participants, scene=next_scene,
+                                   journal=journal, broadcasts=out.get("broadcasts") or [],
+                                   model=model)
+            if not store.compare_and_set(action_id, expected, updated, on_commit=record):
+                current = store.get(action_id)
+                return _stale(expected, current.revision if current is not None else None)
+            if p.get("fanout"):
+                # по запросу бэка — готовые кадры для рассылки (in-process бэк берёт байты из fanout_plan)
+                out["fanout"] = self._fanout(action_id, updated).to_dict()
+        out = self._scene_followup(p, scene, out)
+        if event is not None:
+            # бэку — дописать в свой долговременный журнал (см. workflow.replay)
+            out["event"] = event
+        if p.get("deltaFrom") is not None:
+            return delta_result(out, entry.workflow, p["deltaFrom"])
+        return {**out, "revision": wf.get("revision") if isinstance(wf, dict) else entry.revision}
+
+    def _validate(self, manager: Any, entity: EntityKind, payload: Any, ctx: dict[str, Any]) -> dict[str, Any]:
+        cache = self.validation_cache
+        if cache is None:
+            return manager.validate_and_enrich(payload or {}, ctx).model_dump()
+        key = cache.key((self.system_id, self.version), entity, payload or {}, ctx, manager.context_keys)
+        return cache.get_or_compute(key, lambda: manager.validate_and_enrich(payload or {}, ctx).model_dump())
+
+    def _validate_patch(self, manager: Any, p: dict[str, Any], ctx: dict[str, Any]) -> dict[str, Any]:
+        # payload: {"data": принятые обогащённые данные, "revision": их ревизия, "patch": JSON Patch}
+        prev, patch = p.get("data") or {}, p.get("patch") or []
+        revision = p.get("revision") if isinstance(p.get("revision"), int) else 0
+        if hasattr(manager, "validate_patch"):
+            res = manager.validate_patch(prev, patch, ctx)
+        else:
+            try:
+                doc = apply_patch(prev, patch)
+            except JsonPatchError as e:
+                return {"ok": False, "issues": [{"path": "patch", "message": str(e), "icon": "error", "level": "error"}], "data": None, "revision": revision}
+            res = manager.validate_and_enrich(doc, ctx)
+        out = res.model_dump()
+        # новая ревизия — только если изменения приняты
+        out["revision"] = revision + 1 if res.ok else revision
+        return out
+
+    def handle_batch(self, calls: list[tuple[str, EntityKind, Any, Any]]) -> list[Any]:
+        """
+        Пакетный handle для импорта сценария / восстановления сессии: [(kind, entity, payload, context), ...].
+        Весь пакет — одна запись метрик "batch"; валидация идёт через тот же кэш, что у handle().
+        Результаты — в том же порядке и того же вида, что у handle().
+        """
+        m = self.route_metrics
+        if not m.enabled:
+            return self._handle_batch(calls)
+        return m.timed("batch", "", "", calls, lambda: self._handle_batch(calls))
+
+    def _handle_batch(self, calls: list[tuple[str, EntityKind, Any, Any]]) -> list[Any]:
+        # _handle, не handle: вызовы уже внутри замера "batch", второй раз их не считаем
+        return [self._handle(kind, entity, payload, context) for kind, entity, payload, context in calls]
+
+
+def _issue(path: str, message: str) -> dict[str, Any]:
+    return {"path": path, "message": message, "icon": "error", "level": "error"}
+
+
+def _revision(wf: dict[str, Any]) -> int:
+    rev = wf.get("revision")
+    return rev if isinstance(rev, int) else 0
+
+
+def _is_int(v: Any) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _stale(expected: int, current: Optional[int]) -> dict[str, Any]:
+    return {"ok": False, "issues": [_issue("expectedRevision", f"Stale revision {expected}, current is {current}")], "revision": current}
+
+
+# Одна фабрика на версию плагина, общая для всех сессий процесса. Валидация и config состояния не хранят
+# (всё приходит в payload/context), но фабрика держит состояние действий и сессий: workflow_store
+# (workflow.* с actionId, журналы, кадры present/fanout) и scene_cache (вызовы с sessionId).
+# Оно есть только в этом процессе, поэтому такие маршруты должны идти inline — PluginExecutor.mode_for
+# не пускает их в пул (executor.STATEFUL_KINDS), какие бы routes ни были заданы.
+_factories: dict[str, RulesFactory] = {}
+_factories_lock = threading.Lock()
+
 
 class BladesPlugin:
     plugin_id = "blades_in_the_dark"
@@ -90,7 +485,14 @@ class BladesPlugin:
     parent_id = None
 
     def get_factory(self):
-        return RulesFactory()
+        factory = _factories.get(self.plugin_version)
+        if factory is None:
+            with _factories_lock:
+                factory = _factories.get(self.plugin_version)
+                if factory is None:
+                    factory = RulesFactory(self.plugin_version)
+                    _factories[self.plugin_version] = factory
+        return factory
 
     def describe(self):
         return {"id": self.plugin_id, "name": self.plugin_name, "version": self.plugin_version}
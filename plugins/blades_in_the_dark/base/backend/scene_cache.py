@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from pydantic_core import to_json
+
+from .workflows.roll_action.scene import SceneIndex
+from ....json_patch import JsonPatchError, apply_patch
+
+# Сцена сессии на стороне плагина. Бэк присылает её целиком один раз ("scene" + "sceneVersion"),
+# дальше — только номер версии или дельту {"from", "to", "patch"} (RFC 6902).
+# sessionPatch, который выдал сам плагин, применяется здесь же с версией +1 — бэк, применив
+# тот же sessionPatch, должен прийти к той же версии (она возвращается в ответе как "sceneVersion").
+# Номера версий у бэка и плагина общие, поэтому повтор дельты узнаётся по содержимому (from + хэш патча),
+# а не по одному номеру "to": чужая дельта на ту же версию — расхождение, а не ретрай.
+# Присланная сцена принадлежит кэшу: in-process бэк не должен менять этот dict после вызова.
+
+# сколько сессий держим (LRU); выпавшую бэк пришлёт целиком по ответу needScene
+MAX_SESSIONS = 64
+
+
+@dataclass
+class SceneEntry:
+    version: int
+    scene: dict[str, Any]
+    # сцена версии неизменна -> индекс (с кэшем рейтингов/стресса) живёт столько же, сколько версия
+    index: SceneIndex
+    # (from, хэш патча) дельты, которой получена версия; None — полная сцена или свой sessionPatch
+    delta: Optional[tuple[int, bytes]] = None
+
+
+def _entry(version: int, scene: dict[str, Any], delta: Optional[tuple[int, bytes]] = None) -> SceneEntry:
+    return SceneEntry(version=version, scene=scene, index=SceneIndex(scene), delta=delta)
+
+
+def _delta_key(base_version: int, patch: list[Any]) -> Optional[tuple[int, bytes]]:
+    try:
+        return base_version, hashlib.blake2b(to_json(patch), digest_size=16).digest()
+    except Exception:
+        return None
+
+
+def apply_session_patch(scene: dict[str, Any], session_patch: dict[str, Any]) -> dict[str, Any]:
+    """
+    Новая сцена с применённым sessionPatch {"characters": [{"id", "data": {...}}]} — поля data
+    персонажа заменяются; исходная сцена не меняется (копируется только путь до персонажа).
+    """
+    changes = {str(c.get("id")): c.get("data") or {} for c in (session_patch.get("characters") or []) if isinstance(c, dict)}
+    if not changes:
+        return scene
+    players = dict(scene.get("players") or {})
+    for uid, entry in players.items():
+        chars = (entry or {}).get("characters") or []
+        if not any(str(ch.get("id")) in changes for ch in chars):
+            continue
+        new_chars = []
+        for ch in chars:
+            data_patch = changes.get(str(ch.get("id")))
+            if data_patch is not None:
+                data = ch.get("data") if isinstance(ch.get("data"), dict) else {}
+                ch = {**ch, "data": {**data, **data_patch}}
+            new_chars.append(ch)
+        players[uid] = {**entry, "characters": new_chars}
+    return {**scene, "players": players}
+
+
+class SceneCache:
+    def __init__(self, maxsize: int = MAX_SESSIONS) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, SceneEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.deltas = 0
+        self.misses = 0
+
+    def _put(self, session_id: str, entry: SceneEntry) -> SceneEntry:
+        # вызывается под self._lock
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def version(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry.version if entry is not None else None
+
+    def put(self, session_id: str, scene: dict[str, Any], version: int) -> SceneEntry:
+        with self._lock:
+            return self._put(session_id, _entry(version, scene))
+
+    def get(self, session_id: str, version: int) -> Optional[SceneEntry]:
+        """Сцена ровно этой версии или None (нет сессии / версия разошлась)."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry
+
+    def apply_delta(self, session_id: str, base_version: int, version: int, patch: list[Any]) -> Optional[SceneEntry]:
+        """
+        Дельта от base_version; None — в кэше другая версия или патч не применился (нужна полная сцена).
+        Повтор уже применённой дельты (ретрай бэка) отдаёт текущую запись.
+        """
+        delta = _delta_key(base_version, patch)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.version == version and delta is not None and entry.delta == delta:
+                # та же дельта пришла повторно
+                self.hits += 1
+                return entry
+            if entry is None or entry.version != base_version:
+                self.misses += 1
+                return None
+            try:
+                scene = apply_patch(entry.scene, patch)
+            except JsonPatchError:
+                self.misses += 1
+                return None
+            if not isinstance(scene, dict):
+                self.misses += 1
+                return None
+            self.deltas += 1
+            return self._put(session_id, _entry(version, scene, delta))
+
+    def apply_session_patch(self, session_id: str, base_version: int, session_patch: dict[str, Any]) -> Optional[int]:
+        """Свой sessionPatch поверх base_version -> новая версия (base_version + 1); None — сцену уже сменили."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry.version != base_version:
+                return None
+            version = base_version + 1
+            self._put(session_id, _entry(version, apply_session_patch(entry.scene, session_patch)))
+            return version
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(session_id, None) is not None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "deltas": self.deltas, "misses": self.misses}
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import os
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+# RPG_PLUGINS_DEFER_BUILD=1 — схемы pydantic строятся при первой валидации, а не при импорте
+# (быстрее холодный старт воркера, но первый запрос платит за сборку; см. plugins.benchmarks.startup)
+DEFER_BUILD = os.environ.get("RPG_PLUGINS_DEFER_BUILD", "") not in ("", "0")
+
+
+class PluginModel(BaseModel):
+    model_config = ConfigDict(defer_build=DEFER_BUILD)
+
+
+def make_adapter(tp: Any) -> TypeAdapter[Any]:
+    """
+    TypeAdapter для типа payload'а; создавать на уровне модуля, один раз на тип.
+    Для не-моделей (Union и т.п.) сборка откладывается так же, как у PluginModel.
+    """
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return TypeAdapter(tp)
+    return TypeAdapter(tp, config=ConfigDict(defer_build=DEFER_BUILD))
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from typing import Literal, Optional
-from pydantic import BaseModel, Field, NonNegativeInt
+from pydantic import Field, NonNegativeInt
+from .base import PluginModel
 
 from .items import ItemData
 
@@ -30,7 +31,7 @@ PlaybookId = Literal[
 LoadId = Literal["light", "normal", "heavy"]
 LOAD_VALUE: dict[LoadId, int] = {"light": 3, "normal": 5, "heavy": 6}
 
-class HarmTrack(BaseModel):
+class HarmTrack(PluginModel):
     # Level 3: 1 box
     l3: Optional[str] = None
     # Level 2: 2 boxes
@@ -38,7 +39,7 @@ class HarmTrack(BaseModel):
     # Level 1: 2 boxes
     l1: list[Optional[str]] = Field(default_factory=lambda: [None, None])
 
-class CharacterData(BaseModel):
+class CharacterData(PluginModel):
     actions: dict[ActionId, NonNegativeInt] = Field(default_factory=dict)
 
     playbookId: Optional[PlaybookId] = None
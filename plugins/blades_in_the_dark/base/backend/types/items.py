@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from typing import Optional
-from pydantic import BaseModel, Field, NonNegativeInt
+from pydantic import Field, NonNegativeInt
+from .base import PluginModel
 
-class ItemData(BaseModel):
+class ItemData(PluginModel):
     tags: list[str] = Field(default_factory=list)
 
     # Ровно одна характеристика
@@ -1,14 +1,15 @@
 from typing import Any, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import Field
+from ..types.base import PluginModel
 
 ActionRole = Literal["gm", "initiator", "player", "assistant", "observer"]
 
-class ActionParticipant(BaseModel):
+class ActionParticipant(PluginModel):
     userId: str
     roles: set[ActionRole] = Field(default_factory=set)
     meta: dict[str, Any] = Field(default_factory=dict)
 
-class ActionParticipants(BaseModel):
+class ActionParticipants(PluginModel):
     gmUserId: Optional[str] = None
     initiatorUserId: Optional[str] = None
     participants: list[ActionParticipant] = Field(default_factory=list)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Any
+
+from .....json_patch import make_patch
+
+# Дельта-ответы workflow.submit: вместо полного workflow — патч (RFC 6902) от ревизии, которая уже
+# есть у бэка и участников. payload["deltaFrom"] = ревизия получателей; если присланный workflow
+# не этой ревизии (или без неё), отвечаем полным снимком — получатели просто заменяют состояние.
+
+
+def delta_result(res: dict[str, Any], base: Any, delta_from: Any) -> dict[str, Any]:
+    """
+    res — обычный ответ submit, base — workflow из запроса.
+    Дельта:  {..., "workflow": None, "baseRevision": N, "revision": M, "workflowPatch": [...]}
+    Снимок:  {..., "workflow": {...}, "revision": M}
+    """
+    wf = res.get("workflow")
+    if not isinstance(wf, dict):
+        return res
+    out = dict(res)
+    out["revision"] = wf.get("revision")
+    if (
+        isinstance(delta_from, int)
+        and not isinstance(delta_from, bool)
+        and isinstance(base, dict)
+        and base.get("revision") == delta_from
+    ):
+        out["workflow"] = None
+        out["baseRevision"] = delta_from
+        out["workflowPatch"] = make_patch(base, wf)
+    return out
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic_core import to_json
+
+from .presentation import StageFrames, view_for
+
+# План рассылки принятого шага: группы получателей + по одному готовому кадру на каждый вид.
+# Кадр — {"actionId", "revision", "broadcasts", "stage"}: broadcasts шага (бросок кубиков и т.п.) видят все,
+# stage — представление следующей стадии в виде группы (см. workflows.presentation).
+# Бэк шлёт байты кадра как есть во все сокеты группы, не кодируя сообщение на каждого получателя.
+
+
+@dataclass(frozen=True)
+class FanoutGroup:
+    view: str
+    user_ids: tuple[str, ...]
+    # True — плюс все остальные сокеты сессии (зрители), которых плагин не знает
+    rest: bool = False
+
+
+@dataclass(frozen=True)
+class FanoutPlan:
+    revision: int
+    groups: tuple[FanoutGroup, ...]
+    frames: dict[str, bytes]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Для ответа через JSON: кадры — готовый текст, бэк отправляет его без повторного кодирования."""
+        return {
+            "revision": self.revision,
+            "groups": [{"view": g.view, "userIds": list(g.user_ids), "rest": g.rest} for g in self.groups],
+            "frames": {view: raw.decode() for view, raw in self.frames.items()},
+        }
+
+
+def participant_ids(participants: dict[str, Any]) -> list[str]:
+    """Все известные плагину участники действия: мастер, инициатор, participants[].userId."""
+    out: list[str] = []
+    for uid in (participants.get("gmUserId"), participants.get("initiatorUserId")):
+        if uid and str(uid) not in out:
+            out.append(str(uid))
+    for p in participants.get("participants") or []:
+        uid = p.get("userId") if isinstance(p, dict) else None
+        if uid and str(uid) not in out:
+            out.append(str(uid))
+    return out
+
+
+def build_fanout(action_id: str, stage: StageFrames, broadcasts: list[dict[str, Any]], participants: dict[str, Any]) -> FanoutPlan:
+    by_view: dict[str, list[str]] = {"audience": [], "observer": []}
+    for uid in participant_ids(participants):
+        by_view[view_for(stage.audience, uid, participants)].append(uid)
+    # стадия для всех ("all") -> зрители получают тот же кадр, что и участники
+    rest_view = "audience" if any(isinstance(a, dict) and a.get("kind") == "all" for a in stage.audience) else "observer"
+    groups = tuple(
+        FanoutGroup(view=view, user_ids=tuple(ids), rest=view == rest_view)
+        for view, ids in by_view.items()
+        if ids or view == rest_view
+    )
+    frames = {
+        g.view: to_json({"actionId": action_id, "revision": stage.revision, "broadcasts": broadcasts, "stage": stage.views[g.view]})
+        for g in groups
+    }
+    return FanoutPlan(revision=stage.revision, groups=groups, frames=frames)
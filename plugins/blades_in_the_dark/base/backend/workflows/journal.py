@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import bisect
+from typing import Any, Iterable, Iterator, Optional
+
+from .....json_patch import JsonPatchError, apply_patch, make_patch
+from ..scene_cache import apply_session_patch
+from .roll_action.dice import DiceTapeExhausted, replaying
+from .router import WorkflowRouter
+
+# Журнал workflow: начальное состояние + по событию на принятый шаг
+#   {"revision", "stageKey", "actor", "input", "draws", "sessionPatch"[, "scenePatch"][, "participants"]}
+# "revision" — ревизия после шага, "draws" — все d6 шага по порядку; "scenePatch" — JSON Patch
+# от сцены, которую журнал выводит сам (начальная + свои sessionPatch), к сцене шага — только если
+# бэк сцену поменял; "participants" — только если состав участников с прошлого шага поменялся.
+# Любую ревизию можно собрать заново, переиграв submit'ы стадий с записанными бросками;
+# каждые SNAPSHOT_EVERY событий кладётся компактный снимок, чтобы не играть с самого начала.
+# Снимки едут в to_dict (сцена — патчем к начальной); журнал без них достраивает снимки при переигрывании.
+
+SNAPSHOT_EVERY = 8
+
+
+class ReplayError(ValueError):
+    pass
+
+
+class WorkflowJournal:
+    def __init__(
+        self,
+        action_key: str,
+        workflow: dict[str, Any],
+        participants: dict[str, Any],
+        scene: dict[str, Any],
+        scene_version: Optional[int] = None,
+    ) -> None:
+        self.action_key = action_key
+        self.participants = participants
+        self.events: list[dict[str, Any]] = []
+        # (ревизия, workflow, сцена) — первый снимок и есть начальное состояние
+        self.snapshots: list[tuple[int, dict[str, Any], dict[str, Any]]] = [(_revision(workflow), workflow, scene)]
+        # сцена и участники, с которыми пойдёт следующий шаг, если бэк их не менял
+        self._participants = participants
+        self._scene = scene
+        self._scene_version = scene_version
+
+    @property
+    def revision(self) -> int:
+        return self.events[-1]["revision"] if self.events else self.snapshots[0][0]
+
+    def append(
+        self,
+        *,
+        stage_key: str,
+        actor: str,
+        input_dict: dict[str, Any],
+        draws: list[int],
+        workflow: dict[str, Any],
+        scene: dict[str, Any],
+        session_patch: Optional[dict[str, Any]],
+        participants: dict[str, Any],
+        scene_version: Optional[int] = None,
+        next_scene: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        """
+        Записывает принятый шаг (workflow — состояние после него, scene — сцена, по которой он шёл).
+        next_scene — сцена после шага, если вызывающий уже применил к ней sessionPatch: следующий
+        шаг придёт с тем же объектом, и сцену не придётся сравнивать по содержимому.
+        """
+        event: dict[str, Any] = {
+            "revision": _revision(workflow),
+            "stageKey": stage_key,
+            "actor": actor,
+            "input": input_dict,
+            "draws": draws,
+            "sessionPatch": session_patch,
+        }
+        if scene is not self._scene and (scene_version is None or scene_version != self._scene_version):
+            # сцену сменил бэк: в событие — только разница с той, что журнал вывел сам
+            scene_patch = make_patch(self._scene, scene)
+            if scene_patch:
+                event["scenePatch"] = scene_patch
+        if participants is not self._participants and participants != self._participants:
+            event["participants"] = participants
+            self._participants = participants
+        self.events.append(event)
+
+        if next_scene is None:
+            next_scene = apply_session_patch(scene, session_patch) if session_patch else scene
+        self._scene = next_scene
+        self._scene_version = scene_version + 1 if scene_version is not None and session_patch else scene_version
+        if len(self.events) % SNAPSHOT_EVERY == 0:
+            self.snapshots.append((event["revision"], workflow, self._scene))
+        return event
+
+    def track(self, scene: dict[str, Any], participants: dict[str, Any], scene_version: Optional[int] = None) -> None:
+        """Сцена и участники после последнего события (после from_dict + replay), чтобы новые события не несли их целиком."""
+        self._scene = scene
+        self._participants = participants
+        self._scene_version = scene_version
+
+    def to_dict(self) -> dict[str, Any]:
+        _, wf, scene = self.snapshots[0]
+        return {
+            "actionKey": self.action_key,
+            "participants": self.participants,
+            "workflow": wf,
+            "scene": scene,
+            "events": self.events,
+            "snapshots": [
+                {"revision": rev, "workflow": snap_wf, "scenePatch": make_patch(scene, snap_scene)}
+                for rev, snap_wf, snap_scene in self.snapshots[1:]
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> WorkflowJournal:
+        """Журнал из to_dict; без "snapshots" (или с битыми) снимки достроит первое переигрывание."""
+        journal = cls(
+            action_key=str(data.get("actionKey") or ""),
+            workflow=data.get("workflow") if isinstance(data.get("workflow"), dict) else {},
+            participants=data.get("participants") if isinstance(data.get("participants"), dict) else {},
+            scene=data.get("scene") if isinstance(data.get("scene"), dict) else {},
+        )
+        events = data.get("events")
+        journal.events = [e for e in events if isinstance(e, dict)] if isinstance(events, list) else []
+        snapshots = data.get("snapshots")
+        if isinstance(snapshots, list):
+            journal._load_snapshots(snapshots)
+        return journal
+
+    def _load_snapshots(self, items: list[Any]) -> None:
+        # снимки — по возрастанию и только на ревизиях событий; что-то не так — не берём ни одного
+        last, base_scene = self.snapshots[0][0], self.snapshots[0][2]
+        revs = {e.get("revision") for e in self.events}
+        out = []
+        for item in items:
+            rev = item.get("revision") if isinstance(item, dict) else None
+            if not isinstance(rev, int) or rev <= last or rev not in revs or not isinstance(item.get("workflow"), dict):
+                return
+            try:
+                scene = apply_patch(base_scene, item.get("scenePatch") or [])
+            except JsonPatchError:
+                return
+            if not isinstance(scene, dict):
+                return
+            out.append((rev, item["workflow"], scene))
+            last = rev
+        self.snapshots.extend(out)
+
+
+def _revision(wf: dict[str, Any]) -> int:
+    rev = wf.get("revision")
+    return rev if isinstance(rev, int) else 0
+
+
+def replay_steps(
+    router: WorkflowRouter,
+    journal: WorkflowJournal,
+    revision: Optional[int] = None,
+) -> Iterator[tuple[dict[str, Any], dict[str, Any], dict[str, Any], dict[str, Any]]]:
+    """
+    Переигрывает события до revision (None — все) с ближайшего снимка и отдаёт по шагу
+    (событие, workflow после шага, сцена после шага, участники). Расхождение с записью (шаг отклонён,
+    другой sessionPatch, лишние или недостающие броски) -> ReplayError.
+    """
+    target = journal.revision if revision is None else revision
+    rev, wf, scene = _snapshot_at(journal, target)
+    start, participants = _start_at(journal, rev)
+
+    for n, event in enumerate(journal.events[start:], start):
+        if event.get("revision", 0) > target:
+            return
+        if "scenePatch" in event:
+            try:
+                scene = apply_patch(scene, event["scenePatch"])
+            except JsonPatchError as e:
+                raise ReplayError(f"Event {n}: bad scenePatch: {e}") from None
+        elif isinstance(event.get("scene"), dict):
+            # журналы до scenePatch несли сцену целиком
+            scene = event["scene"]
+        if isinstance(event.get("participants"), dict):
+            participants = event["participants"]
+        try:
+            with replaying(event.get("draws") or []) as rest:
+                res = router.submit(
+                    journal.action_key,
+                    scene=scene,
+                    actor_user_id=str(event.get("actor") or ""),
+                    participants_dict=participants,
+                    wf_dict=wf,
+                    input_dict=event.get("input") or {},
+                )
+        except DiceTapeExhausted:
+            raise ReplayError(f"Event {n}: more dice rolled than recorded") from None
+        out = res.to_response() if hasattr(res, "to_response") else res
+        if rest:
+            raise ReplayError(f"Event {n}: {len(rest)} recorded dice were not rolled")
+        if not isinstance(out, dict) or not out.get("ok") or not isinstance(out.get("workflow"), dict):
+            raise ReplayError(f"Event {n}: step was rejected on replay")
+        if out.get("sessionPatch") != event.get("sessionPatch"):
+            raise ReplayError(f"Event {n}: sessionPatch differs from the recorded one")
+        wf = out["workflow"]
+        if _revision(wf) != event.get("revision"):
+            raise ReplayError(f"Event {n}: revision {_revision(wf)} != recorded {event.get('revision')}")
+        if out.get("sessionPatch"):
+            scene = apply_session_patch(scene, out["sessionPatch"])
+        if (n + 1) % SNAPSHOT_EVERY == 0 and journal.snapshots[-1][0] < _revision(wf):
+            # журнал из from_dict без снимков: достраиваем их по ходу, следующее переигрывание начнёт отсюда
+            journal.snapshots.append((_revision(wf), wf, scene))
+        yield event, wf, scene, participants
+
+
+def replay_state(
+    router: WorkflowRouter,
+    journal: WorkflowJournal,
+    revision: Optional[int] = None,
+) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+    """(workflow, сцена, участники) на ревизии revision (None — последней)."""
+    # ни одного события после ближайшего снимка — это и есть состояние
+    rev, wf, scene = _snapshot_at(journal, journal.revision if revision is None else revision)
+    _, participants = _start_at(journal, rev)
+    for _, wf, scene, participants in replay_steps(router, journal, revision):
+        pass
+    return wf, scene, participants
+
+
+def replay(router: WorkflowRouter, journal: WorkflowJournal, revision: Optional[int] = None) -> dict[str, Any]:
+    """Состояние workflow на ревизии revision (None — последней)."""
+    return replay_state(router, journal, revision)[0]
+
+
+def _snapshot_at(journal: WorkflowJournal, target: int) -> tuple[int, dict[str, Any], dict[str, Any]]:
+    revs = [rev for rev, _, _ in journal.snapshots]
+    return journal.snapshots[max(0, bisect.bisect_right(revs, target) - 1)]
+
+
+def _start_at(journal: WorkflowJournal, rev: int) -> tuple[int, dict[str, Any]]:
+    """Индекс первого события после ревизии rev и участники на ней."""
+    start = next((i for i, e in enumerate(journal.events) if e.get("revision", 0) > rev), len(journal.events))
+    participants = journal.participants
+    for e in journal.events[:start]:
+        if isinstance(e.get("participants"), dict):
+            participants = e["participants"]
+    return start, participants
+
+
+def replay_many(router: WorkflowRouter, journals: Iterable[WorkflowJournal]) -> Iterator[tuple[Optional[dict[str, Any]], Optional[str]]]:
+    """Пакетная проверка журналов (регрессия): по журналу (последнее состояние, None) или (None, ошибка)."""
+    for journal in journals:
+        try:
+            yield replay(router, journal), None
+        except ReplayError as e:
+            yield None, str(e)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from pydantic_core import to_json
+
+# Представление стадии для зрителей workflow. present() стадии зависит только от состояния workflow,
+# поэтому на ревизию он вызывается один раз, а результат хранится готовыми JSON-байтами по видам:
+#   "audience" — те, к кому обращена стадия (envelope целиком, с ui),
+#   "observer" — остальные участники и зрители (тот же envelope без ui: им нечего заполнять).
+
+VIEWS = ("audience", "observer")
+
+
+@dataclass(frozen=True)
+class StageFrames:
+    revision: int
+    # audience из envelope: [{"kind": "gm" | "initiator" | "all" | "user", "user_id"?}]
+    audience: list[dict[str, Any]]
+    # вид -> envelope (dict общий для всех вызовов — только для чтения) и его JSON
+    views: dict[str, dict[str, Any]]
+    frames: dict[str, bytes]
+
+
+def build_frames(envelope: Any, revision: int) -> StageFrames:
+    data = envelope.model_dump(mode="json") if hasattr(envelope, "model_dump") else dict(envelope or {})
+    views = {"audience": data, "observer": {**data, "ui": None}}
+    audience = data.get("audience") if isinstance(data.get("audience"), list) else []
+    return StageFrames(
+        revision=revision,
+        audience=audience,
+        views=views,
+        frames={view: to_json(d) for view, d in views.items()},
+    )
+
+
+def view_for(audience: list[dict[str, Any]], user_id: Optional[str], participants: dict[str, Any]) -> str:
+    """Вид для пользователя: "audience", если стадия обращена к нему, иначе "observer"."""
+    if not user_id:
+        return "observer"
+    uid = str(user_id)
+    for a in audience:
+        kind = a.get("kind") if isinstance(a, dict) else None
+        if kind == "all":
+            return "audience"
+        if kind == "user" and str(a.get("user_id")) == uid:
+            return "audience"
+        if kind == "gm" and str(participants.get("gmUserId")) == uid:
+            return "audience"
+        if kind == "initiator" and str(participants.get("initiatorUserId")) == uid:
+            return "audience"
+    return "observer"
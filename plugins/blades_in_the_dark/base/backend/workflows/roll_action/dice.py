@@ -1,7 +1,53 @@
 from __future__ import annotations
 
+import contextlib
+import contextvars
 import random
-from typing import Tuple
+from typing import Iterator, Optional, Tuple
+
+# Лента бросков текущего вызова: при записи каждый d6 дописывается в список, при воспроизведении
+# берётся из него же — так журнал workflow (см. workflows.journal) переигрывает шаги детерминированно.
+_tape: contextvars.ContextVar[Optional[tuple[list[int], bool]]] = contextvars.ContextVar("dice_tape", default=None)
+
+
+class DiceTapeExhausted(RuntimeError):
+    pass
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[list[int]]:
+    draws: list[int] = []
+    token = _tape.set((draws, False))
+    try:
+        yield draws
+    finally:
+        _tape.reset(token)
+
+
+@contextlib.contextmanager
+def replaying(draws: list[int]) -> Iterator[list[int]]:
+    """Броски берутся из draws по порядку; остаток после блока — признак расхождения шага."""
+    pending = list(reversed(draws))
+    token = _tape.set((pending, True))
+    try:
+        yield pending
+    finally:
+        _tape.reset(token)
+
+
+def _d6() -> int:
+    tape = _tape.get()
+    if tape is None:
+        return random.randint(1, 6)
+    draws, replay = tape
+    if replay:
+        if not draws:
+            raise DiceTapeExhausted("Recorded dice draws are exhausted")
+        return draws.pop()
+    v = random.randint(1, 6)
+    draws.append(v)
+    return v
+
 
 def best_and_crit(rolls: list[int]) -> tuple[int, bool]:
     best = max(rolls) if rolls else 0
@@ -12,9 +58,9 @@ def roll_d6(pool: int) -> list[int]:
     pool = max(0, int(pool))
     # 0 dice: roll 2d6 and take the lower
     if pool <= 0:
-        r = [random.randint(1, 6), random.randint(1, 6)]
+        r = [_d6(), _d6()]
         return [min(r)]
-    return [random.randint(1, 6) for _ in range(pool)]
+    return [_d6() for _ in range(pool)]
 
 def outcome_from(rolls: list[int]) -> Tuple[str, bool, int]:
     best, crit = best_and_crit(rolls)
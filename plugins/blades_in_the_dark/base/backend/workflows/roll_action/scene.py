@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 def find_character_ref(scene: dict[str, Any], character_id: str) -> dict[str, Any]:
     players = scene.get("players") or {}
@@ -44,3 +44,62 @@ def get_stress(character_data: dict[str, Any]) -> int:
         return max(0, int(character_data.get("stress") or 0))
     except Exception:
         return 0
+
+
+class SceneIndex:
+    """
+    Индекс одной версии сцены: id персонажа -> ref, плюс кэш производных значений (рейтинги, стресс).
+    Сцена версии не меняется (правки уходят в sessionPatch и дают новую версию), поэтому индекс
+    общий для всех вызовов present/submit на этой версии — scene_cache хранит его рядом со сценой.
+    Персонаж ищется обходом players один раз, дальше — из словаря.
+    """
+
+    def __init__(self, scene: dict[str, Any]) -> None:
+        self.scene = scene
+        self._by_id: dict[str, dict[str, Any]] = {}
+        self._stats: dict[tuple[str, str, str], int] = {}
+
+    def character(self, character_id: Any) -> dict[str, Any]:
+        key = str(character_id)
+        found = self._by_id.get(key)
+        if found is None:
+            found = self._by_id[key] = self._scan(key)
+        return found
+
+    def _scan(self, key: str) -> dict[str, Any]:
+        # тот же порядок, что у find_character_ref (первый с таким id), но без str() для строковых id
+        for entry in (self.scene.get("players") or {}).values():
+            for ch in (entry.get("characters") or []):
+                cid = ch.get("id")
+                if cid == key or (type(cid) is not str and str(cid) == key):
+                    return ch
+        return {}
+
+    def data(self, character_id: Any) -> dict[str, Any]:
+        return character_data(self.character(character_id))
+
+    def characters_for_user(self, user_id: Any) -> list[dict[str, Any]]:
+        players = self.scene.get("players") or {}
+        entry = players.get(str(user_id)) or players.get(user_id) or {}
+        return entry.get("characters") or []
+
+    def first_character_id(self, user_id: Any) -> Optional[str]:
+        chars = self.characters_for_user(user_id)
+        cid = (chars[0] or {}).get("id") if chars else None
+        return str(cid) if cid else None
+
+    def _stat(self, character_id: Any, kind: str, key: str, compute: Callable[[dict[str, Any]], int]) -> int:
+        k = (str(character_id), kind, key)
+        v = self._stats.get(k)
+        if v is None:
+            v = self._stats[k] = compute(self.data(character_id))
+        return v
+
+    def action_rating(self, character_id: Any, action: str) -> int:
+        return self._stat(character_id, "action", action, lambda d: action_rating(d, action))
+
+    def attribute_rating(self, character_id: Any, action_to_attr: dict[str, str], attr: str) -> int:
+        return self._stat(character_id, "attribute", attr, lambda d: attribute_rating(d, action_to_attr, attr))
+
+    def stress(self, character_id: Any) -> int:
+        return self._stat(character_id, "stress", "", get_stress)
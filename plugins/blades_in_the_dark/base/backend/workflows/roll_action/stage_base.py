@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Optional
 
 from pydantic import ValidationError
+from pydantic_core import to_json
 
 from ..action_participants import ActionParticipants
+from .scene import SceneIndex
 from .types import Workflow, SubmitResult
 
 
@@ -13,13 +16,34 @@ def _issue(path: str, message: str, level: str = "error") -> dict[str, Any]:
     return {"path": path, "message": message, "level": level}
 
 
-def _dump(m: Any) -> Any:
-    return m.model_dump(mode="json") if hasattr(m, "model_dump") else m.dict()
+def load_workflow(wf_dict: dict[str, Any]) -> Workflow:
+    return Workflow.model_validate(wf_dict)
+
+
+def dump_workflow(wf: Workflow) -> dict[str, Any]:
+    return wf.model_dump(mode="json")
+
+
+@lru_cache(maxsize=256)
+def _participants_from_json(raw: bytes) -> ActionParticipants:
+    return ActionParticipants.model_validate_json(raw)
+
+
+def load_participants(participants_dict: dict[str, Any]) -> ActionParticipants:
+    # состав участников за весь workflow почти не меняется -> разбор по содержимому кэшируется;
+    # модель общая для вызовов, стадии её не меняют
+    try:
+        raw = to_json(participants_dict)
+    except Exception:
+        return ActionParticipants.model_validate(participants_dict)
+    return _participants_from_json(raw)
 
 
 @dataclass
 class StageCtx:
     scene: dict[str, Any]
+    # поиск персонажей/рейтингов — только через индекс, а не обходом scene
+    scene_index: SceneIndex
     actor_user_id: str
     participants: ActionParticipants
     participants_dict: dict[str, Any]
@@ -58,10 +82,13 @@ class ResultBuilder:
         else:
             participant_ids = self._fallback_ids_fn(participants_dict_fallback or {})
 
+        if ok and wf is not None:
+            wf.revision += 1
+
         return SubmitResult(
             ok=ok,
             issues=issues or [],
-            workflow=_dump(wf) if wf is not None else None,
+            workflow=dump_workflow(wf) if wf is not None else None,
             next=next,
             broadcasts=broadcasts or [],
             participantIds=participant_ids,
@@ -4,6 +4,9 @@ from ..types import StageEnvelope, UiSpec, GmFinalizeInput
 from ..stage_base import BaseStage, StageCtx, _issue
 
 
+_UI = UiSpec(component="blades.RollAction.GmFinalize")
+
+
 class GmFinalizeStage(BaseStage):
     key = "gm_finalize"
 
@@ -12,14 +15,14 @@ class GmFinalizeStage(BaseStage):
             audience=[{"kind": "gm"}],
             stageKey=wf.stageKey,
             stageData={
-                "selectedAction": wf.context.get("selectedAction"),
-                "character_id": wf.context.get("character_id"),
-                "position": wf.context.get("position"),
-                "effect": wf.context.get("effect"),
-                "consequence_hint": wf.context.get("consequence_hint"),
-                "mods": wf.context.get("mods") or {},
+                "selectedAction": wf.context.selectedAction,
+                "character_id": wf.context.character_id,
+                "position": wf.context.position,
+                "effect": wf.context.effect,
+                "consequence_hint": wf.context.consequence_hint,
+                "mods": wf.context.mods.model_dump(),
             },
-            ui=UiSpec(component="blades.RollAction.GmFinalize", props={}),
+            ui=_UI,
         )
 
     def submit(self, wf, ctx: StageCtx, input_dict):
@@ -36,16 +39,16 @@ class GmFinalizeStage(BaseStage):
             return ctx.rb.result(ok=True, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict)
 
         if parsed.action:
-            wf.context["selectedAction"] = parsed.action
+            wf.context.selectedAction = parsed.action
         if "item_id" in input_dict:
-            wf.context["item_id"] = parsed.item_id
+            wf.context.item_id = parsed.item_id
 
         if parsed.position:
-            wf.context["position"] = parsed.position
+            wf.context.position = parsed.position
         if parsed.effect:
-            wf.context["effect"] = parsed.effect
+            wf.context.effect = parsed.effect
         if parsed.consequence_hint is not None:
-            wf.context["consequence_hint"] = parsed.consequence_hint
+            wf.context.consequence_hint = parsed.consequence_hint
 
         wf.stageKey = "prerollconfirm"
         return ctx.rb.result(ok=True, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict)
@@ -4,6 +4,12 @@ from ..types import StageEnvelope, UiSpec, GmSetInput
 from ..stage_base import BaseStage, StageCtx, _issue
 
 
+_UI = UiSpec(
+    component="blades.RollAction.GmSetPositionEffect",
+    props={"positions": ("controlled", "risky", "desperate"), "effects": ("limited", "standard", "great")},
+)
+
+
 class GmSetPositionEffectStage(BaseStage):
     key = "gm_set_position_effect"
 
@@ -11,11 +17,8 @@ class GmSetPositionEffectStage(BaseStage):
         return StageEnvelope(
             audience=[{"kind": "gm"}],
             stageKey=wf.stageKey,
-            stageData={"selectedAction": wf.context.get("selectedAction"), "character_id": wf.context.get("character_id")},
-            ui=UiSpec(
-                component="blades.RollAction.GmSetPositionEffect",
-                props={"positions": ["controlled", "risky", "desperate"], "effects": ["limited", "standard", "great"]},
-            ),
+            stageData={"selectedAction": wf.context.selectedAction, "character_id": wf.context.character_id},
+            ui=_UI,
         )
 
     def submit(self, wf, ctx: StageCtx, input_dict):
@@ -27,9 +30,9 @@ class GmSetPositionEffectStage(BaseStage):
         if not isinstance(parsed, GmSetInput):
             return parsed
 
-        wf.context["position"] = parsed.position
-        wf.context["effect"] = parsed.effect
-        wf.context["consequence_hint"] = parsed.consequence_hint or ""
+        wf.context.position = parsed.position
+        wf.context.effect = parsed.effect
+        wf.context.consequence_hint = parsed.consequence_hint or ""
 
         wf.stageKey = "player_add_mods"
         return ctx.rb.result(ok=True, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict)
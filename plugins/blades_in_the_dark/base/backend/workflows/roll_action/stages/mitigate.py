@@ -4,6 +4,9 @@ from ..types import StageEnvelope, UiSpec, MitigateInput
 from ..stage_base import BaseStage, StageCtx, _issue
 
 
+_UI = UiSpec(component="blades.RollAction.Mitigate")
+
+
 class MitigateStage(BaseStage):
     key = "mitigate"
 
@@ -12,13 +15,13 @@ class MitigateStage(BaseStage):
             audience=[{"kind": "initiator"}],
             stageKey=wf.stageKey,
             stageData={
-                "selectedAction": wf.context.get("selectedAction"),
-                "position": wf.context.get("position"),
-                "effect": wf.context.get("effect"),
-                "consequence_hint": wf.context.get("consequence_hint"),
-                "roll": wf.context.get("roll") or {},
+                "selectedAction": wf.context.selectedAction,
+                "position": wf.context.position,
+                "effect": wf.context.effect,
+                "consequence_hint": wf.context.consequence_hint,
+                "roll": wf.context.roll or {},
             },
-            ui=UiSpec(component="blades.RollAction.Mitigate", props={}),
+            ui=_UI,
         )
 
     def submit(self, wf, ctx: StageCtx, input_dict):
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from ..types import StageEnvelope, UiSpec, PlayerModsInput
+from ..types import RollMods, StageEnvelope, UiSpec, PlayerModsInput
 from ..stage_base import BaseStage, StageCtx, _issue
 
 
+_UI = UiSpec(component="blades.RollAction.PlayerAddMods")
+
+
 class PlayerAddModsStage(BaseStage):
     key = "player_add_mods"
 
@@ -12,13 +15,13 @@ class PlayerAddModsStage(BaseStage):
             audience=[{"kind": "initiator"}],
             stageKey=wf.stageKey,
             stageData={
-                "selectedAction": wf.context.get("selectedAction"),
-                "position": wf.context.get("position"),
-                "effect": wf.context.get("effect"),
-                "consequence_hint": wf.context.get("consequence_hint"),
-                "mods": wf.context.get("mods") or {},
+                "selectedAction": wf.context.selectedAction,
+                "position": wf.context.position,
+                "effect": wf.context.effect,
+                "consequence_hint": wf.context.consequence_hint,
+                "mods": wf.context.mods.model_dump(),
             },
-            ui=UiSpec(component="blades.RollAction.PlayerAddMods", props={}),
+            ui=_UI,
         )
 
     def submit(self, wf, ctx: StageCtx, input_dict):
@@ -38,14 +41,14 @@ class PlayerAddModsStage(BaseStage):
             return ctx.rb.result(ok=False, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict,
                                  issues=[_issue("input.helper_user_id", "Нужно выбрать помогающего")])
 
-        wf.context["mods"] = {
-            "push": bool(parsed.push),
-            "help": bool(parsed.help),
-            "helper_user_id": parsed.helper_user_id,
-            "help_confirmed": False,
-            "devils_bargain": bool(parsed.devils_bargain),
-            "bonus_dice": max(0, int(parsed.bonus_dice)),
-        }
+        wf.context.mods = RollMods(
+            push=bool(parsed.push),
+            help=bool(parsed.help),
+            helper_user_id=parsed.helper_user_id,
+            help_confirmed=False,
+            devils_bargain=bool(parsed.devils_bargain),
+            bonus_dice=max(0, int(parsed.bonus_dice)),
+        )
 
         wf.stageKey = "assist_confirm" if parsed.help else "gm_finalize"
         return ctx.rb.result(ok=True, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict)
@@ -2,11 +2,14 @@ from __future__ import annotations
 
 from ..types import ACTION_TO_ATTRIBUTE, StageEnvelope, UiSpec, PreRollConfirmInput
 from ..dice import roll_d6, outcome_from
-from ..scene import find_character_ref, character_data, character_name, action_rating
+from ..scene import character_name
 from ..stage_base import BaseStage, StageCtx, _issue
 from ..stress import apply_stress
 
 
+_UI = UiSpec(component="blades.RollAction.PreRollConfirm")
+
+
 class PreRollConfirmStage(BaseStage):
     key = "prerollconfirm"
 
@@ -15,14 +18,14 @@ class PreRollConfirmStage(BaseStage):
             audience=[{"kind": "initiator"}],
             stageKey=wf.stageKey,
             stageData={
-                "selectedAction": wf.context.get("selectedAction"),
-                "character_id": wf.context.get("character_id"),
-                "position": wf.context.get("position"),
-                "effect": wf.context.get("effect"),
-                "consequence_hint": wf.context.get("consequence_hint"),
-                "mods": wf.context.get("mods") or {},
+                "selectedAction": wf.context.selectedAction,
+                "character_id": wf.context.character_id,
+                "position": wf.context.position,
+                "effect": wf.context.effect,
+                "consequence_hint": wf.context.consequence_hint,
+                "mods": wf.context.mods.model_dump(),
             },
-            ui=UiSpec(component="blades.RollAction.PreRollConfirm", props={}),
+            ui=_UI,
         )
 
     def submit(self, wf, ctx: StageCtx, input_dict):
@@ -36,52 +39,32 @@ class PreRollConfirmStage(BaseStage):
 
         if parsed.choice != "accept":
             wf.stageKey = "choose_action"
-            wf.context["position"] = None
-            wf.context["effect"] = None
-            wf.context["consequence_hint"] = None
-            wf.context["mods"] = {
-                "push": False,
-                "help": False,
-                "helper_user_id": None,
-                "help_confirmed": False,
-                "devils_bargain": False,
-                "bonus_dice": 0,
-            }
-            wf.context["roll"] = None
-            wf.context["roll_broadcasts"] = []
-            wf.context["resist"] = None
-            wf.context["resist_broadcasts"] = []
-            wf.context["summary"] = None
-            wf.context["trauma"] = None
-            wf.context["stressEvents"] = []
-            wf.context["needsTrauma"] = False
-            wf.context["traumaCharacterId"] = None
+            wf.context.reset_roll()
             return ctx.rb.result(ok=True, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict)
 
-        action = wf.context.get("selectedAction")
+        action = wf.context.selectedAction
         if action not in ACTION_TO_ATTRIBUTE:
             return ctx.rb.result(ok=False, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict,
                                  issues=[_issue("context.selectedAction", "Action not selected")])
 
-        cid = wf.context.get("character_id")
-        ch_ref = find_character_ref(ctx.scene, str(cid)) if cid else None
+        cid = wf.context.character_id
+        ch_ref = ctx.scene_index.character(cid) if cid else None
         if not ch_ref:
             return ctx.rb.result(ok=False, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict,
                                  issues=[_issue("context.character_id", "Character not found in scene")])
 
-        ch_data = character_data(ch_ref)
-        base = action_rating(ch_data, action)
+        base = ctx.scene_index.action_rating(cid, action)
 
-        mods = wf.context.get("mods") or {}
+        mods = wf.context.mods
         bonus = 0
-        if mods.get("push"):
+        if mods.push:
             bonus += 1
-        if mods.get("help") and mods.get("help_confirmed"):
+        if mods.help and mods.help_confirmed:
             bonus += 1
-        if mods.get("devils_bargain"):
+        if mods.devils_bargain:
             bonus += 1
         # try:
-        #     bonus += max(0, int(mods.get("bonus_dice") or 0))
+        #     bonus += max(0, int(mods.bonus_dice or 0))
         # except Exception:
         #     pass
 
@@ -89,7 +72,7 @@ class PreRollConfirmStage(BaseStage):
         rolls = roll_d6(pool)
         out, crit, best = outcome_from(rolls)
 
-        wf.context["roll"] = {
+        wf.context.roll = {
             "character_id": cid,
             "character_name": character_name(ch_ref),
             "action": action,
@@ -100,20 +83,20 @@ class PreRollConfirmStage(BaseStage):
             "best": best,
             "crit": crit,
             "outcome": out,
-            "position": wf.context.get("position"),
-            "effect": wf.context.get("effect"),
+            "position": wf.context.position,
+            "effect": wf.context.effect,
         }
 
-        wf.context["roll_broadcasts"] = [{
+        wf.context.roll_broadcasts = [{
             "type": "dice.roll",
             "subtype": "action",
-            **(wf.context["roll"]),
+            **wf.context.roll,
         }]
 
         patch = None
         overflow = False
-        if mods.get("push"):
-            patch, overflow = apply_stress(wf=wf, scene=ctx.scene, character_id=str(cid), delta=2, reason="push")
+        if mods.push:
+            patch, overflow = apply_stress(wf=wf, scene_index=ctx.scene_index, character_id=str(cid), delta=2, reason="push")
 
         wf.stageKey = "wrap_up" if overflow else "mitigate"
 
@@ -122,6 +105,6 @@ class PreRollConfirmStage(BaseStage):
             wf=wf,
             participants=ctx.participants,
             participants_dict_fallback=ctx.participants_dict,
-            broadcasts=wf.context.get("roll_broadcasts") or [],
+            broadcasts=wf.context.roll_broadcasts or [],
             sessionPatch=patch,
         )
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from ..types import StageEnvelope, UiSpec, ResistInput, ACTION_TO_ATTRIBUTE
 from ..dice import roll_d6, best_and_crit
-from ..scene import find_character_ref, character_data, attribute_rating
 from ..stage_base import BaseStage, StageCtx, _issue
 from ..stress import apply_stress
 
 
+_UI = UiSpec(component="blades.RollAction.Resist", props={"attributes": ("insight", "prowess", "resolve")})
+
+
 class ResistStage(BaseStage):
     key = "resist"
 
@@ -15,10 +17,10 @@ class ResistStage(BaseStage):
             audience=[{"kind": "gm"}],
             stageKey=wf.stageKey,
             stageData={
-                "roll": wf.context.get("roll") or {},
-                "consequence_hint": wf.context.get("consequence_hint"),
+                "roll": wf.context.roll or {},
+                "consequence_hint": wf.context.consequence_hint,
             },
-            ui=UiSpec(component="blades.RollAction.Resist", props={"attributes": ["insight", "prowess", "resolve"]}),
+            ui=_UI,
         )
 
     def submit(self, wf, ctx: StageCtx, input_dict):
@@ -34,16 +36,14 @@ class ResistStage(BaseStage):
             wf.stageKey = "wrap_up"
             return ctx.rb.result(ok=True, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict)
 
-        cid = wf.context.get("character_id")
-        ch_ref = find_character_ref(ctx.scene, str(cid)) if cid else None
+        cid = wf.context.character_id
+        ch_ref = ctx.scene_index.character(cid) if cid else None
         if not ch_ref:
             return ctx.rb.result(ok=False, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict,
                                  issues=[_issue("context.character_id", "Character not found in scene")])
 
-        ch_data = character_data(ch_ref)
-
         attr = parsed.attribute
-        pool = attribute_rating(ch_data, ACTION_TO_ATTRIBUTE, attr)
+        pool = ctx.scene_index.attribute_rating(cid, ACTION_TO_ATTRIBUTE, attr)
         rolls = roll_d6(pool)
 
         best, is_crit = best_and_crit(rolls)
@@ -51,7 +51,7 @@ class ResistStage(BaseStage):
         if is_crit:
             stress_cost = max(0, stress_cost - 1)
 
-        wf.context["resist"] = {
+        wf.context.resist = {
             "attribute": attr,
             "pool": pool,
             "rolls": rolls,
@@ -60,15 +60,15 @@ class ResistStage(BaseStage):
             "stressCost": stress_cost,
         }
 
-        wf.context["resist_broadcasts"] = [{
+        wf.context.resist_broadcasts = [{
             "type": "dice.roll",
             "subtype": "resistance",
-            **(wf.context["resist"]),
+            **wf.context.resist,
         }]
 
         patch, overflow = apply_stress(
             wf=wf,
-            scene=ctx.scene,
+            scene_index=ctx.scene_index,
             character_id=str(cid),
             delta=stress_cost,
             reason="resist",
@@ -81,6 +81,6 @@ class ResistStage(BaseStage):
             wf=wf,
             participants=ctx.participants,
             participants_dict_fallback=ctx.participants_dict,
-            broadcasts=wf.context.get("resist_broadcasts") or [],
+            broadcasts=wf.context.resist_broadcasts or [],
             sessionPatch=patch,
         )
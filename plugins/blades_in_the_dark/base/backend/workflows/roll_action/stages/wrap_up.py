@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from ..types import StageEnvelope, UiSpec, WrapUpInput
-from ..scene import find_character_ref, character_data
+from ..scene import character_data
 from ..stage_base import BaseStage, StageCtx, _issue
 from ..stress import patch_character_data
 
 
+_UI = UiSpec(component="blades.RollAction.WrapUp")
+
+
 class WrapUpStage(BaseStage):
     key = "wrap_up"
 
@@ -14,14 +17,14 @@ class WrapUpStage(BaseStage):
             audience=[{"kind": "gm"}],
             stageKey=wf.stageKey,
             stageData={
-                "roll": wf.context.get("roll") or {},
-                "resist": wf.context.get("resist"),
-                "summary": wf.context.get("summary"),
-                "needsTrauma": bool(wf.context.get("needsTrauma")),
-                "traumaCharacterId": wf.context.get("traumaCharacterId"),
-                "stressEvents": wf.context.get("stressEvents") or [],
+                "roll": wf.context.roll or {},
+                "resist": wf.context.resist,
+                "summary": wf.context.summary,
+                "needsTrauma": bool(wf.context.needsTrauma),
+                "traumaCharacterId": wf.context.traumaCharacterId,
+                "stressEvents": wf.context.stressEvents or [],
             },
-            ui=UiSpec(component="blades.RollAction.WrapUp", props={}),
+            ui=_UI,
         )
 
     def submit(self, wf, ctx: StageCtx, input_dict):
@@ -34,15 +37,15 @@ class WrapUpStage(BaseStage):
             return parsed
 
         if parsed.summary is not None:
-            wf.context["summary"] = parsed.summary
+            wf.context.summary = parsed.summary
 
         # trauma: добавляем в CharacterData.traumas (list)
         trauma_patch = None
         if parsed.trauma is not None:
-            wf.context["trauma"] = parsed.trauma
+            wf.context.trauma = parsed.trauma
 
-            target_cid = wf.context.get("traumaCharacterId") or wf.context.get("character_id")
-            ch_ref = find_character_ref(ctx.scene, str(target_cid)) if target_cid else None
+            target_cid = wf.context.traumaCharacterId or wf.context.character_id
+            ch_ref = ctx.scene_index.character(target_cid) if target_cid else None
             if not ch_ref:
                 return ctx.rb.result(ok=False, wf=wf, participants=ctx.participants, participants_dict_fallback=ctx.participants_dict,
                                      issues=[_issue("context.traumaCharacterId", "Trauma character not found in scene")])
@@ -60,8 +63,8 @@ class WrapUpStage(BaseStage):
 
             trauma_patch = patch_character_data(str(target_cid), {"traumas": new_list})
 
-            wf.context["needsTrauma"] = False
-            wf.context["traumaCharacterId"] = None
+            wf.context.needsTrauma = False
+            wf.context.traumaCharacterId = None
 
         wf.stageKey = "done"
         wf.status = "completed"
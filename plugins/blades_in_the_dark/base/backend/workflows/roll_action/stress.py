@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Optional, Tuple
 
-from .scene import find_character_ref, character_data, get_stress
+from .scene import SceneIndex
 
 STRESS_MAX_DEFAULT = 9
 
@@ -12,11 +12,7 @@ def patch_character_data(character_id: str, data_patch: dict[str, Any]) -> dict[
 
 
 def _append_stress_event(wf, ev: dict[str, Any]) -> None:
-    lst = wf.context.get("stressEvents")
-    if not isinstance(lst, list):
-        lst = []
-    lst.append(ev)
-    wf.context["stressEvents"] = lst
+    wf.context.stressEvents.append(ev)
 
 
 def _stress_max(ch_data: dict[str, Any]) -> int:
@@ -35,7 +31,7 @@ def _stress_max(ch_data: dict[str, Any]) -> int:
 def apply_stress(
     *,
     wf,
-    scene: dict[str, Any],
+    scene_index: SceneIndex,
     character_id: str,
     delta: int,
     reason: str,
@@ -45,13 +41,11 @@ def apply_stress(
     Возвращает (sessionPatch, overflow_to_trauma).
     overflow => stress=0, а trauma выбирает GM в wrap_up. [web:151]
     """
-    ch_ref = find_character_ref(scene, str(character_id))
-    if not ch_ref:
+    if not scene_index.character(character_id):
         return None, False
 
-    ch_data = character_data(ch_ref)
-    old = int(get_stress(ch_data) or 0)
-    mx = _stress_max(ch_data)
+    old = scene_index.stress(character_id)
+    mx = _stress_max(scene_index.data(character_id))
     new_raw = old + int(delta)
 
     overflow = new_raw >= mx
@@ -69,7 +63,7 @@ def apply_stress(
     })
 
     if overflow:
-        wf.context["needsTrauma"] = True
-        wf.context["traumaCharacterId"] = str(character_id)
+        wf.context.needsTrauma = True
+        wf.context.traumaCharacterId = str(character_id)
 
     return patch_character_data(str(character_id), {"stress": new_stress}), overflow
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from typing import Any, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import ConfigDict, Field, NonNegativeInt
+from ...types.base import PluginModel
 
 ActionId = Literal[
     "hunt", "study", "survey", "tinker",
@@ -54,20 +55,71 @@ StageKey = Literal[
 ]
 
 
-class Workflow(BaseModel):
+class RollMods(PluginModel):
+    push: bool = False
+    help: bool = False
+    helper_user_id: Optional[str] = None
+    help_confirmed: bool = False
+    devils_bargain: bool = False
+    bonus_dice: NonNegativeInt = 0
+
+
+class RollContext(PluginModel):
+    # состояние броска между стадиями; roll/resist/stressEvents — записи, которые уходят в broadcasts как есть
+    character_id: Optional[str] = None
+    selectedAction: Optional[ActionId] = None
+    item_id: Optional[str] = None
+    position: Optional[Position] = None
+    effect: Optional[Effect] = None
+    consequence_hint: Optional[str] = None
+    mods: RollMods = Field(default_factory=RollMods)
+    roll: Optional[dict[str, Any]] = None
+    roll_broadcasts: list[dict[str, Any]] = Field(default_factory=list)
+    consequences: Optional[Any] = None
+    resist: Optional[dict[str, Any]] = None
+    resist_broadcasts: list[dict[str, Any]] = Field(default_factory=list)
+    summary: Optional[str] = None
+    trauma: Optional[str] = None
+    stressEvents: list[dict[str, Any]] = Field(default_factory=list)
+    needsTrauma: bool = False
+    traumaCharacterId: Optional[str] = None
+
+    def reset_roll(self) -> None:
+        """Сброс всего, что накоплено после выбора действия (новый заход с choose_action)."""
+        self.position = None
+        self.effect = None
+        self.consequence_hint = None
+        self.mods = RollMods()
+        self.roll = None
+        self.roll_broadcasts = []
+        self.resist = None
+        self.resist_broadcasts = []
+        self.summary = None
+        self.trauma = None
+        self.stressEvents = []
+        self.needsTrauma = False
+        self.traumaCharacterId = None
+
+
+class Workflow(PluginModel):
     actionKey: Literal["blades.roll_action"] = "blades.roll_action"
     stageKey: StageKey = "choose_action"
     stageData: dict[str, Any] = Field(default_factory=dict)
-    context: dict[str, Any] = Field(default_factory=dict)
+    context: RollContext = Field(default_factory=RollContext)
     status: Literal["active", "completed", "canceled"] = "active"
+    # растёт на каждом принятом шаге (ResultBuilder)
+    revision: NonNegativeInt = 0
+
 
+class UiSpec(PluginModel):
+    # константы уровня модуля в стадиях, общие для всех envelope -> неизменяемые
+    model_config = ConfigDict(frozen=True)
 
-class UiSpec(BaseModel):
     component: str
     props: dict[str, Any] = Field(default_factory=dict)
 
 
-class StageEnvelope(BaseModel):
+class StageEnvelope(PluginModel):
     audience: list[dict[str, Any]]
     stageKey: StageKey
     stageData: dict[str, Any] = Field(default_factory=dict)
@@ -75,7 +127,7 @@ class StageEnvelope(BaseModel):
     broadcasts: list[dict[str, Any]] = Field(default_factory=list)
 
 
-class SubmitResult(BaseModel):
+class SubmitResult(PluginModel):
     ok: bool
     issues: list[dict[str, Any]] = Field(default_factory=list)
     workflow: Optional[dict[str, Any]] = None
@@ -87,22 +139,29 @@ class SubmitResult(BaseModel):
     # NEW: изменения сессии (выполняет SessionActionManager)
     sessionPatch: Optional[dict[str, Any]] = None
 
+    def to_response(self) -> dict[str, Any]:
+        """
+        Ответ бэку без второго model_dump: workflow уже выгружен в JSON (ResultBuilder),
+        остальные поля плагин собирает из JSON-значений — повторный обход ничего не меняет.
+        """
+        return {name: getattr(self, name) for name in type(self).model_fields}
+
 
 # -------- inputs
 
-class ChooseActionInput(BaseModel):
+class ChooseActionInput(PluginModel):
     character_id: str
     action: ActionId
     item_id: Optional[str] = None
 
 
-class GmSetInput(BaseModel):
+class GmSetInput(PluginModel):
     position: Position
     effect: Effect
     consequence_hint: Optional[str] = None
 
 
-class PlayerModsInput(BaseModel):
+class PlayerModsInput(PluginModel):
     push: bool = False
     devils_bargain: bool = False
     bonus_dice: int = 0
@@ -110,10 +169,10 @@ class PlayerModsInput(BaseModel):
     help: bool = False
     helper_user_id: Optional[str] = None
 
-class AssistConfirmInput(BaseModel):
+class AssistConfirmInput(PluginModel):
     accept_help: bool
 
-class GmFinalizeInput(BaseModel):
+class GmFinalizeInput(PluginModel):
     allow: bool = True
     # разрешаем мастеру править (опционально)
     action: Optional[ActionId] = None 
@@ -124,19 +183,19 @@ class GmFinalizeInput(BaseModel):
     consequence_hint: Optional[str] = None
 
 
-class PreRollConfirmInput(BaseModel):
+class PreRollConfirmInput(PluginModel):
     choice: Literal["resist", "accept"] = "accept"
 
-class MitigateInput(BaseModel):
+class MitigateInput(PluginModel):
     choice: Literal["resist", "accept"] = "accept"
 
 
-class ResistInput(BaseModel):
+class ResistInput(PluginModel):
     attribute: AttributeId
     confirm: bool = True
 
 
-class WrapUpInput(BaseModel):
+class WrapUpInput(PluginModel):
     # если хочешь дать мастеру возможность вбить травму/итог
     trauma: Optional[str] = None
     summary: Optional[str] = None
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import ValidationError
 
 from ..action_participants import ActionParticipants
-from .types import Workflow, StageEnvelope, SubmitResult
-from .stage_base import ResultBuilder, StageCtx, _issue
+from .types import RollContext, Workflow, StageEnvelope, SubmitResult
+from .scene import SceneIndex
+from .stage_base import ResultBuilder, StageCtx, _issue, dump_workflow, load_participants, load_workflow
 from .stages.choose_action import ChooseActionStage
 from .stages.gm_set_position_effect import GmSetPositionEffectStage
 from .stages.player_add_mods import PlayerAddModsStage
@@ -18,10 +19,6 @@ from .stages.resist import ResistStage
 from .stages.wrap_up import WrapUpStage
 
 
-
-def _dump(m: Any) -> Any:
-    return m.model_dump(mode="json") if hasattr(m, "model_dump") else m.dict()
-
 class RollActionWorkflow:
     key = "blades.roll_action"
 
@@ -58,65 +55,62 @@ class RollActionWorkflow:
         if wf.stageKey in ("gm_set_position_effect", "gm_finalize", "resist", "wrap_up"):
             return [gm]
         if wf.stageKey == "assist_confirm":
-            helper = (wf.context.get("mods") or {}).get("helper_user_id")
+            helper = wf.context.mods.helper_user_id
             return [str(helper)] if helper else [gm]
         if wf.stageKey == "done":
             return [gm, ini] if gm != ini else [gm]
         return [gm]
 
+    def _ctx(self, scene: dict[str, Any] | SceneIndex, actor_user_id: str, participants: ActionParticipants, participants_dict: dict[str, Any]) -> StageCtx:
+        # SceneIndex приходит из кэша сцены сессии (индекс общий для всех вызовов этой версии сцены)
+        index = scene if isinstance(scene, SceneIndex) else SceneIndex(scene)
+        return StageCtx(scene=index.scene, scene_index=index, actor_user_id=actor_user_id,
+                        participants=participants, participants_dict=participants_dict, rb=self._rb)
+
     def start(self, payload: dict[str, Any]) -> SubmitResult:
         wf = Workflow()
         wf.stageKey = "choose_action"
-        wf.context = {
-            "character_id": None,
-            "selectedAction": None,
-            "item_id": None,
-            "position": None,
-            "effect": None,
-            "consequence_hint": None,
-            "mods": {
-                "push": False,
-                "help": False,
-                "helper_user_id": None,
-                "help_confirmed": False,
-                "devils_bargain": False,
-                "bonus_dice": 0,
-            },
-            "roll": None,
-            "roll_broadcasts": [],
-            "consequences": None,
-            "resist": None,
-            "resist_broadcasts": [],
-            "summary": None,
-            "trauma": None,
-            "stressEvents": [],
-            "needsTrauma": False,
-            "traumaCharacterId": None,
-        }
+        wf.context = RollContext()
 
         initiatorId = payload.get("participants", {}).get("initiatorUserId", None)
         participant_ids = [initiatorId] if initiatorId else []
-        return SubmitResult(ok=True, issues=[], workflow=_dump(wf), participantIds=participant_ids)
+        return SubmitResult(ok=True, issues=[], workflow=dump_workflow(wf), participantIds=participant_ids)
 
-    def present(self, scene: dict[str, Any], actor_user_id: str, participants_dict: dict[str, Any], wf_dict: dict[str, Any]) -> StageEnvelope:
-        wf = Workflow.model_validate(wf_dict) if hasattr(Workflow, "model_validate") else Workflow.parse_obj(wf_dict)
-        participants = ActionParticipants.model_validate(participants_dict) if hasattr(ActionParticipants, "model_validate") else ActionParticipants.parse_obj(participants_dict)
+    def load(self, wf_dict: dict[str, Any]) -> Workflow:
+        return load_workflow(wf_dict)
+
+    def present(self, scene: dict[str, Any] | SceneIndex, actor_user_id: str, participants_dict: dict[str, Any], wf_dict: dict[str, Any]) -> StageEnvelope:
+        wf = load_workflow(wf_dict)
+        participants = load_participants(participants_dict)
 
         stage = self._stages.get(wf.stageKey)
         if not stage:
             return StageEnvelope(audience=[{"kind": "all"}], stageKey="done", stageData={}, ui=None, broadcasts=[])
 
-        ctx = StageCtx(scene=scene, actor_user_id=actor_user_id, participants=participants, participants_dict=participants_dict, rb=self._rb)
+        ctx = self._ctx(scene, actor_user_id, participants, participants_dict)
         return stage.present(wf, ctx)
 
-    def submit(self, scene: dict[str, Any], actor_user_id: str, participants_dict: dict[str, Any], wf_dict: dict[str, Any], input_dict: dict[str, Any]) -> SubmitResult:
-        try:
-            wf = Workflow.model_validate(wf_dict) if hasattr(Workflow, "model_validate") else Workflow.parse_obj(wf_dict)
-        except ValidationError as e:
-            return self._rb.result(ok=False, wf=None, participants=None, participants_dict_fallback=participants_dict, issues=[_issue("workflow", str(e))])
+    def submit(
+        self,
+        scene: dict[str, Any] | SceneIndex,
+        actor_user_id: str,
+        participants_dict: dict[str, Any],
+        wf_dict: dict[str, Any],
+        input_dict: dict[str, Any],
+        wf_model: Optional[Workflow] = None,
+    ) -> SubmitResult:
+        # wf_model — уже разобранный wf_dict, которым вызывающий владеет единолично: стадии меняют его на месте,
+        # и после принятого шага это ровно новое состояние (см. workflow_store)
+        if wf_model is not None:
+            wf = wf_model
+        else:
+            try:
+                wf = load_workflow(wf_dict)
+            except ValidationError as e:
+                return self._rb.result(ok=False, wf=None, participants=None, participants_dict_fallback=participants_dict, issues=[_issue("workflow", str(e))])
 
         try:
-            participants = ActionParticipants.model_validate(participants_dict) if hasattr(ActionParticipants, "model_validate") else ActionParticipants.parse_obj(participants_dict)
+            participants = load_participants(participants_dict)
         except ValidationError as e:
             return self._rb.result(ok=False, wf=wf, participants=None, participants_dict_fallback=participants_dict, issues=[_issue("participants", str(e))])
 
@@ -127,5 +121,5 @@ class RollActionWorkflow:
         if not stage:
             return self._rb.result(ok=False, wf=wf, participants=participants, participants_dict_fallback=participants_dict, issues=[_issue("", "Unknown stage")])
 
-        ctx = StageCtx(scene=scene, actor_user_id=actor_user_id, participants=participants, participants_dict=participants_dict, rb=self._rb)
+        ctx = self._ctx(scene, actor_user_id, participants, participants_dict)
         return stage.submit(wf, ctx, input_dict)
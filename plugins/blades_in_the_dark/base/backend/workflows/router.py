@@ -1,32 +1,57 @@
 from __future__ import annotations
 
-from typing import Any, Callable
+from typing import Any, Callable, Optional
+
+from .....metrics import RouteMetrics
 
 class WorkflowRouter:
-    def __init__(self) -> None:
+    def __init__(self, metrics: Optional[RouteMetrics] = None) -> None:
         self._start: dict[str, Callable[..., Any]] = {}
         self._present: dict[str, Callable[..., Any]] = {}
         self._submit: dict[str, Callable[..., Any]] = {}
+        self._load: dict[str, Callable[[dict[str, Any]], Any]] = {}
+        self._metrics = metrics
 
-    def register(self, action_key: str, *, start, present, submit) -> None:
+    def register(self, action_key: str, *, start, present, submit, load=None) -> None:
         self._start[action_key] = start
         self._present[action_key] = present
         self._submit[action_key] = submit
+        if load is not None:
+            self._load[action_key] = load
+
+    def load(self, action_key: str, wf_dict: dict[str, Any]) -> Any:
+        """Разобранный workflow для submit(wf_model=...) или None (нет загрузчика / невалидный dict — submit разберёт и сообщит сам)."""
+        fn = self._load.get(action_key)
+        if fn is None:
+            return None
+        try:
+            return fn(wf_dict)
+        except ValueError:
+            return None
+
+    def _call(self, kind: str, action_key: str, fn: Callable[..., Any], kw: dict[str, Any]) -> Any:
+        # stage.* — вызовы кода стадий (со stageKey), отдельно от запросов workflow.*, которые считает handle:
+        # один запрос может не дойти до стадии (кадры из кэша) или вызвать её много раз (replay)
+        m = self._metrics
+        if m is None or not m.enabled:
+            return fn(**kw)
+        stage = (kw.get("wf_dict") or {}).get("stageKey") or ""
+        return m.timed(kind, action_key, str(stage), kw, lambda: fn(**kw))
 
     def start(self, action_key: str, **kw) -> Any:
         fn = self._start.get(action_key)
         if not fn:
             return {"ok": False, "issues": [{"path": "actionKey", "message": "Unknown actionKey", "level": "error"}]}
-        return fn(**kw)
+        return self._call("stage.start", action_key, fn, kw)
 
     def present(self, action_key: str, **kw) -> Any:
         fn = self._present.get(action_key)
         if not fn:
             return {"ok": False, "issues": [{"path": "actionKey", "message": "Unknown actionKey", "level": "error"}]}
-        return fn(**kw)
+        return self._call("stage.present", action_key, fn, kw)
 
     def submit(self, action_key: str, **kw) -> Any:
         fn = self._submit.get(action_key)
         if not fn:
             return {"ok": False, "issues": [{"path": "actionKey", "message": "Unknown actionKey", "level": "error"}]}
-        return fn(**kw)
+        return self._call("stage.submit", action_key, fn, kw)
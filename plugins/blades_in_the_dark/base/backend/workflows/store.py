@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+from .journal import WorkflowJournal
+
+if TYPE_CHECKING:
+    from .fanout import FanoutPlan
+    from .presentation import StageFrames
+    from .roll_action.types import Workflow
+
+# Состояние запущенных workflow на стороне плагина: бэк шлёт только (actionId, expectedRevision, input),
+# workflow/participants/scene берутся отсюда. Это кэш в памяти процесса, ограниченный LRU:
+# выпавшее или потерянное при рестарте состояние бэк возвращает через restore (из своего snapshot).
+
+# сколько workflow держим одновременно
+MAX_ACTIONS = 256
+
+_TAKE_LOCK = threading.Lock()
+
+
+@dataclass
+class StoredAction:
+    action_key: str
+    workflow: dict[str, Any]
+    participants: dict[str, Any] = field(default_factory=dict)
+    scene: dict[str, Any] = field(default_factory=dict)
+    # журнал шагов (общий для всех ревизий записи, только дописывается)
+    journal: Optional[WorkflowJournal] = None
+    # broadcasts шага, который привёл к этой ревизии (в snapshot не попадают: разосланы в момент шага)
+    broadcasts: list[dict[str, Any]] = field(default_factory=list)
+    # present() и план рассылки этой ревизии (заполняются при первом обращении; у следующей ревизии — новая запись)
+    frames: Optional[StageFrames] = field(default=None, compare=False, repr=False)
+    fanout: Optional[FanoutPlan] = field(default=None, compare=False, repr=False)
+    # разобранный workflow (модель после шага): забирает ровно один следующий submit (take_model),
+    # остальные разбирают dict — стадии меняют модель на месте
+    model: Optional[Workflow] = field(default=None, compare=False, repr=False)
+
+    def take_model(self) -> Optional[Workflow]:
+        with _TAKE_LOCK:
+            model, self.model = self.model, None
+        return model
+
+    @property
+    def revision(self) -> int:
+        rev = self.workflow.get("revision")
+        return rev if isinstance(rev, int) else 0
+
+    def to_dict(self, action_id: str) -> dict[str, Any]:
+        out = {
+            "actionId": action_id,
+            "actionKey": self.action_key,
+            "revision": self.revision,
+            "workflow": self.workflow,
+            "participants": self.participants,
+            "scene": self.scene,
+        }
+        if self.journal is not None:
+            # без журнала восстановленная запись не пишет события -> workflow.replay собрал бы старую ревизию
+            out["journal"] = self.journal.to_dict()
+        return out
+
+
+class WorkflowStore:
+    """
+    actionId -> StoredAction. Записи не меняются на месте: каждый шаг кладёт новую (compare_and_set),
+    поэтому читать можно без копий, а проигравший гонку submit просто получает отказ.
+    on_evict(actionId, запись) — хук для сохранения вытесняемого состояния.
+    """
+
+    def __init__(self, maxsize: int = MAX_ACTIONS, on_evict: Optional[Callable[[str, StoredAction], None]] = None) -> None:
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self._entries: OrderedDict[str, StoredAction] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.conflicts = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, action_id: str) -> Optional[StoredAction]:
+        with self._lock:
+            entry = self._entries.get(action_id)
+            if entry is not None:
+                self._entries.move_to_end(action_id)
+            return entry
+
+    def _insert(self, action_id: str, entry: StoredAction, evicted: list[tuple[str, StoredAction]]) -> None:
+        # вызывается под self._lock; вытесненное — в evicted (хук вызывает _evicted уже без блокировки)
+        self._entries[action_id] = entry
+        self._entries.move_to_end(action_id)
+        while len(self._entries) > self.maxsize:
+            evicted.append(self._entries.popitem(last=False))
+            self.evictions += 1
+
+    def _evicted(self, evicted: list[tuple[str, StoredAction]]) -> None:
+        # хук вне блокировки: он может писать на диск/в БД
+        if self.on_evict is not None:
+            for item in evicted:
+                self.on_evict(*item)
+
+    def put(self, action_id: str, entry: StoredAction) -> None:
+        evicted: list[tuple[str, StoredAction]] = []
+        with self._lock:
+            self._insert(action_id, entry, evicted)
+        self._evicted(evicted)
+
+    def compare_and_set(
+        self,
+        action_id: str,
+        expected_revision: int,
+        entry: StoredAction,
+        on_commit: Optional[Callable[[], Any]] = None,
+    ) -> bool:
+        """
+        Кладёт entry, только если текущая запись всё ещё expected_revision.
+        on_commit вызывается под той же блокировкой (запись в журнал идёт в порядке ревизий).
+        """
+        with self._lock:
+            current = self._entries.get(action_id)
+            if current is None or current.revision != expected_revision:
+                self.conflicts += 1
+                return False
+            self._entries[action_id] = entry
+            self._entries.move_to_end(action_id)
+            if on_commit is not None:
+                on_commit()
+            return True
+
+    def drop(self, action_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(action_id, None) is not None
+
+    def snapshot(self, action_ids: Optional[Iterable[str]] = None) -> list[dict[str, Any]]:
+        """JSON-совместимый снимок записей (всех или перечисленных) для restore."""
+        with self._lock:
+            ids = list(self._entries) if action_ids is None else [a for a in action_ids if a in self._entries]
+            return [self._entries[a].to_dict(a) for a in ids]
+
+    def restore(self, items: Iterable[Any]) -> int:
+        """Кладёт записи из snapshot (более новая ревизия не затирается); возвращает число принятых."""
+        restored = 0
+        evicted: list[tuple[str, StoredAction]] = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            action_id, action_key, wf = item.get("actionId"), item.get("actionKey"), item.get("workflow")
+            if not isinstance(action_id, str) or not isinstance(action_key, str) or not isinstance(wf, dict):
+                continue
+            participants = item.get("participants") if isinstance(item.get("participants"), dict) else {}
+            scene = item.get("scene") if isinstance(item.get("scene"), dict) else {}
+            entry = StoredAction(
+                action_key=action_key,
+                workflow=wf,
+                participants=participants,
+                scene=scene,
+                journal=_restore_journal(item.get("journal"), action_key, wf, participants, scene),
+            )
+            # проверка и вставка под одной блокировкой: иначе compare_and_set между ними затёрся бы старым snapshot
+            with self._lock:
+                current = self._entries.get(action_id)
+                if current is not None and current.revision > entry.revision:
+                    continue
+                self._insert(action_id, entry, evicted)
+            restored += 1
+        self._evicted(evicted)
+        return restored
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "evictions": self.evictions, "conflicts": self.conflicts}
+
+
+def _restore_journal(
+    data: Any,
+    action_key: str,
+    wf: dict[str, Any],
+    participants: dict[str, Any],
+    scene: dict[str, Any],
+) -> WorkflowJournal:
+    """Журнал из snapshot; без него (старый snapshot) — новый журнал с восстановленной ревизии."""
+    if not isinstance(data, dict):
+        return WorkflowJournal(action_key, wf, participants, scene)
+    journal = WorkflowJournal.from_dict(data)
+    # следующий шаг пойдёт по сохранённым сцене/участникам — события не должны нести их целиком
+    journal.track(scene, participants)
+    return journal
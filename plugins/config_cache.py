@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from pydantic_core import from_json, to_json
+
+
+@dataclass(frozen=True)
+class ConfigBlob:
+    json: bytes
+    gzip: bytes
+    etag: str
+
+    def copy(self) -> dict[str, Any]:
+        """config как свежий dict (из готовых JSON-байтов): вызывающий может его менять, кэш это не задевает."""
+        return from_json(self.json)
+
+
+class CachedConfig:
+    """
+    config() менеджера, построенный один раз на версию плагина: готовые JSON-байты, gzip-вариант
+    и ETag по содержимому. Собранный dict не хранится и наружу не отдаётся — только копии (ConfigBlob.copy).
+    Конкурентные первые запросы ждут одну сборку.
+    Годится только для config(), не зависящих от context.
+    """
+
+    def __init__(self, build: Callable[[], dict[str, Any]]) -> None:
+        self._build = build
+        self._blob: Optional[ConfigBlob] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ConfigBlob:
+        blob = self._blob
+        if blob is None:
+            with self._lock:
+                blob = self._blob
+                if blob is None:
+                    raw = to_json(self._build())
+                    blob = ConfigBlob(
+                        json=raw,
+                        gzip=gzip.compress(raw, compresslevel=6, mtime=0),
+                        etag=hashlib.blake2b(raw, digest_size=16).hexdigest(),
+                    )
+                    self._blob = blob
+        return blob
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Any, Iterable, Literal, Optional
+
+from pydantic_core import from_json, to_json
+
+from . import PLUGIN_MODULES, get_plugin, warmup
+
+logger = logging.getLogger(__name__)
+
+ExecMode = Literal["inline", "pool"]
+
+DEFAULT_TIMEOUT = 5.0
+
+# Маршруты с состоянием в фабрике процесса (workflow_store, scene_cache, графы/индексы gumshoe):
+# в пуле у каждого воркера своя копия, и вызовы случайно получали бы "Unknown action"/needScene.
+# Такие вызовы всегда идут inline, что бы ни было в routes.
+STATEFUL_KINDS = frozenset({
+    "workflow.present", "workflow.snapshot", "workflow.restore", "workflow.journal", "workflow.replay", "workflow.drop",
+    "graph", "index",
+})
+# эти — только если payload ссылается на сохранённое состояние (actionId / sessionId)
+STATEFUL_KEYS = ("actionId", "sessionId")
+STATEFUL_IF_KEYED = frozenset({"workflow.start", "workflow.submit", "actions.list"})
+
+
+def _stateful(kind: str, payload: Any) -> bool:
+    if kind in STATEFUL_KINDS:
+        return True
+    return kind in STATEFUL_IF_KEYED and isinstance(payload, dict) and any(payload.get(k) is not None for k in STATEFUL_KEYS)
+
+
+def _route_error(message: str) -> dict[str, Any]:
+    return {"ok": False, "issues": [{"path": "", "message": message, "icon": "error", "level": "error"}]}
+
+
+# ---- worker side ----
+
+def _init_worker(names: list[str]) -> None:
+    warmup(names)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _handle_packed(blob: bytes) -> bytes:
+    # вызов и результат гоняем как компактный JSON (pydantic_core), а не pickle дерева dict'ов
+    plugin_name, kind, entity, payload, context = from_json(blob)
+    plugin = get_plugin(plugin_name)
+    if plugin is None:
+        return to_json(_route_error(f"Unknown plugin '{plugin_name}'"))
+    return to_json(plugin.get_factory().handle(kind, entity, payload, context))
+
+
+def _handle_batch_packed(blob: bytes) -> bytes:
+    plugin_name, calls = from_json(blob)
+    plugin = get_plugin(plugin_name)
+    if plugin is None:
+        return to_json([_route_error(f"Unknown plugin '{plugin_name}'")] * len(calls))
+    return to_json(plugin.get_factory().handle_batch([tuple(c) for c in calls]))
+
+
+# ---- backend side ----
+
+class PluginExecutor:
+    """
+    Выполняет RulesFactory.handle либо в текущем процессе ("inline"),
+    либо в пуле процессов с заранее прогретыми фабриками ("pool").
+
+    Режим выбирается по маршруту: сначала "kind:entity", потом "kind", потом default_mode,
+    например {"validate": "pool", "validate_patch": "pool", "config": "inline"}.
+    Маршруты с состоянием (STATEFUL_KINDS) всегда inline. Зависший в пуле вызов не отменить —
+    по таймауту пул пересоздаётся, чтобы зависшие воркеры не выедали его.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: Optional[int] = None,
+        routes: Optional[dict[str, ExecMode]] = None,
+        default_mode: ExecMode = "inline",
+        timeout: float = DEFAULT_TIMEOUT,
+        plugin_names: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.routes: dict[str, ExecMode] = dict(routes or {})
+        self.default_mode: ExecMode = default_mode
+        self.timeout = timeout
+        self._workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._plugin_names = list(plugin_names if plugin_names is not None else PLUGIN_MODULES)
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.restarts = 0
+
+    def _new_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        # spawn: форк процесса бэкенда с живым event loop и потоками небезопасен
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._plugin_names,),
+        )
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        self._pool = self._new_pool()
+        # поднимаем все процессы сразу, чтобы прогрев не пришёлся на первый запрос
+        for fut in [self._pool.submit(_ping) for _ in range(self._workers)]:
+            fut.result()
+        logger.info("Plugin executor started with %d workers", self._workers)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _restart(self, pool: concurrent.futures.ProcessPoolExecutor) -> None:
+        """
+        Заменяет пул, в котором завис вызов: новые вызовы сразу идут в свежий пул, процессы старого
+        убиваются (остальные его вызовы завершатся с BrokenProcessPool -> ошибка маршрута).
+        """
+        with self._pool_lock:
+            if self._pool is not pool:
+                # пул уже заменили по другому таймауту
+                return
+            self._pool = self._new_pool()
+            self.restarts += 1
+        # у ProcessPoolExecutor нет API, чтобы остановить один занятый воркер
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            proc.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Plugin executor pool restarted after a timeout")
+
+    def _timed_out(self, pool: concurrent.futures.ProcessPoolExecutor, fut: concurrent.futures.Future, plugin_name: str, kind: str, entity: Any) -> dict[str, Any]:
+        logger.warning("Plugin call %s %s/%s timed out", plugin_name, kind, entity)
+        # ещё в очереди — просто снимаем; уже выполняется — воркер занят, пока не убьём
+        if not fut.cancel():
+            self._restart(pool)
+        return _route_error("Plugin call timed out")
+
+    def mode_for(self, kind: str, entity: Any, payload: Any = None) -> ExecMode:
+        if _stateful(kind, payload):
+            return "inline"
+        mode = self.routes.get(f"{kind}:{entity}") or self.routes.get(kind) or self.default_mode
+        # пул не запущен — деградируем в inline, а не падаем
+        return mode if mode == "inline" or self._pool is not None else "inline"
+
+    def _submit(self, fn: Any, blob: bytes) -> Optional[tuple[concurrent.futures.ProcessPoolExecutor, concurrent.futures.Future]]:
+        """
+        (пул, future) или None — пула нет, вызов выполняется inline. Пул могут закрыть между чтением
+        self._pool и submit (_restart по чужому таймауту, close): тогда один повтор в пуле, что его сменил.
+        """
+        for _ in range(2):
+            pool = self._pool
+            if pool is None:
+                return None
+            try:
+                return pool, pool.submit(fn, blob)
+            except RuntimeError:
+                # shutdown или BrokenProcessPool; пул тот же — не сменили, а закрыли
+                if self._pool is pool:
+                    return None
+        return None
+
+    def submit_batch(self, plugin_name: str, calls: list[tuple[str, Any, Any, Any]]) -> Optional[concurrent.futures.Future]:
+        """
+        Отправляет пачку вызовов в пул одним handle_batch; future отдаёт JSON-байты списка результатов.
+        None — пул не запущен или в пачке есть вызов с состоянием (STATEFUL_KINDS, workflow.* с actionId...):
+        вызывающий выполняет пачку у себя.
+        """
+        if any(_stateful(kind, payload) for kind, _, payload, _ in calls):
+            return None
+        submitted = self._submit(_handle_batch_packed, to_json([plugin_name, calls]))
+        return submitted[1] if submitted is not None else None
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    @staticmethod
+    def _inline(plugin_name: str, kind: str, entity: Any, payload: Any, context: Any) -> Any:
+        plugin = get_plugin(plugin_name)
+        if plugin is None:
+            return _route_error(f"Unknown plugin '{plugin_name}'")
+        return plugin.get_factory().handle(kind, entity, payload, context)
+
+    def handle(self, plugin_name: str, kind: str, entity: Any, payload: Any, context: Any, *, timeout: Optional[float] = None) -> Any:
+        submitted = None
+        if self._pool is not None and self.mode_for(kind, entity, payload) == "pool":
+            submitted = self._submit(_handle_packed, to_json([plugin_name, kind, entity, payload, context]))
+        if submitted is None:
+            return self._inline(plugin_name, kind, entity, payload, context)
+
+        pool, fut = submitted
+        try:
+            return from_json(fut.result(timeout=timeout if timeout is not None else self.timeout))
+        except concurrent.futures.TimeoutError:
+            return self._timed_out(pool, fut, plugin_name, kind, entity)
+        except BrokenProcessPool:
+            logger.warning("Plugin call %s %s/%s lost its worker", plugin_name, kind, entity)
+            return _route_error("Plugin worker was restarted")
+
+    async def handle_async(self, plugin_name: str, kind: str, entity: Any, payload: Any, context: Any, *, timeout: Optional[float] = None) -> Any:
+        submitted = None
+        if self._pool is not None and self.mode_for(kind, entity, payload) == "pool":
+            submitted = self._submit(_handle_packed, to_json([plugin_name, kind, entity, payload, context]))
+        if submitted is None:
+            return self._inline(plugin_name, kind, entity, payload, context)
+
+        pool, fut = submitted
+        try:
+            blob = await asyncio.wait_for(asyncio.wrap_future(fut), timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            return self._timed_out(pool, fut, plugin_name, kind, entity)
+        except BrokenProcessPool:
+            logger.warning("Plugin call %s %s/%s lost its worker", plugin_name, kind, entity)
+            return _route_error("Plugin worker was restarted")
+        return from_json(blob)
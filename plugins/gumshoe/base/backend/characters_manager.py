@@ -1,20 +1,46 @@
 # characters.py
 from __future__ import annotations
 
+from array import array
+from itertools import repeat
 from typing import Any
-from pydantic import ValidationError
 
-from .types import CharacterData, ValidateResult, ValidationIssue
+from .types import CharacterData, FieldParser, Payload, ValidateResult, ValidationIssue, parse_payload
+from .types.base import make_adapter
 from .codex_skills import SkillsCodex
+from .skill_vectors import MAX_VALUE
+from ....config_cache import CachedConfig, ConfigBlob
+from ....json_patch import JsonPatchError, apply_patch, touched_roots
+
+try:
+    import numpy as np
+except ImportError:  # без numpy validate_roster проверяет листы по одному
+    np = None
+
+_CHARACTER = make_adapter(CharacterData)
+_FIELDS = FieldParser(CharacterData)
+_CHARACTER_FIELDS = tuple(CharacterData.model_fields)
 
 
 class CharactersManager:
     kind = "character"
+    # ключи context, влияющие на результат validate (для кэша результатов)
+    context_keys: tuple[str, ...] = ()
+    # handle_batch зовёт validate_roster с этого размера: меньше — цикл validate_and_enrich быстрее
+    roster_min = 8
 
     def __init__(self, skills: SkillsCodex) -> None:
         self.skills = skills
+        self._config = CachedConfig(self._build_config)
 
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]:
+        # не зависит от context -> собирается один раз (см. CachedConfig), отдаётся копия
+        return self._config.get().copy()
+
+    def config_blob(self) -> ConfigBlob:
+        return self._config.get()
+
+    def _build_config(self) -> dict[str, Any]:
         base = self.skills.as_config()
 
         # Дефолты. Мастер/сценарий может переопределить, а потом записать в data.points.
@@ -39,36 +65,158 @@ class CharactersManager:
             },
         }
 
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult:
-        issues: list[ValidationIssue] = []
-        print(payload)
+    def validate_and_enrich(
+        self,
+        payload: Payload,
+        context: dict[str, Any] | None = None,
+    ) -> ValidateResult:
+        ch, issues = self._parse(payload)
+        if ch is None:
+            return ValidateResult(ok=False, issues=issues, data=None)
 
+        totals = self._skill_totals(ch.skills, issues)
+        return self._finish(ch.model_dump(), issues, totals["investigative"], totals["general"])
+
+    def validate_patch(
+        self,
+        prev: dict[str, Any],
+        patch: list[dict[str, Any]],
+        context: dict[str, Any] | None = None,
+    ) -> ValidateResult:
+        """
+        Инкрементальная валидация: prev — ранее принятые (обогащённые) данные, patch — JSON Patch
+        от клиента. Разбираются только изменённые поля, бюджеты пересчитываются, только если менялись
+        skills/points; результат совпадает с validate_and_enrich(apply_patch(prev, patch)).
+        """
         try:
-            ch = (
-                CharacterData.model_validate(payload)
-                if hasattr(CharacterData, "model_validate")
-                else CharacterData.parse_obj(payload)
-            )
-        except ValidationError as e:
-            for err in e.errors():
-                loc = ".".join(str(x) for x in err.get("loc", []))
-                issues.append(
-                    ValidationIssue(
-                        path=f"data.{loc}" if loc else "data",
-                        message=err.get("msg", "Invalid"),
-                        icon="error",
-                    )
-                )
+            doc = apply_patch(prev, patch)
+            touched = touched_roots(patch)
+        except JsonPatchError as e:
+            return ValidateResult(ok=False, issues=[ValidationIssue(path="patch", message=str(e), icon="error")], data=None)
+
+        prev_points = prev.get("skill_points") if isinstance(prev, dict) else None
+        if (
+            touched is None
+            or not isinstance(doc, dict)
+            or not isinstance(prev_points, dict)
+            or not {"investigativeTotal", "generalTotal"} <= prev_points.keys()
+            or any(name not in prev for name in _CHARACTER_FIELDS)
+        ):
+            # патч корня или prev не из validate_and_enrich — честная полная валидация
+            return self.validate_and_enrich(doc, context)
+
+        fields, issues = _FIELDS.parse(doc, touched.intersection(_CHARACTER_FIELDS))
+        if issues:
             return ValidateResult(ok=False, issues=issues, data=None)
 
-        allowed = self.skills.allowed_map()
+        data = {name: fields[name] if name in fields else doc[name] for name in _CHARACTER_FIELDS}
+        if touched.isdisjoint(("skills", "points")):
+            # навыки и бюджеты те же, что в принятом prev -> суммы оттуда, ошибок бюджета быть не может
+            return self._finish(data, issues, prev_points["investigativeTotal"], prev_points["generalTotal"])
+
+        totals = self._skill_totals(data["skills"], issues)
+        return self._finish(data, issues, totals["investigative"], totals["general"])
 
-        inv_total = 0
-        gen_total = 0
+    def validate_roster(
+        self,
+        payloads: list[Payload],
+        context: dict[str, Any] | None = None,
+    ) -> list[ValidateResult]:
+        """
+        Валидация партии/ростера: листы разбираются по одному, а навыки всех листов идут одним
+        плоским массивом пар (лист, навык, значение) — неизвестные навыки, навыки без kind, суммы
+        по kind и превышения бюджетов numpy считает для всех листов сразу. Без numpy (или при
+        значениях за пределами int64) — те же проверки по листу. Результат i совпадает
+        с validate_and_enrich(payloads[i]).
+        """
+        results: list[ValidateResult | None] = [None] * len(payloads)
+        parsed: list[tuple[int, CharacterData]] = []
+        for n, payload in enumerate(payloads):
+            ch, issues = self._parse(payload)
+            if ch is None:
+                results[n] = ValidateResult(ok=False, issues=issues, data=None)
+                continue
+            parsed.append((n, ch))
+
+        try:
+            checked = self._check_roster([ch for _, ch in parsed]) if np is not None else None
+        except OverflowError:
+            checked = None
+        if checked is None:
+            for n, ch in parsed:
+                issues: list[ValidationIssue] = []
+                totals = self._skill_totals(ch.skills, issues)
+                results[n] = self._finish(ch.model_dump(), issues, totals["investigative"], totals["general"])
+            return results  # type: ignore[return-value]
+
+        skill_issues, inv_totals, gen_totals, over = checked
+        for j, (n, ch) in enumerate(parsed):
+            issues = skill_issues.get(j, [])
+            if issues or j in over:
+                results[n] = self._finish(ch.model_dump(), issues, inv_totals[j], gen_totals[j])
+            else:
+                results[n] = self._enriched(ch.model_dump(), inv_totals[j], gen_totals[j])
+        return results  # type: ignore[return-value]
+
+    def _check_roster(
+        self, sheets: list[CharacterData]
+    ) -> tuple[dict[int, list[ValidationIssue]], list[int], list[int], set[int]]:
+        # -> (issues навыков по листам, суммы investigative, суммы general, листы с превышением бюджета)
+        layout = self.skills.layout
+        sids: list[str] = []
+        values: list[int] = []
+        counts: list[int] = []
+        for ch in sheets:
+            sids.extend(ch.skills)
+            values.extend(ch.skills.values())
+            counts.append(len(ch.skills))
+
+        count = len(sheets)
+        owners = np.repeat(np.arange(count, dtype=np.intp), counts)
+        rows = np.fromiter(map(layout.index.get, sids, repeat(-1)), dtype=np.intp, count=len(sids))
+        vals = np.fromiter(values, dtype=np.int64, count=len(values))
+        if vals.size and int(vals.max()) > np.iinfo(np.int64).max // max(counts):
+            # сумма листа может не влезть в int64
+            raise OverflowError("skill values out of int64 range")
+        totals, unmapped = layout.flat_totals(owners, rows, vals, count)
+        inv = totals[layout.kinds.index("investigative")]
+        gen = totals[layout.kinds.index("general")]
+        inv_max = np.fromiter((ch.points.investigativeMax for ch in sheets), dtype=np.int64, count=count)
+        gen_max = np.fromiter((ch.points.generalMax for ch in sheets), dtype=np.int64, count=count)
+        over = set(np.flatnonzero((inv > inv_max) | (gen > gen_max)).tolist())
+
+        # пары идут в порядке ключей каждого листа -> порядок issues тот же, что в validate_and_enrich
+        skill_issues: dict[int, list[ValidationIssue]] = {}
+        for pos in np.flatnonzero((rows < 0) | unmapped).tolist():
+            sid = sids[pos]
+            message = "Unknown skill" if rows[pos] < 0 else "Skill has unknown kind/group mapping"
+            skill_issues.setdefault(int(owners[pos]), []).append(
+                ValidationIssue(path=f"data.skills.{sid}", message=message, icon="error")
+            )
+        return skill_issues, inv.tolist(), gen.tolist(), over
+
+    def _parse(self, payload: Payload) -> tuple[CharacterData | None, list[ValidationIssue]]:
+        return parse_payload(_CHARACTER, payload)
+
+    def _skill_totals(self, skills: dict[str, int], issues: list[ValidationIssue]) -> dict[str, int]:
+        vec, wide = self._skill_vector(skills, issues)
+        totals = self.skills.layout.totals(vec)
+        for kind, val in wide.items():
+            totals[kind] += val
+        return totals
+
+    def _skill_vector(self, skills: dict[str, int], issues: list[ValidationIssue]) -> tuple[array, dict[str, int]]:
+        # навыки раскладываем в компактный вектор (порядок кодекса), бюджеты — суммы по маскам kind;
+        # значения больше MAX_VALUE в array('H') не помещаются -> их суммы по kind отдельно, как по dict
+        layout = self.skills.layout
+        skill_kind = self.skills.skill_kind
+        vec = layout.zeros()
+        wide: dict[str, int] = {}
 
         # unknown skills + подсчёт по категориям
-        for sid, val in ch.skills.items():
-            if sid not in allowed:
+        for sid, val in skills.items():
+            i = layout.index.get(sid)
+            if i is None:
                 issues.append(
                     ValidationIssue(
                         path=f"data.skills.{sid}",
@@ -78,12 +226,8 @@ class CharactersManager:
                 )
                 continue
 
-            kind = self.skills.skill_kind(sid)
-            if kind == "investigative":
-                inv_total += val
-            elif kind == "general" or kind == "both":
-                gen_total += val
-            else:
+            kind = skill_kind(sid)
+            if kind == "unknown":
                 issues.append(
                     ValidationIssue(
                         path=f"data.skills.{sid}",
@@ -91,10 +235,20 @@ class CharactersManager:
                         icon="error",
                     )
                 )
+                continue
+
+            if val > MAX_VALUE:
+                wide[kind] = wide.get(kind, 0) + val
+                continue
+
+            vec[i] = val
 
-        # бюджеты задаются мастером в data.points
-        inv_max = ch.points.investigativeMax
-        gen_max = ch.points.generalMax
+        return vec, wide
+
+    def _finish(self, data: dict[str, Any], issues: list[ValidationIssue], inv_total: int, gen_total: int) -> ValidateResult:
+        # data — dump CharacterData; бюджеты задаются мастером в data.points
+        inv_max = data["points"]["investigativeMax"]
+        gen_max = data["points"]["generalMax"]
 
         if inv_total > inv_max:
             issues.append(
@@ -117,8 +271,9 @@ class CharactersManager:
         if issues:
             return ValidateResult(ok=False, issues=issues, data=None)
 
-        # enrich
-        data = ch.model_dump() if hasattr(ch, "model_dump") else ch.dict()
+        return self._enriched(data, inv_total, gen_total)
+
+    def _enriched(self, data: dict[str, Any], inv_total: int, gen_total: int) -> ValidateResult:
         data["skill_points"] = {
             "investigativeTotal": inv_total,
             "generalTotal": gen_total,
@@ -1,23 +1,26 @@
 from __future__ import annotations
-from typing import Literal
+from types import MappingProxyType
+from typing import Literal, Mapping, get_args
 
 from pydantic import BaseModel, ConfigDict, PositiveInt
 from .types import *
+from .skill_vectors import SkillLayout
 
 
 class SkillsCodex:
     def __init__(self) -> None:
-        self.groups: list[SkillGroup] = [
+        # tuple + frozen-модели: кодекс разделяется всеми сессиями через общую фабрику
+        self.groups: tuple[SkillGroup, ...] = (
             SkillGroup(id="investigative_academic", title="Исследование: академическое", color="#22c55e", kind="investigative"),
             SkillGroup(id="investigative_interpersonal", title="Исследование: социальное", color="#14b8a6", kind="investigative"),
             SkillGroup(id="investigative_technical", title="Исследование: техническое", color="#a78bfa", kind="investigative"),
             SkillGroup(id="general_action", title="Общие: действие", color="#60a5fa", kind="general"),
             SkillGroup(id="general_combat", title="Общие: бой", color="#f97316", kind="general"),
             SkillGroup(id="general_survival", title="Общие: выживание", color="#f43f5e", kind="general"),
-        ]
+        )
 
         # Набор абилок составлен по списку GUMSHOE SRD (CC v3). [web:3]
-        self.skills: list[Skill] = [
+        self.skills: tuple[Skill, ...] = (
             # --- Исследовательские: академические ---
             Skill(id="anthropology", title="Антропология", group="investigative_academic"),
             Skill(id="archaeology", title="Археология", group="investigative_academic"),
@@ -111,7 +114,22 @@ class SkillsCodex:
             Skill(id="stability", title="Стабильность", group="general_survival"),
             Skill(id="preparedness", title="Подготовленность", group="general_survival"),
             Skill(id="sense_trouble", title="Чутьё на неприятности", group="general_survival"),
-        ]
+        )
+
+        # индексы строятся один раз: валидация и config() делают только O(1)-поиски
+        group_by_id = {g.id: g for g in self.groups}
+        self._skill_by_id: Mapping[str, Skill] = MappingProxyType({s.id: s for s in self.skills})
+        self._group_by_id: Mapping[str, SkillGroup] = MappingProxyType(group_by_id)
+        self._group_of: Mapping[str, SkillGroup] = MappingProxyType(
+            {s.id: group_by_id[s.group] for s in self.skills if s.group in group_by_id}
+        )
+        self._kind_of: Mapping[str, SkillKind] = MappingProxyType({sid: g.kind for sid, g in self._group_of.items()})
+        self._ids_by_kind: Mapping[SkillKind, tuple[str, ...]] = MappingProxyType({
+            kind: tuple(s.id for s in self.skills if self._kind_of.get(s.id) == kind)
+            for kind in get_args(SkillKind)
+        })
+        # фиксированный порядок навыков для компактных векторов (см. skill_vectors)
+        self.layout = SkillLayout(self)
 
     def as_config(self) -> dict:
         return {
@@ -119,27 +137,23 @@ class SkillsCodex:
             "skills": [s.model_dump() for s in self.skills],
         }
 
-    def allowed_map(self) -> dict[str, Skill]:
-        return {s.id: s for s in self.skills}
+    def allowed_map(self) -> Mapping[str, Skill]:
+        return self._skill_by_id
 
-    def group_map(self) -> dict[str, SkillGroup]:
-        return {g.id: g for g in self.groups}
+    def group_map(self) -> Mapping[str, SkillGroup]:
+        return self._group_by_id
 
     def get_group(self, skill_id: str) -> Optional[SkillGroup]:
-        skill = self.allowed_map().get(skill_id)
-        if not skill:
-            return None
-        return self.group_map().get(skill.group)
+        return self._group_of.get(skill_id)
+
+    def kind_map(self) -> Mapping[str, SkillKind]:
+        return self._kind_of
 
     def skill_kind(self, skill_id: str) -> SkillKind:
-        g = self.get_group(skill_id)
-        return g.kind if g else "unknown"
+        return self._kind_of.get(skill_id, "unknown")
 
     def skills_by_kind(self, kind: SkillKind) -> list[Skill]:
-        if kind == "unknown":
-            return []
-        return [s for s in self.skills if self.skill_kind(s.id) == kind]
-
-    def skill_ids_by_kind(self, kind: SkillKind) -> list[str]:
-        return [s.id for s in self.skills_by_kind(kind)]
+        return [self._skill_by_id[sid] for sid in self._ids_by_kind.get(kind, ())]
 
+    def skill_ids_by_kind(self, kind: SkillKind) -> tuple[str, ...]:
+        return self._ids_by_kind.get(kind, ())
@@ -1,13 +1,28 @@
 from __future__ import annotations
 from typing import Any
-from pydantic import ValidationError
-from .types import ItemData, ValidateResult, ValidationIssue
+from .types import ItemData, Payload, ValidateResult, ValidationIssue, parse_payload
+from .types.base import make_adapter
+from ....config_cache import CachedConfig, ConfigBlob
+
+_ITEM = make_adapter(ItemData)
 
 
 class ItemsManager:
     kind = "item"
+    # ключи context, влияющие на результат validate (для кэша результатов)
+    context_keys: tuple[str, ...] = ()
+
+    def __init__(self) -> None:
+        self._config = CachedConfig(self._build_config)
 
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]:
+        # не зависит от context -> собирается один раз (см. CachedConfig), отдаётся копия
+        return self._config.get().copy()
+
+    def config_blob(self) -> ConfigBlob:
+        return self._config.get()
+
+    def _build_config(self) -> dict[str, Any]:
         return {
             "tags": ["weapon", "armor", "consumable", "misc"],
             "initialData": {
@@ -21,15 +36,13 @@ class ItemsManager:
             },
         }
 
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult:
-        issues: list[ValidationIssue] = []
-
-        try:
-            item = ItemData.model_validate(payload) if hasattr(ItemData, "model_validate") else ItemData.parse_obj(payload)
-        except ValidationError as e:
-            for err in e.errors():
-                loc = ".".join(str(x) for x in err.get("loc", []))
-                issues.append(ValidationIssue(path=f"data.{loc}" if loc else "data", message=err.get("msg", "Invalid"), icon="error"))
+    def validate_and_enrich(
+        self,
+        payload: Payload,
+        context: dict[str, Any] | None = None,
+    ) -> ValidateResult:
+        item, issues = parse_payload(_ITEM, payload)
+        if item is None:
             return ValidateResult(ok=False, issues=issues, data=None)
 
         # semantic checks
@@ -49,7 +62,7 @@ class ItemsManager:
         if issues:
             return ValidateResult(ok=False, issues=issues, data=None)
 
-        data = item.model_dump() if hasattr(item, "model_dump") else item.dict()
+        data = item.model_dump()
 
         # normalize tags: strip + unique
         tags = []
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import heapq
+import threading
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+from .types import LocationData, ValidationIssue
+
+# (откуда, куда, тип связи) — ребро графа; у одной пары может быть несколько рёбер разных типов
+EdgeKey = tuple[str, str, str]
+# фильтр типов связей для запроса; None — любые
+TypesKey = Optional[frozenset[str]]
+
+
+class LocationGraph:
+    """
+    Индекс смежности локаций одного сценария.
+
+    Каждая локация объявляет свои связи; двусторонняя связь даёт ещё и обратное ребро.
+    Если одно ребро объявили несколько локаций, действует минимальная цена. Рёбра к
+    локациям, которых (ещё) нет в сценарии, хранятся, но не участвуют в обходе.
+
+    Кэши запросов по (старт, фильтр типов): множество достижимых локаций и дерево
+    кратчайших путей (Дейкстра). При правке локации пересчитываются только изменившиеся
+    рёбра. Удешевление или появление ребра дорабатывает кэш с конца этого ребра.
+    Удорожание или удаление сбрасывает только те записи, что на это ребро опирались.
+    """
+
+    def __init__(self) -> None:
+        self.locations: dict[str, LocationData] = {}
+        # src -> {(dst, type): [цены от объявивших локаций]}
+        self._out: dict[str, dict[tuple[str, str], list[int]]] = {}
+        # dst -> {(src, type)} — чтобы найти входящие рёбра при появлении/удалении локации
+        self._in: dict[str, set[tuple[str, str]]] = {}
+        # id локации -> рёбра, которые она объявила (с ценой)
+        self._owned: dict[str, list[tuple[EdgeKey, int]]] = {}
+        self._reach: dict[tuple[str, TypesKey], set[str]] = {}
+        # дерево кратчайших путей: (dist, prev), prev[узел] = (родитель, тип связи)
+        self._trees: dict[tuple[str, TypesKey], tuple[dict[str, int], dict[str, tuple[str, str]]]] = {}
+        self._lock = threading.RLock()
+
+    # ---- правка ----
+
+    def upsert(self, location_id: str, data: LocationData) -> None:
+        edges: list[tuple[EdgeKey, int]] = []
+        for c in data.connections:
+            if c.to == location_id:
+                continue
+            edges.append(((location_id, c.to, c.type), c.cost))
+            if c.bidirectional:
+                edges.append(((c.to, location_id, c.type), c.cost))
+        with self._lock:
+            present = location_id in self.locations
+            self._update(location_id, edges, present=True)
+            self.locations[location_id] = data
+            if not present:
+                # до появления локации её рёбра не действовали -> для кэшей все они новые
+                self._apply({k: (None, self._effective(k)) for k in self._incident(location_id)})
+
+    def remove(self, location_id: str) -> bool:
+        with self._lock:
+            if location_id not in self.locations:
+                return False
+            self._update(location_id, [], present=False)
+            self._owned.pop(location_id, None)
+            for cache in (self._reach, self._trees):
+                for ck in [ck for ck in cache if ck[0] == location_id]:
+                    del cache[ck]
+            return True
+
+    def _effective(self, key: EdgeKey) -> Optional[int]:
+        src, dst, kind = key
+        if src not in self.locations or dst not in self.locations:
+            return None
+        costs = self._out.get(src, {}).get((dst, kind))
+        return min(costs) if costs else None
+
+    def _incident(self, location_id: str) -> set[EdgeKey]:
+        keys = {(location_id, dst, kind) for dst, kind in self._out.get(location_id, ())}
+        keys.update((src, location_id, kind) for src, kind in self._in.get(location_id, ()))
+        return keys
+
+    def _update(self, location_id: str, edges: list[tuple[EdgeKey, int]], *, present: bool) -> None:
+        old = self._owned.get(location_id, [])
+        touched = {k for k, _ in old} | {k for k, _ in edges}
+        if not present:
+            # локация исчезает: все её входящие/исходящие рёбра выпадают из обхода
+            touched |= self._incident(location_id)
+        before = {k: self._effective(k) for k in touched}
+
+        for (src, dst, kind), cost in old:
+            costs = self._out[src][(dst, kind)]
+            costs.remove(cost)
+            if not costs:
+                del self._out[src][(dst, kind)]
+                self._in[dst].discard((src, kind))
+        for (src, dst, kind), cost in edges:
+            self._out.setdefault(src, {}).setdefault((dst, kind), []).append(cost)
+            self._in.setdefault(dst, set()).add((src, kind))
+        self._owned[location_id] = edges
+
+        if not present:
+            self.locations.pop(location_id, None)
+        self._apply({k: (before[k], self._effective(k)) for k in touched})
+
+    def _apply(self, changes: dict[EdgeKey, tuple[Optional[int], Optional[int]]]) -> None:
+        worse = [k for k, (b, a) in changes.items() if b is not None and (a is None or a > b)]
+        better = [(k, a) for k, (b, a) in changes.items() if a is not None and (b is None or a < b)]
+        for key in worse:
+            self._forget(key)
+        for key, cost in better:
+            self._extend(key, cost)
+
+    @staticmethod
+    def _matches(types: TypesKey, kind: str) -> bool:
+        return types is None or kind in types
+
+    def _forget(self, key: EdgeKey) -> None:
+        src, dst, kind = key
+        gone = self._effective(key) is None
+        for ck in [ck for ck, reach in self._reach.items() if gone and self._matches(ck[1], kind) and src in reach]:
+            del self._reach[ck]
+        for ck in [ck for ck, (_, prev) in self._trees.items() if prev.get(dst) == (src, kind)]:
+            del self._trees[ck]
+
+    def _extend(self, key: EdgeKey, cost: int) -> None:
+        src, dst, kind = key
+        for (start, types), reach in self._reach.items():
+            if self._matches(types, kind) and src in reach and dst not in reach:
+                reach.update(self._bfs(dst, types, reach))
+        for (start, types), (dist, prev) in self._trees.items():
+            if self._matches(types, kind) and src in dist:
+                self._relax(dist, prev, types, [(dist[src] + cost, dst, src, kind)])
+
+    # ---- обход ----
+
+    def _neighbors(self, src: str, types: TypesKey) -> Iterator[tuple[str, str, int]]:
+        locations = self.locations
+        for (dst, kind), costs in self._out.get(src, {}).items():
+            if dst in locations and (types is None or kind in types):
+                yield dst, kind, min(costs)
+
+    def _bfs(self, start: str, types: TypesKey, seen: Iterable[str] = ()) -> set[str]:
+        found = {start}
+        known = set(seen)
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for dst, _, _ in self._neighbors(node, types):
+                if dst not in found and dst not in known:
+                    found.add(dst)
+                    queue.append(dst)
+        return found
+
+    def _relax(
+        self,
+        dist: dict[str, int],
+        prev: dict[str, tuple[str, str]],
+        types: TypesKey,
+        heap: list[tuple[int, str, str, str]],
+    ) -> None:
+        heapq.heapify(heap)
+        while heap:
+            d, node, parent, kind = heapq.heappop(heap)
+            if d >= dist.get(node, d + 1):
+                continue
+            dist[node] = d
+            prev[node] = (parent, kind)
+            for dst, k, cost in self._neighbors(node, types):
+                if d + cost < dist.get(dst, d + cost + 1):
+                    heapq.heappush(heap, (d + cost, dst, node, k))
+
+    # ---- запросы ----
+
+    def reachable(self, start: str, types: Optional[Iterable[str]] = None) -> frozenset[str]:
+        """Локации, куда можно попасть из start (включая её саму) по связям типов types."""
+        tk = frozenset(types) if types is not None else None
+        with self._lock:
+            if start not in self.locations:
+                return frozenset()
+            reach = self._reach.get((start, tk))
+            if reach is None:
+                reach = self._reach[(start, tk)] = self._bfs(start, tk)
+            return frozenset(reach)
+
+    def route(self, start: str, goal: str, types: Optional[Iterable[str]] = None) -> Optional[tuple[int, list[tuple[str, str]]]]:
+        """
+        Кратчайший маршрут: (цена, [(локация, тип связи, которой в неё пришли), ...]) от start до goal;
+        у start тип связи — "". None — goal недостижима.
+        """
+        tk = frozenset(types) if types is not None else None
+        with self._lock:
+            if start not in self.locations or goal not in self.locations:
+                return None
+            tree = self._trees.get((start, tk))
+            if tree is None:
+                dist: dict[str, int] = {}
+                prev: dict[str, tuple[str, str]] = {}
+                self._relax(dist, prev, tk, [(0, start, "", "")])
+                tree = self._trees[(start, tk)] = (dist, prev)
+            dist, prev = tree
+            if goal not in dist:
+                return None
+            steps: list[tuple[str, str]] = []
+            node = goal
+            while node != start:
+                parent, kind = prev[node]
+                steps.append((node, kind))
+                node = parent
+            steps.append((start, ""))
+            steps.reverse()
+            return dist[goal], steps
+
+    def issues(self) -> list[ValidationIssue]:
+        """Связи на локации, которых нет в сценарии (после импорта всех локаций)."""
+        out: list[ValidationIssue] = []
+        with self._lock:
+            for lid, data in self.locations.items():
+                for i, c in enumerate(data.connections):
+                    if c.to not in self.locations:
+                        out.append(ValidationIssue(path=f"{lid}.connections.{i}.to", message=f"Unknown location: {c.to}", icon="error"))
+        return out
+
+    def cache_size(self) -> int:
+        with self._lock:
+            return len(self._reach) + len(self._trees)
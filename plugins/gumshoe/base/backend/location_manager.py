@@ -1,17 +1,146 @@
 from __future__ import annotations
-from typing import Any
-from pydantic import ValidationError
+import threading
+from collections import OrderedDict
+from typing import Any, get_args
+
+from .types import ConnectionType, LocationData, Payload, ValidateResult, ValidationIssue, parse_payload
+from .types.base import make_adapter
+from .location_graph import LocationGraph
+from ....config_cache import CachedConfig, ConfigBlob
+
+_LOCATION = make_adapter(LocationData)
+
+# сколько сценариев держим графы локаций (LRU); выпавший граф бэк пересобирает через upsert
+MAX_GRAPHS = 64
 
-from .types import CharacterData, ValidateResult, ValidationIssue
 
 class LocationManager:
     kind = "location"
+    # ключи context, влияющие на результат validate (для кэша результатов)
+    context_keys: tuple[str, ...] = ("locationId", "locationIds")
 
     def __init__(self) -> None:
-        pass
+        self._config = CachedConfig(self._build_config)
+        self._graphs: OrderedDict[str, LocationGraph] = OrderedDict()
+        self._graphs_lock = threading.Lock()
 
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]:
-        return {}
+        # не зависит от context -> собирается один раз (см. CachedConfig), отдаётся копия
+        return self._config.get().copy()
+
+    def config_blob(self) -> ConfigBlob:
+        return self._config.get()
+
+    def _build_config(self) -> dict[str, Any]:
+        return {
+            "connectionTypes": list(get_args(ConnectionType)),
+            "initialData": {
+                "name": "",
+                "description": "",
+                "connections": [],
+            },
+        }
+
+    def validate_and_enrich(
+        self,
+        payload: Payload,
+        context: dict[str, Any] | None = None,
+    ) -> ValidateResult:
+        """
+        context["locationId"] — id самой локации (запрет связи на себя),
+        context["locationIds"] — id локаций сценария (связи только на существующие).
+        """
+        loc, issues = parse_payload(_LOCATION, payload)
+        if loc is None:
+            return ValidateResult(ok=False, issues=issues, data=None)
+
+        self._check(loc, issues, context or {})
+        if issues:
+            return ValidateResult(ok=False, issues=issues, data=None)
+        return ValidateResult(ok=True, issues=[], data=loc.model_dump())
+
+    def _check(self, loc: LocationData, issues: list[ValidationIssue], ctx: dict[str, Any]) -> None:
+        own_id = ctx.get("locationId")
+        known = ctx.get("locationIds")
+        known = set(known) if isinstance(known, (list, tuple, set, frozenset)) else None
+
+        seen: set[tuple[str, str]] = set()
+        for i, c in enumerate(loc.connections):
+            path = f"data.connections.{i}.to"
+            if not c.to:
+                issues.append(ValidationIssue(path=path, message="Connection target is required", icon="error"))
+            elif own_id is not None and c.to == own_id:
+                issues.append(ValidationIssue(path=path, message="Location cannot connect to itself", icon="error"))
+            elif known is not None and c.to not in known:
+                issues.append(ValidationIssue(path=path, message=f"Unknown location: {c.to}", icon="error"))
+            elif (c.to, c.type) in seen:
+                issues.append(ValidationIssue(path=path, message=f"Duplicate {c.type} connection to {c.to}", icon="error"))
+            seen.add((c.to, c.type))
+
+    # ---- граф локаций сценария ----
+
+    def graph(self, scenario_id: str) -> LocationGraph:
+        with self._graphs_lock:
+            graph = self._graphs.get(scenario_id)
+            if graph is None:
+                graph = self._graphs[scenario_id] = LocationGraph()
+                while len(self._graphs) > MAX_GRAPHS:
+                    self._graphs.popitem(last=False)
+            else:
+                self._graphs.move_to_end(scenario_id)
+            return graph
+
+    def drop_graph(self, scenario_id: str) -> None:
+        with self._graphs_lock:
+            self._graphs.pop(scenario_id, None)
+
+    def upsert(self, scenario_id: str, location_id: str, payload: Payload) -> ValidateResult:
+        """
+        Валидирует локацию и кладёт её в граф сценария (добавление или правка).
+        Связи на ещё не добавленные локации допустимы (импорт в любом порядке) — это warning.
+        """
+        if not location_id:
+            return ValidateResult(ok=False, issues=[ValidationIssue(path="id", message="Location id is required", icon="error")], data=None)
+        loc, issues = parse_payload(_LOCATION, payload)
+        if loc is not None:
+            self._check(loc, issues, {"locationId": location_id})
+        if loc is None or issues:
+            return ValidateResult(ok=False, issues=issues, data=None)
+        graph = self.graph(scenario_id)
+        graph.upsert(location_id, loc)
+        warnings = [
+            ValidationIssue(path=f"data.connections.{i}.to", message=f"Unknown location: {c.to}", icon="warn", level="warning")
+            for i, c in enumerate(loc.connections)
+            if c.to not in graph.locations
+        ]
+        return ValidateResult(ok=True, issues=warnings, data=loc.model_dump())
+
+    def graph_op(self, payload: Any) -> dict[str, Any]:
+        """
+        Запросы к графу сценария: {"scenarioId", "op", ...}
+          upsert    {"id", "data"}         -> результат validate
+          remove    {"id"}                 -> {"ok", "removed"}
+          reachable {"from", "types"?}     -> {"ok", "locations": [...]}
+          route     {"from", "to", "types"?} -> {"ok", "route": {"cost", "steps": [{"id", "via"}]} | None}
+          issues    {}                     -> {"ok", "issues": висячие связи}
+        """
+        p = payload if isinstance(payload, dict) else {}
+        scenario_id, op = p.get("scenarioId"), p.get("op")
+        if not isinstance(scenario_id, str) or not scenario_id:
+            return {"ok": False, "issues": [{"path": "scenarioId", "message": "scenarioId is required", "icon": "error", "level": "error"}]}
+        types = p.get("types") if isinstance(p.get("types"), list) else None
 
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult:
-        return ValidateResult(ok=True, issues=[], data=payload)
+        if op == "upsert":
+            return self.upsert(scenario_id, str(p.get("id") or ""), p.get("data") or {}).model_dump()
+        if op == "remove":
+            return {"ok": True, "removed": self.graph(scenario_id).remove(str(p.get("id") or ""))}
+        if op == "reachable":
+            return {"ok": True, "locations": sorted(self.graph(scenario_id).reachable(str(p.get("from") or ""), types))}
+        if op == "route":
+            found = self.graph(scenario_id).route(str(p.get("from") or ""), str(p.get("to") or ""), types)
+            route = None if found is None else {"cost": found[0], "steps": [{"id": lid, "via": via} for lid, via in found[1]]}
+            return {"ok": True, "route": route}
+        if op == "issues":
+            issues = self.graph(scenario_id).issues()
+            return {"ok": not issues, "issues": [i.model_dump() for i in issues]}
+        return {"ok": False, "issues": [{"path": "op", "message": f"Unknown graph op: {op!r}", "icon": "error", "level": "error"}]}
@@ -1,20 +1,35 @@
 from __future__ import annotations
 from typing import Any
-from pydantic import ValidationError
 
-from .types import NpcData, ValidateResult, ValidationIssue
+from .types import NpcData, Payload, ValidateResult, ValidationIssue, parse_payload
+from .types.base import make_adapter
 from .codex_skills import SkillsCodex
+from ....config_cache import CachedConfig, ConfigBlob
+
+_NPC = make_adapter(NpcData)
 
 class NpcsManager:
     kind = "npc"
+    # ключи context, влияющие на результат validate (для кэша результатов)
+    context_keys: tuple[str, ...] = ()
+    # handle_batch зовёт validate_roster с этого размера: меньше — цикл validate_and_enrich быстрее
+    roster_min = 256
 
     def __init__(self, skills: SkillsCodex) -> None:
         self.skills = skills
+        self._config = CachedConfig(self._build_config)
 
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]:
+        # не зависит от context -> собирается один раз (см. CachedConfig), отдаётся копия
+        return self._config.get().copy()
+
+    def config_blob(self) -> ConfigBlob:
+        return self._config.get()
+
+    def _build_config(self) -> dict[str, Any]:
         base = self.skills.as_config()
 
-        general_ids = [s.id for s in self.skills.skills_by_kind("general")]
+        general_ids = self.skills.skill_ids_by_kind("general")
         return {
             **base,
             "initialData": {
@@ -29,30 +44,78 @@ class NpcsManager:
             },
         }
 
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult:
-        issues: list[ValidationIssue] = []
-
-        try:
-            npc = NpcData.model_validate(payload) if hasattr(NpcData, "model_validate") else NpcData.parse_obj(payload)
-        except ValidationError as e:
-            for err in e.errors():
-                loc = ".".join(str(x) for x in err.get("loc", []))
-                issues.append(ValidationIssue(path=f"data.{loc}" if loc else "data", message=err.get("msg", "Invalid"), icon="error"))
+    def validate_and_enrich(
+        self,
+        payload: Payload,
+        context: dict[str, Any] | None = None,
+    ) -> ValidateResult:
+        npc, issues = self._parse(payload)
+        if npc is None:
             return ValidateResult(ok=False, issues=issues, data=None)
 
+        # индексы кодекса готовы заранее -> O(1) на навык
         allowed = self.skills.allowed_map()
+        skill_kind = self.skills.skill_kind
 
         for sid, val in (npc.skills or {}).items():
             if sid not in allowed:
                 issues.append(ValidationIssue(path=f"data.skills.{sid}", message="Unknown skill", icon="error"))
                 continue
-            kind = self.skills.skill_kind(sid)
+            kind = skill_kind(sid)
             if kind != "general":
                 issues.append(ValidationIssue(path=f"data.skills.{sid}", message="NPC skills must be general abilities only", icon="error"))
                 continue
 
+        return self._finish(npc, issues)
+
+    def validate_roster(
+        self,
+        payloads: list[Payload],
+        context: dict[str, Any] | None = None,
+    ) -> list[ValidateResult]:
+        """
+        Валидация пачки NPC (импорт ростера) за один проход: индексы навыков всех листов
+        собираются в один массив и проверяются против маски general разом.
+        Результат i совпадает с validate_and_enrich(payloads[i]).
+        """
+        layout = self.skills.layout
+        results: list[ValidateResult | None] = [None] * len(payloads)
+        parsed: list[tuple[int, NpcData, list[tuple[int, ValidationIssue]]]] = []
+        # (лист, позиция ключа, id навыка) для каждой известной пары; rows — индексы навыков в layout
+        hits: list[tuple[int, int, str]] = []
+        rows: list[int] = []
+        for n, payload in enumerate(payloads):
+            npc, parse_issues = self._parse(payload)
+            if npc is None:
+                results[n] = ValidateResult(ok=False, issues=parse_issues, data=None)
+                continue
+            j = len(parsed)
+            keyed: list[tuple[int, ValidationIssue]] = []
+            for pos, sid in enumerate(npc.skills or {}):
+                i = layout.index.get(sid)
+                if i is None:
+                    keyed.append((pos, ValidationIssue(path=f"data.skills.{sid}", message="Unknown skill", icon="error")))
+                    continue
+                hits.append((j, pos, sid))
+                rows.append(i)
+            parsed.append((n, npc, keyed))
+
+        for h in layout.outside_kind(rows, "general"):
+            j, pos, sid = hits[h]
+            parsed[j][2].append((pos, ValidationIssue(path=f"data.skills.{sid}", message="NPC skills must be general abilities only", icon="error")))
+
+        for n, npc, keyed in parsed:
+            # тот же порядок issues, что и в validate_and_enrich (по ключам навыков)
+            keyed.sort(key=lambda pi: pi[0])
+            results[n] = self._finish(npc, [issue for _, issue in keyed])
+        return results  # type: ignore[return-value]
+
+    def _parse(self, payload: Payload) -> tuple[NpcData | None, list[ValidationIssue]]:
+        return parse_payload(_NPC, payload)
+
+    def _finish(self, npc: NpcData, issues: list[ValidationIssue]) -> ValidateResult:
         if issues:
             return ValidateResult(ok=False, issues=issues, data=None)
 
-        data = npc.model_dump() if hasattr(npc, "model_dump") else npc.dict()
+        data = npc.model_dump()
         return ValidateResult(ok=True, issues=[], data=data)
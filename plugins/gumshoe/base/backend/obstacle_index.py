@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Iterable, Mapping, Optional
+
+from .types import ObstacleChallenge, ObstacleClue, ObstacleData
+
+# Одна запись инвертированного индекса: (порог, id препятствия). Списки по навыку отсортированы,
+# поэтому "всё, что доступно при рейтинге r" — это префикс до bisect(r), без обхода сценария.
+Entry = tuple[int, str]
+
+
+def _insert(index: dict[str, list[Entry]], skill: str, entry: Entry) -> None:
+    bisect.insort(index.setdefault(skill, []), entry)
+
+
+def _delete(index: dict[str, list[Entry]], skill: str, entry: Entry) -> None:
+    entries = index.get(skill)
+    if not entries:
+        return
+    i = bisect.bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
+        if not entries:
+            del index[skill]
+
+
+def _upto(entries: list[Entry], limit: int) -> list[Entry]:
+    # все записи с порогом <= limit (id сравниваются после порога, поэтому верхняя граница — (limit, "\uffff"))
+    return entries[:bisect.bisect_right(entries, (limit, "\uffff"))]
+
+
+def party_ratings(sheets: Iterable[Mapping[str, int]]) -> dict[str, int]:
+    """Лучший рейтинг партии по каждому навыку (из skills листов персонажей)."""
+    best: dict[str, int] = {}
+    for skills in sheets:
+        for sid, value in skills.items():
+            if type(value) is int and value > best.get(sid, 0):
+                best[sid] = value
+    return best
+
+
+class ObstacleIndex:
+    """
+    Инвертированный индекс препятствий одного сценария:
+      investigative-навык -> улики (порог — spend_cost, ниже 1 не бывает: нужен хотя бы рейтинг 1),
+      general-навык       -> испытания (порог — difficulty).
+    Улики без investigative_skills открыты всем. Правка препятствия обновляет только его записи.
+    Запросы по рейтингам партии стоят O(навыки партии * log n + размер ответа).
+    """
+
+    def __init__(self) -> None:
+        self.obstacles: dict[str, ObstacleData] = {}
+        self._clues: dict[str, list[Entry]] = {}
+        self._challenges: dict[str, list[Entry]] = {}
+        self._open_clues: set[str] = set()
+        self._all_clues: set[str] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entries(obstacle_id: str, ob: ObstacleData) -> tuple[list[tuple[str, Entry]], list[tuple[str, Entry]]]:
+        if isinstance(ob, ObstacleClue):
+            threshold = max(1, ob.spend_cost)
+            return [(sid, (threshold, obstacle_id)) for sid in dict.fromkeys(ob.investigative_skills)], []
+        if isinstance(ob, ObstacleChallenge) and ob.general_skill:
+            return [], [(ob.general_skill, (ob.difficulty, obstacle_id))]
+        return [], []
+
+    def _unlink(self, obstacle_id: str) -> None:
+        ob = self.obstacles.pop(obstacle_id, None)
+        if ob is None:
+            return
+        clues, challenges = self._entries(obstacle_id, ob)
+        for sid, entry in clues:
+            _delete(self._clues, sid, entry)
+        for sid, entry in challenges:
+            _delete(self._challenges, sid, entry)
+        self._open_clues.discard(obstacle_id)
+        self._all_clues.discard(obstacle_id)
+
+    def upsert(self, obstacle_id: str, ob: ObstacleData) -> None:
+        with self._lock:
+            self._unlink(obstacle_id)
+            self.obstacles[obstacle_id] = ob
+            clues, challenges = self._entries(obstacle_id, ob)
+            for sid, entry in clues:
+                _insert(self._clues, sid, entry)
+            for sid, entry in challenges:
+                _insert(self._challenges, sid, entry)
+            if isinstance(ob, ObstacleClue):
+                self._all_clues.add(obstacle_id)
+                if not ob.investigative_skills:
+                    self._open_clues.add(obstacle_id)
+
+    def remove(self, obstacle_id: str) -> bool:
+        with self._lock:
+            present = obstacle_id in self.obstacles
+            self._unlink(obstacle_id)
+            return present
+
+    # ---- запросы ----
+
+    def clues_for_skill(self, skill_id: str) -> list[str]:
+        with self._lock:
+            return [oid for _, oid in self._clues.get(skill_id, ())]
+
+    def challenges_for_skill(self, skill_id: str) -> list[str]:
+        with self._lock:
+            return [oid for _, oid in self._challenges.get(skill_id, ())]
+
+    def findable_clues(self, ratings: Mapping[str, int]) -> set[str]:
+        """Улики, которые партия может получить: есть нужный навык с рейтингом >= max(1, spend_cost)."""
+        with self._lock:
+            found = set(self._open_clues)
+            clues = self._clues
+            for sid, rating in ratings.items():
+                entries = clues.get(sid)
+                if entries and rating > 0:
+                    found.update(oid for _, oid in _upto(entries, rating))
+            return found
+
+    def orphaned_clues(self, ratings: Optional[Mapping[str, int]] = None) -> set[str]:
+        """Улики, недоступные партии (дополнение findable_clues — линейно по числу улик); без ratings — все, требующие навыка."""
+        found = self.findable_clues(ratings or {})
+        with self._lock:
+            return self._all_clues - found
+
+    def challenges(self, ratings: Mapping[str, int], margin: int = 1) -> set[str]:
+        """
+        Испытания с difficulty <= рейтинг + margin по лучшему навыку партии:
+        margin=1 — успех гарантирован, если потратить весь пул; margin=6 — вообще возможен.
+        """
+        with self._lock:
+            out: set[str] = set()
+            for sid, entries in self._challenges.items():
+                rating = ratings.get(sid, 0)
+                out.update(oid for _, oid in _upto(entries, rating + margin))
+            return out
@@ -1,22 +1,41 @@
 # obstacles_manager.py
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from typing import Any
 
-from pydantic import ValidationError
-
-from .types import ObstacleData, ValidateResult, ValidationIssue
+from .types import ObstacleData, Payload, ValidateResult, ValidationIssue, parse_payload
+from .types.base import make_adapter
 from .codex_skills import SkillsCodex
+from .obstacle_index import ObstacleIndex, party_ratings
+from ....config_cache import CachedConfig, ConfigBlob
+
+_OBSTACLE = make_adapter(ObstacleData)
+
+# сколько сценариев держим индексы препятствий (LRU); выпавший индекс бэк пересобирает через upsert
+MAX_INDEXES = 64
 
 
 class ObstaclesManager:
     kind = "obstacle"
+    # ключи context, влияющие на результат validate (для кэша результатов)
+    context_keys: tuple[str, ...] = ()
 
     def __init__(self, skills: SkillsCodex) -> None:
         self.skills = skills
+        self._config = CachedConfig(self._build_config)
+        self._indexes: OrderedDict[str, ObstacleIndex] = OrderedDict()
+        self._indexes_lock = threading.Lock()
 
     def config(self, context: dict[str, Any] | None = None) -> dict[str, Any]:
-        print("!!!!!!")
+        # не зависит от context -> собирается один раз (см. CachedConfig), отдаётся копия
+        return self._config.get().copy()
+
+    def config_blob(self) -> ConfigBlob:
+        return self._config.get()
+
+    def _build_config(self) -> dict[str, Any]:
         base = self.skills.as_config()
         return {
             **base,
@@ -30,18 +49,26 @@ class ObstaclesManager:
             },
         }
 
-    def validate_and_enrich(self, payload: dict[str, Any], context: dict[str, Any] | None = None) -> ValidateResult:
-        issues: list[ValidationIssue] = []
+    def validate_and_enrich(
+        self,
+        payload: Payload,
+        context: dict[str, Any] | None = None,
+    ) -> ValidateResult:
+        ob, issues = parse_payload(_OBSTACLE, payload)
+        if ob is None:
+            return ValidateResult(ok=False, issues=issues, data=None)
 
-        try:
-            ob = ObstacleData.model_validate(payload) if hasattr(ObstacleData, "model_validate") else ObstacleData.parse_obj(payload)  # type: ignore[attr-defined]
-        except ValidationError as e:
-            for err in e.errors():
-                loc = ".".join(str(x) for x in err.get("loc", []))
-                issues.append(ValidationIssue(path=f"data.{loc}" if loc else "data", message=err.get("msg", "Invalid"), icon="error"))
+        self._check(ob, issues)
+        if issues:
             return ValidateResult(ok=False, issues=issues, data=None)
 
+        data = ob.model_dump()
+        return ValidateResult(ok=True, issues=[], data=data)
+
+    def _check(self, ob: ObstacleData, issues: list[ValidationIssue]) -> None:
+        # индексы кодекса готовы заранее -> O(1) на навык
         allowed = self.skills.allowed_map()
+        skill_kind = self.skills.skill_kind
 
         if ob.type == "clue":
             # investigative_skills может быть пустым, если “всем/любой подходящей” — решай сам.
@@ -49,7 +76,7 @@ class ObstaclesManager:
                 if sid not in allowed:
                     issues.append(ValidationIssue(path=f"data.investigative_skills", message=f"Unknown skill: {sid}", icon="error"))
                     continue
-                if self.skills.skill_kind(sid) != "investigative" or self.skills.skill_kind(sid) != "both":
+                if skill_kind(sid) not in ("investigative", "both"):
                     issues.append(ValidationIssue(path=f"data.investigative_skills", message=f"Not an investigative skill: {sid}", icon="error"))
 
         elif ob.type == "challenge":
@@ -58,7 +85,7 @@ class ObstaclesManager:
                 issues.append(ValidationIssue(path="data.general_skill", message="general_skill is required", icon="error"))
             elif sid not in allowed:
                 issues.append(ValidationIssue(path="data.general_skill", message="Unknown skill", icon="error"))
-            elif self.skills.skill_kind(sid) != "general":
+            elif skill_kind(sid) != "general":
                 issues.append(ValidationIssue(path="data.general_skill", message="general_skill must be a general ability", icon="error"))
 
             if ob.difficulty < 2:
@@ -67,8 +94,71 @@ class ObstaclesManager:
         else:
             issues.append(ValidationIssue(path="data.type", message="Unknown obstacle type", icon="error"))
 
-        if issues:
+    # ---- индекс препятствий сценария ----
+
+    def index(self, scenario_id: str) -> ObstacleIndex:
+        with self._indexes_lock:
+            index = self._indexes.get(scenario_id)
+            if index is None:
+                index = self._indexes[scenario_id] = ObstacleIndex()
+                while len(self._indexes) > MAX_INDEXES:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(scenario_id)
+            return index
+
+    def drop_index(self, scenario_id: str) -> None:
+        with self._indexes_lock:
+            self._indexes.pop(scenario_id, None)
+
+    def upsert(self, scenario_id: str, obstacle_id: str, payload: Payload) -> ValidateResult:
+        """Валидирует препятствие и кладёт его в индекс сценария; невалидное из индекса убирается."""
+        if not obstacle_id:
+            return ValidateResult(ok=False, issues=[ValidationIssue(path="id", message="Obstacle id is required", icon="error")], data=None)
+        ob, issues = parse_payload(_OBSTACLE, payload)
+        if ob is not None:
+            self._check(ob, issues)
+        index = self.index(scenario_id)
+        if ob is None or issues:
+            index.remove(obstacle_id)
             return ValidateResult(ok=False, issues=issues, data=None)
-
-        data = ob.model_dump() if hasattr(ob, "model_dump") else ob.dict()
-        return ValidateResult(ok=True, issues=[], data=data)
+        index.upsert(obstacle_id, ob)
+        return ValidateResult(ok=True, issues=[], data=ob.model_dump())
+
+    def index_op(self, payload: Any) -> dict[str, Any]:
+        """
+        Запросы к индексу сценария: {"scenarioId", "op", ...}; рейтинги партии —
+        "ratings" {навык: рейтинг} или "party" [skills листов] (берётся лучший по навыку).
+          upsert     {"id", "data"}                -> результат validate
+          remove     {"id"}                        -> {"ok", "removed"}
+          findable   {ratings|party}               -> {"ok", "clues": [...]}
+          orphaned   {ratings|party}               -> {"ok", "clues": [...]}
+          challenges {ratings|party, "margin"?}    -> {"ok", "challenges": [...]}
+          skill      {"skill"}                     -> {"ok", "clues": [...], "challenges": [...]}
+        """
+        p = payload if isinstance(payload, dict) else {}
+        scenario_id, op = p.get("scenarioId"), p.get("op")
+        if not isinstance(scenario_id, str) or not scenario_id:
+            return {"ok": False, "issues": [{"path": "scenarioId", "message": "scenarioId is required", "icon": "error", "level": "error"}]}
+        if isinstance(p.get("ratings"), dict):
+            # рейтинги от клиента: только настоящие int (не bool, не строки), как в party_ratings
+            ratings = {sid: v for sid, v in p["ratings"].items() if isinstance(sid, str) and type(v) is int}
+        else:
+            party = p.get("party") if isinstance(p.get("party"), list) else []
+            ratings = party_ratings(s for s in party if isinstance(s, dict))
+
+        if op == "upsert":
+            return self.upsert(scenario_id, str(p.get("id") or ""), p.get("data") or {}).model_dump()
+        if op == "remove":
+            return {"ok": True, "removed": self.index(scenario_id).remove(str(p.get("id") or ""))}
+        if op == "findable":
+            return {"ok": True, "clues": sorted(self.index(scenario_id).findable_clues(ratings))}
+        if op == "orphaned":
+            return {"ok": True, "clues": sorted(self.index(scenario_id).orphaned_clues(ratings))}
+        if op == "challenges":
+            margin = p.get("margin") if type(p.get("margin")) is int else 1
+            return {"ok": True, "challenges": sorted(self.index(scenario_id).challenges(ratings, margin))}
+        if op == "skill":
+            index, sid = self.index(scenario_id), str(p.get("skill") or "")
+            return {"ok": True, "clues": index.clues_for_skill(sid), "challenges": index.challenges_for_skill(sid)}
+        return {"ok": False, "issues": [{"path": "op", "message": f"Unknown index op: {op!r}", "icon": "error", "level": "error"}]}
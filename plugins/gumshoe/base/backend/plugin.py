@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Any
+import threading
+from typing import Any, Optional
 from .codex_skills import SkillsCodex
 from .items_manager import ItemsManager
 from .characters_manager import CharactersManager
@@ -7,45 +8,182 @@ from .npcs_manager import NpcsManager
 from .location_manager import LocationManager
 from .obstacles_manager import ObstaclesManager
 from .types import EntityKind
+from ....config_cache import ConfigBlob
+from ....json_patch import JsonPatchError, apply_patch
+from ....metrics import RouteMetrics, render_prometheus
+from ....validation_cache import ValidationCache, default_cache, render_prometheus as render_cache_prometheus
 
 class RulesFactory:
     system_id = "example"
 
-    def __init__(self) -> None:
+    def __init__(self, version: str = "") -> None:
+        self.version = version
         self.skills = SkillsCodex()
         self.items = ItemsManager()
         self.characters = CharactersManager(self.skills)
         self.npcs = NpcsManager(self.skills)
         self.locations = LocationManager()
         self.obstacles = ObstaclesManager(self.skills)
+        self.route_metrics = RouteMetrics(self.system_id)
+        self.validation_cache: Optional[ValidationCache] = default_cache()
+        self._managers = {
+            "character": self.characters,
+            "item": self.items,
+            "npc": self.npcs,
+            "location": self.locations,
+            "obstacle": self.obstacles,
+        }
+
+    def warmup(self) -> None:
+        # прогреваем каталоги до приёма трафика (вызывается из plugins.warmup)
+        for manager in self._managers.values():
+            manager.config_blob()
+
+    def config_blob(self, entity: EntityKind) -> Optional[ConfigBlob]:
+        """Готовый config сущности: JSON-байты, gzip и ETag для ответа 304 на бэке."""
+        manager = self._managers.get(entity)
+        return manager.config_blob() if manager is not None else None
+
+    def enable_validation_cache(self, maxsize: int = 1024, ttl: float = 0.0) -> ValidationCache:
+        self.validation_cache = ValidationCache(maxsize, ttl)
+        return self.validation_cache
+
+    def validation_cache_stats(self) -> Optional[dict[str, int]]:
+        return self.validation_cache.stats() if self.validation_cache is not None else None
+
+    def metrics(self) -> list[dict[str, Any]]:
+        return self.route_metrics.snapshot()
+
+    def metrics_prometheus(self) -> str:
+        text = render_prometheus([self.route_metrics])
+        if self.validation_cache is not None:
+            text += render_cache_prometheus([(self.system_id, self.validation_cache)])
+        return text
 
     # единый диспетчер, чтобы бэк не знал типов
     def handle(self, kind: str, entity: EntityKind, payload: Any, context: Any) -> Any:
+        m = self.route_metrics
+        if not m.enabled:
+            return self._handle(kind, entity, payload, context)
+        return m.timed(kind, entity or "", "", payload, lambda: self._handle(kind, entity, payload, context))
+
+    def _handle(self, kind: str, entity: EntityKind, payload: Any, context: Any) -> Any:
         ctx = context if isinstance(context, dict) else {}
 
-        manager = None
-
-        if entity == "character":
-            manager = self.characters
-        elif entity == "item":
-            manager = self.items
-        elif entity == "npc":
-            manager = self.npcs
-        elif entity == "location":
-            manager = self.locations
-        elif entity == "obstacle":
-            manager = self.obstacles
-        else:
+        manager = self._managers.get(entity)
+        if manager is None:
             return {"ok": False, "issues": [{"path": "", "message": "Unknown route", "icon": "error", "level": "error"}]}
 
         if kind == "config":
-            return manager.config(ctx)
+            # условный запрос: клиент прислал ETag своей копии -> не гоняем весь конфиг заново
+            etag = payload.get("etag") if isinstance(payload, dict) else None
+            current = manager.config_blob().etag
+            if etag and etag == current:
+                return {"notModified": True, "etag": etag}
+            # config() — своя копия; etag в ней — чтобы клиенту было что прислать в следующем условном запросе
+            out = manager.config(ctx)
+            out["etag"] = current
+            return out
         if kind == "validate":
-            res = manager.validate_and_enrich(payload or {}, ctx)
-            return res.model_dump() if hasattr(res, "model_dump") else res.dict()
+            return self._validate(manager, entity, payload, ctx)
+        if kind == "validate_patch":
+            return self._validate_patch(manager, payload if isinstance(payload, dict) else {}, ctx)
+        if kind == "validate_roster" and hasattr(manager, "validate_roster"):
+            # payload — список листов; ответ — список результатов validate в том же порядке
+            return [r.model_dump() for r in manager.validate_roster(list(payload or []), ctx)]
+        if kind == "graph" and hasattr(manager, "graph_op"):
+            # граф локаций сценария: payload {"scenarioId", "op", ...} (см. LocationManager.graph_op)
+            return manager.graph_op(payload)
+        if kind == "index" and hasattr(manager, "index_op"):
+            # индекс улик/испытаний сценария по навыкам (см. ObstaclesManager.index_op)
+            return manager.index_op(payload)
 
         return {"ok": False, "issues": [{"path": "", "message": "Unknown route", "icon": "error", "level": "error"}]}
 
+    def _cache_key(self, manager: Any, entity: EntityKind, payload: Any, ctx: dict[str, Any]) -> Optional[bytes]:
+        if self.validation_cache is None:
+            return None
+        return self.validation_cache.key((self.system_id, self.version), entity, payload or {}, ctx, manager.context_keys)
+
+    def _validate(self, manager: Any, entity: EntityKind, payload: Any, ctx: dict[str, Any]) -> dict[str, Any]:
+        cache = self.validation_cache
+        if cache is None:
+            return manager.validate_and_enrich(payload or {}, ctx).model_dump()
+        key = self._cache_key(manager, entity, payload, ctx)
+        return cache.get_or_compute(key, lambda: manager.validate_and_enrich(payload or {}, ctx).model_dump())
+
+    def _validate_patch(self, manager: Any, p: dict[str, Any], ctx: dict[str, Any]) -> dict[str, Any]:
+        # payload: {"data": принятые обогащённые данные, "revision": их ревизия, "patch": JSON Patch}
+        prev, patch = p.get("data") or {}, p.get("patch") or []
+        revision = p.get("revision") if isinstance(p.get("revision"), int) else 0
+        if hasattr(manager, "validate_patch"):
+            res = manager.validate_patch(prev, patch, ctx)
+        else:
+            try:
+                doc = apply_patch(prev, patch)
+            except JsonPatchError as e:
+                return {"ok": False, "issues": [{"path": "patch", "message": str(e), "icon": "error", "level": "error"}], "data": None, "revision": revision}
+            res = manager.validate_and_enrich(doc, ctx)
+        out = res.model_dump()
+        # новая ревизия — только если изменения приняты
+        out["revision"] = revision + 1 if res.ok else revision
+        return out
+
+    def handle_batch(self, calls: list[tuple[str, EntityKind, Any, Any]]) -> list[Any]:
+        """
+        Пакетный handle для импорта сценария / восстановления сессии: [(kind, entity, payload, context), ...].
+        validate персонажей и NPC уходят одним validate_roster на сущность, если их набралось не меньше
+        manager.roster_min (на маленьком ростере накладные расходы numpy больше выигрыша).
+        Результаты — в том же порядке и того же вида, что у handle().
+        """
+        m = self.route_metrics
+        if not m.enabled:
+            return self._handle_batch(calls)
+        return m.timed("batch", "", "", calls, lambda: self._handle_batch(calls))
+
+    def _handle_batch(self, calls: list[tuple[str, EntityKind, Any, Any]]) -> list[Any]:
+        cache = self.validation_cache
+        out: list[Any] = [None] * len(calls)
+        # entity -> [(индекс вызова, ключ кэша)] для тех, кого не нашли в кэше
+        roster: dict[EntityKind, list[tuple[int, Optional[bytes]]]] = {}
+        for n, (kind, entity, payload, context) in enumerate(calls):
+            manager = self._managers.get(entity)
+            ctx = context if isinstance(context, dict) else {}
+            if kind == "validate" and hasattr(manager, "validate_roster"):
+                key = self._cache_key(manager, entity, payload, ctx)
+                cached = cache.get(key) if cache is not None and key is not None else None
+                if cached is not None:
+                    out[n] = cached
+                else:
+                    roster.setdefault(entity, []).append((n, key))
+            elif kind == "validate" and manager is not None:
+                out[n] = self._validate(manager, entity, payload, ctx)
+            else:
+                # _handle: вызов уже внутри замера "batch"
+                out[n] = self._handle(kind, entity, payload, context)
+
+        # context этим менеджерам не нужен -> весь ростер сущности одним вызовом
+        for entity, pending in roster.items():
+            manager = self._managers[entity]
+            payloads = [calls[n][2] or {} for n, _ in pending]
+            if len(pending) >= manager.roster_min:
+                results = manager.validate_roster(payloads)
+            else:
+                results = [manager.validate_and_enrich(p) for p in payloads]
+            for (n, key), res in zip(pending, results):
+                out[n] = res.model_dump()
+                if cache is not None and key is not None:
+                    out[n] = cache.put(key, out[n])
+        return out
+
+# Одна фабрика на версию плагина, общая для всех сессий процесса. Валидация и config состояния не хранят
+# (всё приходит в payload/context), но графы локаций и индексы препятствий сценариев (kind "graph"/"index")
+# живут только в памяти этого процесса — PluginExecutor.mode_for всегда выполняет их inline
+# (executor.STATEFUL_KINDS).
+_factories: dict[str, RulesFactory] = {}
+_factories_lock = threading.Lock()
+
+
 class GumshoePlugin:
     plugin_id = "gumshoe"
     plugin_name = "Example Rules"
@@ -53,7 +191,14 @@ class GumshoePlugin:
     parent_id = None
 
     def get_factory(self):
-        return RulesFactory()
+        factory = _factories.get(self.plugin_version)
+        if factory is None:
+            with _factories_lock:
+                factory = _factories.get(self.plugin_version)
+                if factory is None:
+                    factory = RulesFactory(self.plugin_version)
+                    _factories[self.plugin_version] = factory
+        return factory
     
     def describe(self):
         return {
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from array import array
+from itertools import compress
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Sequence, get_args
+
+from .types import SkillKind
+
+try:
+    import numpy as np
+except ImportError:  # numpy необязателен: без него те же операции идут по array('H') в чистом Python
+    np = None
+
+if TYPE_CHECKING:
+    from .codex_skills import SkillsCodex
+
+# unsigned short: 2 байта на навык против ~100 байт на пару ключ/значение в dict
+TYPECODE = "H"
+MAX_VALUE = 0xFFFF
+
+
+class SkillLayout:
+    """
+    Фиксированный порядок навыков (как в SkillsCodex.skills) для компактного хранения
+    листа навыков: вектор array('H') длиной len(ids), индекс навыка — его позиция в ids.
+    Маски по kind позволяют считать бюджеты (investigativeTotal / generalTotal) одной операцией.
+    """
+
+    def __init__(self, codex: SkillsCodex) -> None:
+        self.ids: tuple[str, ...] = tuple(s.id for s in codex.skills)
+        self.index: Mapping[str, int] = MappingProxyType({sid: i for i, sid in enumerate(self.ids)})
+        self.kinds: tuple[SkillKind, ...] = get_args(SkillKind)
+        self.kind_indices: Mapping[SkillKind, tuple[int, ...]] = MappingProxyType({
+            kind: tuple(self.index[sid] for sid in codex.skill_ids_by_kind(kind))
+            for kind in self.kinds
+        })
+        # маски как bytes (0/1) — годятся и для numpy.frombuffer без копий
+        masks: dict[SkillKind, bytes] = {}
+        for kind, idx in self.kind_indices.items():
+            mask = bytearray(len(self.ids))
+            for i in idx:
+                mask[i] = 1
+            masks[kind] = bytes(mask)
+        self.kind_masks: Mapping[SkillKind, bytes] = MappingProxyType(masks)
+        # kinds × skills: одно матричное умножение даёт суммы по всем kind для всего ростера
+        self._kind_weights = (
+            np.frombuffer(b"".join(masks[k] for k in self.kinds), dtype=np.uint8)
+            .reshape(len(self.kinds), len(self.ids))
+            .astype(np.int64)
+            if np is not None else None
+        )
+        # навык -> позиция его kind в self.kinds (-1 — навык без kind), для плоских проверок ростера
+        self._kind_of_row = (
+            np.asarray(
+                [next((k for k, kind in enumerate(self.kinds) if masks[kind][i]), -1) for i in range(len(self.ids))],
+                dtype=np.intp,
+            )
+            if np is not None else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def zeros(self) -> array:
+        return array(TYPECODE, bytes(2 * len(self.ids)))
+
+    def encode(self, skills: Mapping[str, int]) -> array:
+        """dict навыков -> вектор. Неизвестные id и значения вне 0..65535 -> ValueError."""
+        vec = self.zeros()
+        index = self.index
+        for sid, val in skills.items():
+            i = index.get(sid)
+            if i is None:
+                raise ValueError(f"Unknown skill: {sid}")
+            if not 0 <= val <= MAX_VALUE:
+                raise ValueError(f"Skill value out of range: {sid}={val}")
+            vec[i] = val
+        return vec
+
+    def decode(self, vec: Iterable[int], *, keep_zeros: bool = False) -> dict[str, int]:
+        """Вектор -> dict в JSON-форме CharacterData/NpcData.skills (в порядке кодекса)."""
+        if keep_zeros:
+            return {sid: int(v) for sid, v in zip(self.ids, vec)}
+        return {sid: int(v) for sid, v in zip(self.ids, vec) if v}
+
+    def totals(self, vec: array) -> dict[SkillKind, int]:
+        """Сумма очков по каждому kind (для одного листа compress по маске дешевле вызова numpy)."""
+        return {kind: sum(compress(vec, mask)) for kind, mask in self.kind_masks.items()}
+
+    def mask_array(self, kind: SkillKind) -> Any:
+        """Булева маска kind как numpy-массив (только при установленном numpy)."""
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        return np.frombuffer(self.kind_masks[kind], dtype=np.bool_)
+
+    # ---- ростер: много листов за один проход ----
+
+    def stack(self, vectors: Sequence[array]) -> Any:
+        """Векторы листов -> numpy-матрица навыки × сущности (uint16, одна копия). Только с numpy."""
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        flat = np.frombuffer(b"".join(v.tobytes() for v in vectors), dtype=np.uint16)
+        return flat.reshape(len(vectors), len(self.ids)).T
+
+    def roster_totals(self, vectors: Sequence[array]) -> dict[SkillKind, list[int]]:
+        """Суммы по kind для каждого листа: {kind: [total_0, total_1, ...]}."""
+        if np is not None and vectors:
+            totals = self._kind_weights @ self.stack(vectors)
+            return {kind: totals[k].tolist() for k, kind in enumerate(self.kinds)}
+        per_sheet = [self.totals(v) for v in vectors]
+        return {kind: [t[kind] for t in per_sheet] for kind in self.kinds}
+
+    def flat_totals(self, owners: Any, rows: Any, values: Any, count: int) -> tuple[Any, Any]:
+        """
+        Суммы по kind для count листов из плоских numpy-массивов пар (лист, индекс навыка, значение);
+        rows < 0 — навык не из кодекса. Возвращает (матрицу kinds × листы int64, маску пар, чей навык
+        есть в кодексе, но без kind). Только с numpy.
+        """
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        known = rows >= 0
+        kind = np.full(rows.shape, -1, dtype=np.intp)
+        kind[known] = self._kind_of_row[rows[known]]
+        hit = kind >= 0
+        totals = np.zeros((len(self.kinds), count), dtype=np.int64)
+        np.add.at(totals, (kind[hit], owners[hit]), values[hit])
+        return totals, known & ~hit
+
+    def outside_kind(self, rows: Sequence[int], kind: SkillKind) -> list[int]:
+        """Позиции в rows (индексы навыков), чей навык не относится к kind."""
+        mask = self.kind_masks[kind]
+        if np is not None and rows:
+            return np.flatnonzero(np.frombuffer(mask, dtype=np.uint8)[np.asarray(rows, dtype=np.intp)] == 0).tolist()
+        return [pos for pos, i in enumerate(rows) if not mask[i]]
@@ -3,4 +3,5 @@ from .skills import *
 from .items import *
 from .characters import *
 from .npcs import *
-from .obstacle import *
\ No newline at end of file
+from .obstacle import *
+from .location import *
\ No newline at end of file
@@ -1,16 +1,17 @@
 from __future__ import annotations
 from typing import Any, Protocol, Literal, Optional, runtime_checkable
-from pydantic import BaseModel, Field, NonNegativeInt
+from pydantic import Field, NonNegativeInt
+from .base import PluginModel
 
 from .items import ItemData
 
 
-class CharacterPoints(BaseModel):
+class CharacterPoints(PluginModel):
     investigativeMax: NonNegativeInt = 0
     generalMax: NonNegativeInt = 0
 
 
-class CharacterData(BaseModel):
+class CharacterData(PluginModel):
     name: str = ""
     skills: dict[str, NonNegativeInt] = Field(default_factory=dict)
 
@@ -1,7 +1,8 @@
 
 from __future__ import annotations
 from typing import Any, Protocol, Literal, Optional, runtime_checkable
-from pydantic import BaseModel, Field, NonNegativeInt
+from pydantic import Field, NonNegativeInt
+from .base import PluginModel
 
 
 # ---- Items ----
@@ -10,24 +11,24 @@ WeaponType = Literal["melee", "ranged"]
 ArmorVs = Literal["melee", "ranged", "all"]
 
 
-class ItemWeapon(BaseModel):
+class ItemWeapon(PluginModel):
     type: WeaponType
     damage: str  # свободная строка: "1d6", "1d6+1", "2", etc.
 
 
 
-class ItemArmor(BaseModel):
+class ItemArmor(PluginModel):
     rating: NonNegativeInt = 0
     vs: list[ArmorVs] = Field(default_factory=lambda: ["all"])
 
 
 
-class ItemData(BaseModel):
+class ItemData(PluginModel):
     tags: list[str] = Field(default_factory=list)
 
     weapon: Optional[ItemWeapon] = None
     armor: Optional[ItemArmor] = None
 
 
-class HasItems(BaseModel):
+class HasItems(PluginModel):
     items: list[ItemData] = Field(default_factory=list)
\ No newline at end of file
@@ -0,0 +1,28 @@
+# types/location.py
+from __future__ import annotations
+
+from typing import Literal
+from pydantic import ConfigDict, Field, PositiveInt
+from .base import PluginModel
+
+# как персонажи добираются между локациями; маршруты можно ограничить набором типов
+ConnectionType = Literal["path", "door", "road", "travel", "secret"]
+
+
+class LocationConnection(PluginModel):
+    model_config = ConfigDict(extra="allow")
+
+    to: str                       # id локации сценария
+    type: ConnectionType = "path"
+    bidirectional: bool = True    # обратный проход без отдельной связи у цели
+    cost: PositiveInt = 1         # "время в пути" для кратчайших маршрутов
+    label: str = ""
+
+
+class LocationData(PluginModel):
+    # остальные поля локации (карта, заметки мастера и т.п.) плагин не разбирает, но и не теряет
+    model_config = ConfigDict(extra="allow")
+
+    name: str = ""
+    description: str = ""
+    connections: list[LocationConnection] = Field(default_factory=list)
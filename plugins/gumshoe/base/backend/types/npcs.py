@@ -1,12 +1,13 @@
 from __future__ import annotations
 from typing import Any, Protocol, Literal, Optional, runtime_checkable
-from pydantic import BaseModel, Field, NonNegativeInt, PositiveInt
+from pydantic import Field, NonNegativeInt, PositiveInt
+from .base import PluginModel
 
 from .items import HasItems
 
 
 
-class NpcData(HasItems, BaseModel):
+class NpcData(HasItems, PluginModel):
 
     # NPC: только general (валидация на уровне NpcsManager)
     skills: dict[str, NonNegativeInt] = Field(default_factory=dict)
@@ -2,17 +2,18 @@
 from __future__ import annotations
 
 from typing import Annotated, Literal, Union
-from pydantic import BaseModel, Field, NonNegativeInt, PositiveInt
+from pydantic import Field, NonNegativeInt, PositiveInt
+from .base import PluginModel
 
 
-class ObstacleClue(BaseModel):
+class ObstacleClue(PluginModel):
     type: Literal["clue"] = "clue"
     investigative_skills: list[str] = Field(default_factory=list)
     spend_cost: NonNegativeInt = 0
     reward: str = ""
 
 
-class ObstacleChallenge(BaseModel):
+class ObstacleChallenge(PluginModel):
     type: Literal["challenge"] = "challenge"
     general_skill: str = ""
     difficulty: PositiveInt = 4
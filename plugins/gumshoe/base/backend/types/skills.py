@@ -1,11 +1,12 @@
 from __future__ import annotations
 from typing import Any, Protocol, Literal, Optional, runtime_checkable
-from pydantic import BaseModel, Field, NonNegativeInt, ConfigDict
+from pydantic import Field, NonNegativeInt, ConfigDict
+from .base import PluginModel
 
 
 SkillKind = Literal["investigative", "general"]
 
-class SkillGroup(BaseModel):
+class SkillGroup(PluginModel):
     model_config = ConfigDict(frozen=True)
 
     id: str
@@ -15,7 +16,7 @@ class SkillGroup(BaseModel):
     kind: SkillKind
 
 
-class Skill(BaseModel):
+class Skill(PluginModel):
     model_config = ConfigDict(frozen=True)
 
     id: str
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Optional
+
+from pydantic_core import to_json
+
+# JSON Patch (RFC 6902) поверх JSON Pointer (RFC 6901) — ровно то, что нужно плагинам,
+# без внешней зависимости. Исходный документ не меняется: контейнеры по пути патча копируются.
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+def parse_pointer(pointer: Any) -> list[str]:
+    if not isinstance(pointer, str):
+        raise JsonPatchError("JSON pointer must be a string")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def _list_index(container: list, token: str, *, for_add: bool = False) -> int:
+    if for_add and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise JsonPatchError(f"Invalid list index: {token!r}")
+    idx = int(token)
+    if idx > len(container) or (idx == len(container) and not for_add):
+        raise JsonPatchError(f"List index out of range: {token}")
+    return idx
+
+
+def _child(container: Any, token: str) -> Any:
+    if isinstance(container, dict):
+        if token not in container:
+            raise JsonPatchError(f"Path not found: {token!r}")
+        return container[token]
+    if isinstance(container, list):
+        return container[_list_index(container, token)]
+    raise JsonPatchError(f"Cannot traverse into {type(container).__name__}")
+
+
+def resolve(doc: Any, tokens: list[str]) -> Any:
+    for token in tokens:
+        doc = _child(doc, token)
+    return doc
+
+
+def _cow_parent(root: Any, tokens: list[str], owned: set[int]) -> tuple[Any, Any]:
+    """Копирует контейнеры от корня до родителя tokens[-1]; owned — id уже скопированных за этот патч."""
+    def own(c: Any) -> Any:
+        if id(c) in owned:
+            return c
+        c = dict(c) if isinstance(c, dict) else list(c) if isinstance(c, list) else c
+        owned.add(id(c))
+        return c
+
+    root = own(root)
+    parent = root
+    for token in tokens[:-1]:
+        child = own(_child(parent, token))
+        if isinstance(parent, dict):
+            parent[token] = child
+        else:
+            parent[_list_index(parent, token)] = child
+        parent = child
+    return root, parent
+
+
+def _add(root: Any, tokens: list[str], value: Any, owned: set[int]) -> Any:
+    if not tokens:
+        return value
+    root, parent = _cow_parent(root, tokens, owned)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, token, for_add=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add into {type(parent).__name__}")
+    return root
+
+
+def _remove(root: Any, tokens: list[str], owned: set[int]) -> tuple[Any, Any]:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    root, parent = _cow_parent(root, tokens, owned)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {token!r}")
+        return root, parent.pop(token)
+    if isinstance(parent, list):
+        return root, parent.pop(_list_index(parent, token))
+    raise JsonPatchError(f"Cannot remove from {type(parent).__name__}")
+
+
+def _ops(patch: Any) -> list[Any]:
+    # патч приходит от клиента как есть: не-массив — ошибка патча, а не TypeError
+    if not isinstance(patch, list):
+        raise JsonPatchError("Patch must be an array of operations")
+    return patch
+
+
+def apply_patch(doc: Any, patch: list[dict[str, Any]]) -> Any:
+    """Применяет операции патча и возвращает новый документ; doc не изменяется."""
+    owned: set[int] = set()
+    for op in _ops(patch):
+        if not isinstance(op, dict):
+            raise JsonPatchError("Patch operation must be an object")
+        name = op.get("op")
+        tokens = parse_pointer(op.get("path"))
+        if name in ("add", "replace", "test") and "value" not in op:
+            raise JsonPatchError(f"'{name}' requires 'value'")
+
+        if name == "add":
+            doc = _add(doc, tokens, op["value"], owned)
+        elif name == "remove":
+            doc, _ = _remove(doc, tokens, owned)
+        elif name == "replace":
+            if tokens:
+                resolve(doc, tokens)  # путь должен существовать
+                doc, _ = _remove(doc, tokens, owned)
+            doc = _add(doc, tokens, op["value"], owned)
+        elif name == "move":
+            src = parse_pointer(op.get("from"))
+            if tokens[:len(src)] == src and tokens != src:
+                raise JsonPatchError("Cannot move a value into its own child")
+            doc, value = _remove(doc, src, owned)
+            doc = _add(doc, tokens, value, owned)
+        elif name == "copy":
+            value = copy.deepcopy(resolve(doc, parse_pointer(op.get("from"))))
+            doc = _add(doc, tokens, value, owned)
+        elif name == "test":
+            if resolve(doc, tokens) != op["value"]:
+                raise JsonPatchError(f"Test failed at {op.get('path')!r}")
+        else:
+            raise JsonPatchError(f"Unknown patch operation: {name!r}")
+    return doc
+
+
+def touched_roots(patch: list[dict[str, Any]]) -> Optional[set[str]]:
+    """Верхнеуровневые ключи, которые меняет патч; None — если патч затрагивает корень целиком."""
+    roots: set[str] = set()
+    for op in _ops(patch):
+        if not isinstance(op, dict):
+            raise JsonPatchError("Patch operation must be an object")
+        if op.get("op") == "test":
+            continue
+        paths = [op.get("path")]
+        if op.get("op") == "move":
+            paths.append(op.get("from"))
+        for path in paths:
+            tokens = parse_pointer(path)
+            if not tokens:
+                return None
+            roots.add(tokens[0])
+    return roots
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _same(a: Any, b: Any) -> bool:
+    # == отсекает равные поддеревья на C, но путает true и 1 (и 1 с 1.0) — их различает тип/to_json
+    if a is b:
+        return True
+    if type(a) is not type(b) or a != b:
+        return False
+    return not isinstance(a, (dict, list)) or to_json(a) == to_json(b)
+
+
+def _diff(src: Any, dst: Any, path: str, ops: list[dict[str, Any]]) -> None:
+    if isinstance(src, dict) and isinstance(dst, dict):
+        for key in src:
+            if key not in dst:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in dst.items():
+            if key not in src:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+            elif not _same(src[key], value):
+                _diff(src[key], value, f"{path}/{_escape(key)}", ops)
+        return
+    if isinstance(src, list) and isinstance(dst, list):
+        common = min(len(src), len(dst))
+        for i in range(common):
+            if not _same(src[i], dst[i]):
+                _diff(src[i], dst[i], f"{path}/{i}", ops)
+        # хвост: удаляем с конца (индексы не съезжают), дописываем через "-"
+        for i in range(len(src) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        for value in dst[common:]:
+            ops.append({"op": "add", "path": f"{path}/-", "value": value})
+        return
+    ops.append({"op": "replace", "path": path, "value": dst})
+
+
+def make_patch(src: Any, dst: Any) -> list[dict[str, Any]]:
+    """
+    Патч, переводящий src в dst: apply_patch(src, make_patch(src, dst)) == dst.
+    Словари сравниваются по ключам, списки — поэлементно с правкой хвоста (без поиска вставок в середину).
+    Значения в операциях — ссылки на части dst, не копии.
+    """
+    ops: list[dict[str, Any]] = []
+    if not _same(src, dst):
+        _diff(src, dst, "", ops)
+    return ops
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from pydantic_core import to_json
+
+# RPG_PLUGINS_METRICS=1 — включить учёт вызовов плагинов; выключено — только проверка флага на вызов
+METRICS_ENABLED = os.environ.get("RPG_PLUGINS_METRICS", "") not in ("", "0")
+
+# секунды, как у дефолтной гистограммы Prometheus, но мельче снизу: handle обычно < 1 мс
+LATENCY_BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# (system_id, kind, entity | actionKey, stageKey)
+RouteKey = tuple[str, str, str, str]
+
+
+@dataclass
+class RouteStats:
+    count: int = 0
+    errors: int = 0
+    issues: int = 0
+    latency_sum: float = 0.0
+    latency_buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    payload_bytes: int = 0
+    response_bytes: int = 0
+
+
+def _json_size(value: Any) -> int:
+    try:
+        return len(to_json(value, serialize_unknown=True))
+    except Exception:
+        return 0
+
+
+def _outcome(res: Any) -> tuple[bool, int]:
+    # (ошибка?, число issues) для dict-ответов handle и pydantic-результатов воркфлоу
+    if isinstance(res, dict):
+        ok, issues = res.get("ok", True), res.get("issues")
+    else:
+        ok, issues = getattr(res, "ok", True), getattr(res, "issues", None)
+    return ok is False, len(issues) if isinstance(issues, list) else 0
+
+
+class RouteMetrics:
+    def __init__(self, system_id: str, enabled: bool | None = None) -> None:
+        self.system_id = system_id
+        self.enabled = METRICS_ENABLED if enabled is None else enabled
+        self._stats: dict[RouteKey, RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def timed(self, kind: str, target: str, stage: str, payload: Any, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            res = fn()
+        except Exception:
+            self._record((self.system_id, kind, target, stage), time.perf_counter() - started, payload, None, True, 0)
+            raise
+        elapsed = time.perf_counter() - started
+        error, issues = _outcome(res)
+        self._record((self.system_id, kind, target, stage), elapsed, payload, res, error, issues)
+        return res
+
+    def _record(self, key: RouteKey, elapsed: float, payload: Any, res: Any, error: bool, issues: int) -> None:
+        payload_bytes = _json_size(payload)
+        response_bytes = _json_size(res) if res is not None else 0
+        bucket = next((i for i, le in enumerate(LATENCY_BUCKETS) if elapsed <= le), len(LATENCY_BUCKETS))
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = RouteStats()
+            st.count += 1
+            st.errors += int(error)
+            st.issues += issues
+            st.latency_sum += elapsed
+            st.latency_buckets[bucket] += 1
+            st.payload_bytes += payload_bytes
+            st.response_bytes += response_bytes
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "systemId": key[0],
+                    "kind": key[1],
+                    "target": key[2],
+                    "stageKey": key[3],
+                    "count": st.count,
+                    "errors": st.errors,
+                    "issues": st.issues,
+                    "latencySum": st.latency_sum,
+                    "latencyBuckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], st.latency_buckets)),
+                    "payloadBytes": st.payload_bytes,
+                    "responseBytes": st.response_bytes,
+                }
+                for key, st in self._stats.items()
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def _label_value(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(metrics: Iterable[RouteMetrics]) -> str:
+    """Текстовый формат Prometheus (exposition 0.0.4) для одной или нескольких фабрик."""
+    rows = [row for m in metrics for row in m.snapshot()]
+    lines: list[str] = []
+
+    def labels(row: dict[str, Any], extra: str = "") -> str:
+        base = ",".join(
+            f'{name}="{_label_value(str(row[key]))}"'
+            for name, key in (("system", "systemId"), ("kind", "kind"), ("target", "target"), ("stage", "stageKey"))
+        )
+        return "{" + base + extra + "}"
+
+    for name, field_name, help_text in (
+        ("rpg_plugin_calls_total", "count", "Plugin route calls"),
+        ("rpg_plugin_call_errors_total", "errors", "Plugin route calls that raised or returned ok=false"),
+        ("rpg_plugin_call_issues_total", "issues", "Validation issues returned by plugin routes"),
+        ("rpg_plugin_payload_bytes_total", "payloadBytes", "JSON size of plugin route payloads"),
+        ("rpg_plugin_response_bytes_total", "responseBytes", "JSON size of plugin route responses"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{labels(row)} {row[field_name]}" for row in rows)
+
+    name = "rpg_plugin_call_duration_seconds"
+    lines.append(f"# HELP {name} Plugin route latency")
+    lines.append(f"# TYPE {name} histogram")
+    for row in rows:
+        cumulative = 0
+        for le, n in row["latencyBuckets"].items():
+            cumulative += n
+            le_label = f',le="{le}"'
+            lines.append(f"{name}_bucket{labels(row, le_label)} {cumulative}")
+        lines.append(f"{name}_sum{labels(row)} {row['latencySum']}")
+        lines.append(f"{name}_count{labels(row)} {row['count']}")
+
+    return "\n".join(lines) + "\n"
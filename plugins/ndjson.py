@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping, Optional, Union
+
+from pydantic_core import from_json, to_json
+
+from . import get_plugin
+
+if TYPE_CHECKING:
+    from .executor import PluginExecutor
+
+logger = logging.getLogger(__name__)
+
+# Потоковый импорт/экспорт сущностей сценария в NDJSON: одна сущность на строку
+#   {"entity": "npc", "id": "npc-17", "data": {...}, "context": {...}}
+# (id и context необязательны). Строки читаются лениво пачками по chunk_size, каждая пачка уходит
+# одним handle_batch (фабрика сама раскладывает по менеджерам и ростерам), результаты отдаются
+# в порядке строк по мере готовности — в памяти не больше max_inflight пачек.
+
+DEFAULT_CHUNK_SIZE = 256
+
+Line = Union[bytes, bytearray, str]
+
+
+@dataclass
+class ImportProgress:
+    lines: int = 0
+    ok: int = 0
+    failed: int = 0
+    chunks: int = 0
+
+
+ProgressFn = Callable[[ImportProgress], None]
+
+
+def _issue(path: str, message: str) -> dict[str, Any]:
+    return {"path": path, "message": message, "icon": "error", "level": "error"}
+
+
+def _failed(line: int, entity: Any, id_: Any, path: str, message: str) -> dict[str, Any]:
+    return {"line": line, "entity": entity, "id": id_, "ok": False, "issues": [_issue(path, message)], "data": None}
+
+
+def _parse_line(n: int, raw: Line) -> tuple[Optional[dict[str, Any]], Optional[dict[str, Any]]]:
+    """(строка сценария, None) или (None, готовая запись с ошибкой разбора)."""
+    try:
+        doc = from_json(raw)
+    except ValueError as e:
+        return None, _failed(n, None, None, "line", f"Invalid JSON: {e}")
+    if not isinstance(doc, dict):
+        return None, _failed(n, None, None, "line", "Line must be a JSON object")
+    if not isinstance(doc.get("entity"), str):
+        return None, _failed(n, None, doc.get("id"), "entity", "Field 'entity' is required")
+    return doc, None
+
+
+def _inline_batch(plugin_name: str, calls: list[tuple[str, Any, Any, Any]]) -> list[Any]:
+    if not calls:
+        return []
+    plugin = get_plugin(plugin_name)
+    if plugin is None:
+        return [{"ok": False, "issues": [_issue("", f"Unknown plugin '{plugin_name}'")], "data": None}] * len(calls)
+    return plugin.get_factory().handle_batch(calls)
+
+
+def _chunks(lines: Iterable[Line], size: int) -> Iterator[list[tuple[int, Line]]]:
+    numbered = ((n, raw) for n, raw in enumerate(lines, 1) if raw.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Chunk:
+    """Пачка строк: готовые записи (ошибки разбора) + вызовы handle_batch для остальных."""
+
+    def __init__(self, raw: list[tuple[int, Line]], context: dict[str, Any]) -> None:
+        self.records: list[Optional[dict[str, Any]]] = []
+        self.heads: list[tuple[int, Any, Any]] = []
+        self.calls: list[tuple[str, Any, Any, Any]] = []
+        for n, line in raw:
+            doc, err = _parse_line(n, line)
+            if doc is None:
+                self.records.append(err)
+                continue
+            ctx = {**context, **doc["context"]} if isinstance(doc.get("context"), dict) else context
+            self.records.append(None)
+            self.heads.append((n, doc["entity"], doc.get("id")))
+            self.calls.append(("validate", doc["entity"], doc.get("data") or {}, ctx))
+
+    def finish(self, results: list[Any]) -> list[dict[str, Any]]:
+        it = iter(zip(self.heads, results))
+        out: list[dict[str, Any]] = []
+        for rec in self.records:
+            if rec is None:
+                (n, entity, id_), res = next(it)
+                rec = {"line": n, "entity": entity, "id": id_, **res}
+            out.append(rec)
+        return out
+
+    def fail(self, message: str) -> list[dict[str, Any]]:
+        return self.finish([{"ok": False, "issues": [_issue("", message)], "data": None}] * len(self.calls))
+
+
+def import_ndjson(
+    plugin_name: str,
+    lines: Iterable[Line],
+    *,
+    context: Optional[dict[str, Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Optional[PluginExecutor] = None,
+    max_inflight: Optional[int] = None,
+    timeout: Optional[float] = None,
+    progress: Optional[ProgressFn] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Лениво валидирует NDJSON-строки (файл в режиме "rb", генератор, поток ответа) и отдаёт по записи
+    на строку: {"line", "entity", "id", "ok", "issues", "data"} — как у handle("validate") плюс
+    номер строки. Пустые строки пропускаются, битые — дают запись с ошибкой, импорт не прерывается.
+
+    executor с запущенным пулом — пачки валидируются параллельно (не больше max_inflight,
+    по умолчанию 2 на воркер), иначе — последовательно в текущем процессе.
+    progress(ImportProgress) вызывается после каждой отданной пачки.
+    """
+    base_ctx = dict(context or {})
+    state = ImportProgress()
+    chunks = (_Chunk(raw, base_ctx) for raw in _chunks(lines, max(1, chunk_size)))
+
+    def emit(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        state.chunks += 1
+        state.lines += len(records)
+        ok = sum(1 for r in records if r.get("ok"))
+        state.ok += ok
+        state.failed += len(records) - ok
+        if progress is not None:
+            progress(state)
+        return records
+
+    if executor is None or not executor.running:
+        for chunk in chunks:
+            yield from emit(chunk.finish(_inline_batch(plugin_name, chunk.calls)))
+        return
+
+    limit = max_inflight or executor.workers * 2
+    wait = timeout if timeout is not None else executor.timeout
+    inflight: collections.deque[tuple[_Chunk, Optional[concurrent.futures.Future]]] = collections.deque()
+
+    def drain_one() -> list[dict[str, Any]]:
+        chunk, fut = inflight.popleft()
+        if fut is None:
+            return emit(chunk.finish([]))
+        try:
+            return emit(chunk.finish(from_json(fut.result(timeout=wait))))
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            logger.warning("NDJSON import chunk of %d lines timed out", len(chunk.records))
+            return emit(chunk.fail("Plugin call timed out"))
+        except Exception:
+            # упавший воркер (BrokenProcessPool), исключение плагина, битый ответ — строки пачки
+            # получают ошибку, импорт идёт дальше
+            logger.warning("NDJSON import chunk of %d lines failed", len(chunk.records), exc_info=True)
+            return emit(chunk.fail("Plugin call failed"))
+
+    for chunk in chunks:
+        try:
+            fut = executor.submit_batch(plugin_name, chunk.calls) if chunk.calls else None
+        except RuntimeError:
+            # пул остановлен (shutdown) или сломан (BrokenProcessPool)
+            fut = None
+        if fut is None and chunk.calls:
+            # пул закрыли посреди импорта — досчитываем пачку здесь
+            fut = concurrent.futures.Future()
+            fut.set_result(to_json(_inline_batch(plugin_name, chunk.calls)))
+        inflight.append((chunk, fut))
+        # окно ограничено: пока самая старая пачка не отдана, новые строки не читаем
+        while len(inflight) >= limit:
+            yield from drain_one()
+    while inflight:
+        yield from drain_one()
+
+
+def export_ndjson(records: Iterable[Mapping[str, Any]], *, include_failed: bool = False) -> Iterator[bytes]:
+    """
+    Сериализует сущности в NDJSON-строки формата import_ndjson ({"entity", "id", "data"}), по одной за раз.
+    Принимает и исходные строки сценария, и записи импорта (берутся обогащённые data);
+    записи без data (не прошедшие валидацию) пропускаются, если не include_failed.
+    """
+    for rec in records:
+        data = rec.get("data")
+        if data is None and not include_failed:
+            continue
+        line: dict[str, Any] = {"entity": rec.get("entity")}
+        if rec.get("id") is not None:
+            line["id"] = rec["id"]
+        line["data"] = data
+        yield to_json(line) + b"\n"
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+from pydantic_core import from_json, to_json
+
+# RPG_PLUGINS_VALIDATION_CACHE=<кол-во записей> — включить кэш результатов validate (0/пусто — выключен)
+# RPG_PLUGINS_VALIDATION_CACHE_TTL=<секунды> — время жизни записи (0/пусто — без TTL)
+CACHE_SIZE = int(os.environ.get("RPG_PLUGINS_VALIDATION_CACHE", "") or 0)
+CACHE_TTL = float(os.environ.get("RPG_PLUGINS_VALIDATION_CACHE_TTL", "") or 0)
+
+
+_encode = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False, check_circular=False).encode
+
+
+def _canonical(value: Any) -> Optional[bytes]:
+    # компактный JSON с сортировкой ключей на всех уровнях: тот же лист с полями в другом порядке
+    # (и сырые байты того же JSON с сокета) даёт тот же ключ; строка — просто значение, как в parse_payload
+    try:
+        if isinstance(value, (bytes, bytearray)):
+            value = from_json(value)
+        return _encode(value).encode()
+    except (TypeError, ValueError):
+        return None
+
+
+class ValidationCache:
+    """
+    Ограниченный LRU (+ опциональный TTL) кэш ответов validate по хэшу содержимого:
+    (system, версия плагина, сущность, payload как JSON с отсортированными ключами, значимые ключи context).
+    Хранятся JSON-байты ответа, на попадание отдаётся свежая копия — записи безопасно делить.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 0.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(scope: Iterable[str], entity: Any, payload: Any, context: dict[str, Any], context_keys: Iterable[str]) -> Optional[bytes]:
+        """None — payload не сериализуется в JSON (такие вызовы идут мимо кэша)."""
+        body = _canonical(payload)
+        head = _canonical([*scope, entity, {k: context.get(k) for k in context_keys}])
+        if body is None or head is None:
+            return None
+        h = hashlib.blake2b(digest_size=20)
+        h.update(head)
+        h.update(b"\0")
+        h.update(body)
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and self._clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            blob = entry[1]
+        return from_json(blob)
+
+    def put(self, key: bytes, value: Any) -> Any:
+        """Кладёт value и возвращает его в том виде, в каком его отдаст get (после JSON: tuple -> list, ключи -> str)."""
+        blob = to_json(value)
+        with self._lock:
+            self._entries[key] = (self._clock(), blob)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return from_json(blob)
+
+    def get_or_compute(self, key: Optional[bytes], compute: Callable[[], Any]) -> Any:
+        if key is None:
+            return compute()
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        # промах отдаёт то же, что отдаст попадание, а не исходный объект
+        return self.put(key, compute())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def default_cache() -> Optional[ValidationCache]:
+    """Кэш по переменным окружения (один на фабрику) или None, если выключен."""
+    return ValidationCache(CACHE_SIZE, CACHE_TTL) if CACHE_SIZE > 0 else None
+
+
+def render_prometheus(caches: Iterable[tuple[str, ValidationCache]]) -> str:
+    lines: list[str] = []
+    rows = [(system, cache.stats()) for system, cache in caches]
+    for name, key, help_text in (
+        ("rpg_plugin_validation_cache_hits_total", "hits", "Validation cache hits"),
+        ("rpg_plugin_validation_cache_misses_total", "misses", "Validation cache misses"),
+        ("rpg_plugin_validation_cache_evictions_total", "evictions", "Validation cache LRU evictions"),
+        ("rpg_plugin_validation_cache_expirations_total", "expirations", "Validation cache TTL expirations"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f'{name}{{system="{system}"}} {st[key]}' for system, st in rows)
+    name = "rpg_plugin_validation_cache_entries"
+    lines.append(f"# HELP {name} Validation cache entries")
+    lines.append(f"# TYPE {name} gauge")
+    lines.extend(f'{name}{{system="{system}"}} {st["size"]}' for system, st in rows)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,116 @@
+"""plugins.json_patch: copy-on-write apply_patch, touched_roots, make_patch."""
+import copy
+
+import pytest
+
+from plugins.json_patch import JsonPatchError, apply_patch, make_patch, touched_roots
+
+
+def _doc():
+    return {
+        "name": "Cutter",
+        "actions": {"skirmish": 2, "wreck": 1},
+        "items": [{"tags": ["weapon"]}, {"tags": ["tool"], "quality": 1}],
+        "harm": {"l1": ["Bruised", None]},
+    }
+
+
+def test_apply_patch_leaves_source_untouched():
+    doc = _doc()
+    before = copy.deepcopy(doc)
+    apply_patch(doc, [
+        {"op": "replace", "path": "/actions/skirmish", "value": 3},
+        {"op": "add", "path": "/items/-", "value": {"tags": ["gear"]}},
+        {"op": "remove", "path": "/harm/l1/0"},
+        {"op": "move", "from": "/name", "path": "/alias"},
+    ])
+    assert doc == before
+
+
+def test_apply_patch_copies_only_the_patched_path():
+    doc = _doc()
+    new = apply_patch(doc, [{"op": "replace", "path": "/actions/skirmish", "value": 3}])
+    assert new == {**doc, "actions": {"skirmish": 3, "wreck": 1}}
+    assert new is not doc and new["actions"] is not doc["actions"]
+    # нетронутые ветки — те же объекты, не копии
+    assert new["items"] is doc["items"]
+    assert new["harm"] is doc["harm"]
+
+
+def test_apply_patch_copies_each_container_once():
+    doc = _doc()
+    new = apply_patch(doc, [
+        {"op": "add", "path": "/items/0/tags/-", "value": "sharp"},
+        {"op": "add", "path": "/items/0/quality", "value": 2},
+    ])
+    assert new["items"][0] == {"tags": ["weapon", "sharp"], "quality": 2}
+    assert doc["items"][0] == {"tags": ["weapon"]}
+    assert new["items"][1] is doc["items"][1]
+
+
+def test_copy_op_does_not_alias_the_source_value():
+    new = apply_patch(_doc(), [{"op": "copy", "from": "/items/0", "path": "/items/-"}])
+    new["items"][-1]["tags"].append("x")
+    assert new["items"][0] == {"tags": ["weapon"]}
+
+
+def test_test_op_passes_and_whole_document_replace():
+    doc = _doc()
+    assert apply_patch(doc, [{"op": "test", "path": "/actions/wreck", "value": 1}]) == doc
+    assert apply_patch(doc, [{"op": "replace", "path": "", "value": {"a": 1}}]) == {"a": 1}
+
+
+@pytest.mark.parametrize("patch", [
+    [{"op": "replace", "path": "/missing", "value": 1}],
+    [{"op": "remove", "path": "/items/5"}],
+    [{"op": "add", "path": "/items/01", "value": 1}],
+    [{"op": "add", "path": "actions", "value": 1}],
+    [{"op": "add", "path": "/x"}],
+    [{"op": "test", "path": "/actions/wreck", "value": 2}],
+    [{"op": "move", "from": "/actions", "path": "/actions/inner"}],
+    [{"op": "frobnicate", "path": "/name"}],
+    ["not an op"],
+])
+def test_invalid_patch_raises(patch):
+    doc = _doc()
+    before = copy.deepcopy(doc)
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, patch)
+    assert doc == before
+
+
+def test_touched_roots():
+    assert touched_roots([
+        {"op": "replace", "path": "/actions/skirmish", "value": 3},
+        {"op": "add", "path": "/items/-", "value": {}},
+        {"op": "test", "path": "/name", "value": "Cutter"},
+        {"op": "move", "from": "/harm/l1/0", "path": "/notes"},
+    ]) == {"actions", "items", "harm", "notes"}
+    assert touched_roots([]) == set()
+    # патч корня — None: инкрементальная валидация невозможна
+    assert touched_roots([{"op": "replace", "path": "", "value": {}}]) is None
+    assert touched_roots([{"op": "move", "from": "", "path": "/x"}]) is None
+
+
+@pytest.mark.parametrize("patch", [5, None, {"op": "add", "path": "/x", "value": 1}, [5]])
+def test_non_list_patch_raises(patch):
+    with pytest.raises(JsonPatchError):
+        apply_patch(_doc(), patch)
+    with pytest.raises(JsonPatchError):
+        touched_roots(patch)
+
+
+@pytest.mark.parametrize("src, dst", [
+    (_doc(), {**_doc(), "name": "Lurk"}),
+    (_doc(), {"name": "Cutter", "items": []}),
+    ({"a": [1, 2, 3]}, {"a": [1, 5]}),
+    ({"a": [1]}, {"a": [1, 2, {"b": None}]}),
+    ({"flag": 1}, {"flag": True}),
+    ({"a/b": {"~": 1}}, {"a/b": {"~": 2}}),
+])
+def test_make_patch_round_trip(src, dst):
+    patch = make_patch(src, dst)
+    out = apply_patch(src, patch)
+    assert out == dst
+    # == не отличает True от 1
+    assert {k: type(v) for k, v in out.items()} == {k: type(v) for k, v in dst.items()}
@@ -0,0 +1,118 @@
+"""validate_patch(prev, patch) == validate_and_enrich(apply_patch(prev, patch)) для листов обоих плагинов."""
+import copy
+import random
+
+import pytest
+
+from plugins.blades_in_the_dark.base.backend.plugin import RulesFactory as BladesFactory
+from plugins.gumshoe.base.backend.plugin import RulesFactory as GumshoeFactory
+from plugins.json_patch import JsonPatchError, apply_patch
+
+BLADES_SHEET = {
+    "playbookId": "cutter", "abilities": ["battleborn"], "actions": {"skirmish": 2, "wreck": 1},
+    "stress": 3, "traumas": ["cold"], "load": "normal",
+    "harm": {"l3": None, "l2": [" Broken arm ", None], "l1": ["Bruised", ""]},
+    "items": [{"tags": ["weapon"], "name": "Blade"}, {"tags": ["tool"], "quality": 1}],
+}
+GUMSHOE_SHEET = {
+    "name": "A", "skills": {"occult": 2, "athletics": 4},
+    "points": {"investigativeMax": 10, "generalMax": 30},
+    "items": [{"tags": ["weapon"], "weapon": {"type": "melee", "damage": "1d6"}}],
+}
+
+
+def _blades_op(rnd):
+    return rnd.choice([
+        {"op": "replace", "path": "/stress", "value": rnd.choice([0, 5, 10, -1, "x"])},
+        {"op": "add", "path": "/abilities/-", "value": rnd.choice(["savage", "battleborn", "bogus"])},
+        {"op": "replace", "path": "/playbookId", "value": rnd.choice(["slide", "cutter", "zz", None])},
+        {"op": "replace", "path": "/actions/hunt", "value": rnd.choice([0, 1, 3, -2])},
+        {"op": "add", "path": "/traumas/-", "value": rnd.choice(["soft", "cold", "bogus"])},
+        {"op": "replace", "path": "/load", "value": rnd.choice(["light", "heavy", None, "x"])},
+        {"op": "replace", "path": "/harm/l1/1", "value": rnd.choice(["  cut ", None, ""])},
+        {"op": "add", "path": "/items/-", "value": rnd.choice([{"tags": ["gear"]}, {"quality": -1}, {"quality": 3}])},
+        {"op": "remove", "path": "/items/0"},
+        {"op": "replace", "path": "/derived/traumaCount", "value": 9},
+        {"op": "add", "path": "/extra", "value": 1},
+        {"op": "remove", "path": "/stress"},
+    ])
+
+
+def _gumshoe_op(rnd):
+    return rnd.choice([
+        {"op": "add", "path": "/skills/" + rnd.choice(["occult", "research", "athletics", "bogus"]), "value": rnd.choice([0, 1, 5, -1, 70000])},
+        {"op": "replace", "path": "/points/investigativeMax", "value": rnd.choice([0, 5, 20])},
+        {"op": "replace", "path": "/points/generalMax", "value": rnd.choice([0, 10, 40])},
+        {"op": "replace", "path": "/name", "value": rnd.choice(["B", 3])},
+        {"op": "add", "path": "/items/-", "value": rnd.choice([{"tags": ["x"]}, {"weapon": 5}])},
+        {"op": "remove", "path": "/items/0"},
+        {"op": "replace", "path": "/skill_points/generalTotal", "value": 999},
+        {"op": "remove", "path": "/skills/occult"},
+    ])
+
+
+CASES = [
+    ("blades", lambda: BladesFactory().characters, BLADES_SHEET, _blades_op, [{"crewTier": 2}, {"crewTier": 0}, {}]),
+    ("gumshoe", lambda: GumshoeFactory().characters, GUMSHOE_SHEET, _gumshoe_op, [{}]),
+]
+
+
+@pytest.mark.parametrize("name, manager, sheet, make_op, contexts", CASES, ids=[c[0] for c in CASES])
+def test_patch_matches_full_validation(name, manager, sheet, make_op, contexts):
+    m = manager()
+    rnd = random.Random(5)
+    cur = m.validate_and_enrich(sheet, contexts[0]).data
+    assert cur is not None
+    accepted = 0
+    for _ in range(400):
+        patch = [make_op(rnd) for _ in range(rnd.randint(1, 3))]
+        ctx = rnd.choice(contexts)
+        before = copy.deepcopy(cur)
+        try:
+            doc = apply_patch(cur, patch)
+        except JsonPatchError:
+            res = m.validate_patch(cur, patch, ctx)
+            assert not res.ok and res.issues[0].path == "patch"
+            continue
+        res = m.validate_patch(cur, patch, ctx)
+        assert res.model_dump() == m.validate_and_enrich(doc, ctx).model_dump(), patch
+        # prev принадлежит вызывающему: validate_patch его не меняет
+        assert cur == before
+        if res.ok:
+            accepted += 1
+            cur = res.data
+    # прогулка должна проходить и через принятые, и через отклонённые патчи
+    assert 0 < accepted < 400
+
+
+def test_gumshoe_untouched_skills_keep_prev_totals():
+    m = GumshoeFactory().characters
+    prev = m.validate_and_enrich(GUMSHOE_SHEET).data
+    res = m.validate_patch(prev, [{"op": "replace", "path": "/name", "value": "B"}])
+    assert res.ok and res.data["skill_points"] == prev["skill_points"]
+    assert res.data["skills"] == prev["skills"]
+
+
+def test_root_patch_falls_back_to_full_validation():
+    m = GumshoeFactory().characters
+    prev = m.validate_and_enrich(GUMSHOE_SHEET).data
+    patch = [{"op": "replace", "path": "", "value": {**GUMSHOE_SHEET, "skills": {"occult": 50}}}]
+    assert m.validate_patch(prev, patch).model_dump() == m.validate_and_enrich(apply_patch(prev, patch)).model_dump()
+
+
+@pytest.mark.parametrize("factory, sheet", [(BladesFactory, BLADES_SHEET), (GumshoeFactory, GUMSHOE_SHEET)], ids=["blades", "gumshoe"])
+@pytest.mark.parametrize("patch", [5, "x", {"op": "add"}, [5], [None]])
+def test_malformed_patch_is_a_patch_issue(factory, sheet, patch):
+    f = factory()
+    prev = f.characters.validate_and_enrich(sheet).data
+    res = f.handle("validate_patch", "character", {"data": prev, "patch": patch}, {})
+    assert res["ok"] is False and res["issues"][0]["path"] == "patch"
+
+
+def test_blades_incomplete_derived_falls_back_to_full_validation():
+    f = BladesFactory()
+    prev = {**f.characters.validate_and_enrich(BLADES_SHEET).data, "derived": {}}
+    patch = [{"op": "replace", "path": "/stress", "value": 2}]
+    res = f.handle("validate_patch", "character", {"data": prev, "patch": patch}, {})
+    full = f.characters.validate_and_enrich(apply_patch(prev, patch)).model_dump()
+    assert res["ok"] and res["data"] == full["data"]
@@ -0,0 +1,152 @@
+"""Журнал workflow blades: переигрывание с записанными бросками даёт те же состояния на каждой ревизии."""
+import json
+import random
+
+import pytest
+
+from plugins.blades_in_the_dark.base.backend.plugin import RulesFactory
+from plugins.blades_in_the_dark.base.backend.workflows.journal import (
+    SNAPSHOT_EVERY, ReplayError, WorkflowJournal, replay,
+)
+
+GM, INI, HELP = "gm", "u1", "u2"
+SCENE = {"players": {
+    INI: {"characters": [{"id": "c1", "name": "Cutter", "data": {"actions": {"skirmish": 2, "prowl": 1}, "stress": 2}}]},
+    HELP: {"characters": [{"id": "c2", "name": "Lurk", "data": {"actions": {"finesse": 1}, "stress": 0}}]},
+}}
+PARTICIPANTS = {"gmUserId": GM, "initiatorUserId": INI, "participants": [{"userId": HELP, "roles": ["assistant"]}]}
+STEPS = [
+    (INI, {"character_id": "c1", "action": "skirmish"}),
+    (GM, {"position": "risky", "effect": "standard", "consequence_hint": "harm"}),
+    (INI, {"push": True, "help": True, "helper_user_id": HELP}),
+    (HELP, {"accept_help": True}),
+    (GM, {"allow": True}),
+    (INI, {"choice": "accept"}),
+    (INI, {"choice": "resist"}),
+    (GM, {"attribute": "prowess"}),
+    (GM, {"summary": "done"}),
+]
+
+
+@pytest.fixture(scope="module")
+def played():
+    """Полный проход через хранилище: фабрика и workflow на каждой ревизии."""
+    factory = RulesFactory()
+    random.seed(1)
+    res = factory.handle("workflow.start", None, {
+        "actionKey": "blades.roll_action", "actionId": "a1", "participants": PARTICIPANTS, "scene": SCENE,
+    }, {})
+    states = [res["workflow"]]
+    for actor, inp in STEPS:
+        res = factory.handle("workflow.submit", None, {
+            "actionId": "a1", "expectedRevision": len(states) - 1, "actorUserId": actor, "input": inp,
+        }, {})
+        assert res["ok"], res
+        states.append(res["workflow"])
+    return factory, states
+
+
+def _journal(factory):
+    # через JSON, как журнал приходит от бэка
+    return json.loads(json.dumps(factory.handle("workflow.journal", None, {"actionId": "a1"}, {})["journal"]))
+
+
+def test_journal_covers_every_step(played):
+    factory, states = played
+    journal = _journal(factory)
+    assert [e["revision"] for e in journal["events"]] == list(range(1, len(states)))
+    # проход длиннее интервала снимков -> переигрывание идёт и со снимка
+    assert len(journal["events"]) > SNAPSHOT_EVERY
+
+
+def test_replay_route_matches_every_revision(played):
+    factory, states = played
+    journal = _journal(factory)
+    other = RulesFactory()
+    for revision, wf in enumerate(states):
+        res = other.handle("workflow.replay", None, {"journal": journal, "revision": revision}, {})
+        assert res["ok"] and res["revision"] == revision
+        assert res["workflow"] == wf
+
+
+def test_replay_is_deterministic(played):
+    factory, states = played
+    journal = WorkflowJournal.from_dict(_journal(factory))
+    router = factory.workflow_router
+    # глобальный random не влияет: броски берутся из журнала
+    random.seed(12345)
+    first = replay(router, journal)
+    random.seed(54321)
+    assert replay(router, journal) == first == states[-1]
+    assert replay(router, journal, 3) == states[3]
+
+
+def test_replay_with_action_id_restores_store(played):
+    factory, states = played
+    other = RulesFactory()
+    res = other.handle("workflow.replay", None, {"journal": _journal(factory), "actionId": "a1"}, {})
+    assert res["ok"] and res["workflow"] == states[-1]
+    entry = other.workflow_store.get("a1")
+    assert entry.revision == len(states) - 1 and entry.workflow == states[-1]
+
+
+def test_tampered_draws_are_rejected(played):
+    factory, _ = played
+    data = _journal(factory)
+    event = next(e for e in data["events"] if e["draws"])
+    event["draws"] = event["draws"][:-1]
+    # ревизия до первого снимка: событие переигрывается, а не берётся из снимка
+    res = RulesFactory().handle("workflow.replay", None, {"journal": data, "revision": event["revision"]}, {})
+    assert res["ok"] is False and res["issues"][0]["path"] == "journal.events"
+
+    event["draws"] = event["draws"] + [6, 6]
+    with pytest.raises(ReplayError):
+        replay(factory.workflow_router, WorkflowJournal.from_dict(data), event["revision"])
+
+
+def test_snapshots_survive_to_dict(played):
+    factory, states = played
+    live = factory.workflow_store.get("a1").journal
+    restored = WorkflowJournal.from_dict(_journal(factory))
+    assert [rev for rev, _, _ in restored.snapshots] == [rev for rev, _, _ in live.snapshots] == [0, SNAPSHOT_EVERY]
+    assert [(wf, scene) for _, wf, scene in restored.snapshots] == [(wf, scene) for _, wf, scene in live.snapshots]
+    assert replay(factory.workflow_router, restored) == states[-1]
+
+
+def test_journal_without_snapshots_rebuilds_them_on_replay(played):
+    factory, states = played
+    data = _journal(factory)
+    del data["snapshots"]
+    journal = WorkflowJournal.from_dict(data)
+    assert len(journal.snapshots) == 1
+    assert replay(factory.workflow_router, journal) == states[-1]
+    assert [rev for rev, _, _ in journal.snapshots] == [0, SNAPSHOT_EVERY]
+    assert journal.snapshots[1][1] == states[SNAPSHOT_EVERY]
+
+
+def test_changed_scene_is_journaled_as_patch():
+    factory = RulesFactory()
+    factory.handle("workflow.start", None, {
+        "actionKey": "blades.roll_action", "actionId": "a1", "participants": PARTICIPANTS, "scene": SCENE,
+    }, {})
+    actor, inp = STEPS[0]
+    res = factory.handle("workflow.submit", None, {
+        "actionId": "a1", "expectedRevision": 0, "actorUserId": actor, "input": inp, "scene": {**SCENE, "weather": "rain"},
+    }, {})
+    assert res["ok"]
+    actor, inp = STEPS[1]
+    assert factory.handle("workflow.submit", None, {"actionId": "a1", "expectedRevision": 1, "actorUserId": actor, "input": inp}, {})["ok"]
+
+    data = _journal(factory)
+    first, second = data["events"]
+    assert "scene" not in first and first["scenePatch"] == [{"op": "add", "path": "/weather", "value": "rain"}]
+    # следующий шаг шёл по той же сцене — в событии её нет
+    assert "scene" not in second and "scenePatch" not in second
+    res = RulesFactory().handle("workflow.replay", None, {"journal": data, "actionId": "a1"}, {})
+    assert res["ok"] and res["workflow"] == factory.workflow_store.get("a1").workflow
+
+
+def test_journal_dict_round_trip(played):
+    factory, _ = played
+    data = _journal(factory)
+    assert WorkflowJournal.from_dict(data).to_dict() == data
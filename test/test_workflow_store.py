@@ -0,0 +1,140 @@
+"""Сохранённые workflow blades: compare-and-set по expectedRevision, устаревшие ревизии, snapshot/restore."""
+import pytest
+
+from plugins.blades_in_the_dark.base.backend.plugin import RulesFactory
+from plugins.blades_in_the_dark.base.backend.workflows.store import StoredAction, WorkflowStore
+from plugins.json_patch import apply_patch
+
+GM, INI, HELP = "gm", "u1", "u2"
+SCENE = {"players": {
+    INI: {"characters": [{"id": "c1", "name": "Cutter", "data": {"actions": {"skirmish": 2, "prowl": 1}, "stress": 2}}]},
+    HELP: {"characters": [{"id": "c2", "name": "Lurk", "data": {"actions": {"finesse": 1}, "stress": 0}}]},
+}}
+PARTICIPANTS = {"gmUserId": GM, "initiatorUserId": INI, "participants": [{"userId": HELP, "roles": ["assistant"]}]}
+CHOOSE = (INI, {"character_id": "c1", "action": "skirmish"})
+SET_POSITION = (GM, {"position": "risky", "effect": "standard"})
+
+
+@pytest.fixture
+def factory():
+    return RulesFactory()
+
+
+def _start(factory, action_id="a1"):
+    res = factory.handle("workflow.start", None, {
+        "actionKey": "blades.roll_action", "actionId": action_id, "participants": PARTICIPANTS, "scene": SCENE,
+    }, {})
+    assert res["ok"] and res["revision"] == 0
+    return res
+
+
+def _submit(factory, expected, step, action_id="a1", **extra):
+    actor, inp = step
+    return factory.handle("workflow.submit", None, {
+        "actionId": action_id, "expectedRevision": expected, "actorUserId": actor, "input": inp, **extra,
+    }, {})
+
+
+def test_submit_advances_revision(factory):
+    _start(factory)
+    res = _submit(factory, 0, CHOOSE)
+    assert res["ok"] and res["revision"] == 1
+    assert factory.workflow_store.get("a1").revision == 1
+    res = _submit(factory, 1, SET_POSITION)
+    assert res["ok"] and res["revision"] == 2
+
+
+def test_stale_revision_is_rejected_with_current_revision(factory):
+    _start(factory)
+    assert _submit(factory, 0, CHOOSE)["ok"]
+    stored = factory.workflow_store.get("a1")
+
+    res = _submit(factory, 0, SET_POSITION)
+    assert res["ok"] is False and res["revision"] == 1
+    # отказ ничего не меняет
+    assert factory.workflow_store.get("a1") is stored
+
+
+def test_expected_revision_is_required(factory):
+    _start(factory)
+    res = factory.handle("workflow.submit", None, {"actionId": "a1", "actorUserId": INI, "input": CHOOSE[1]}, {})
+    assert res["ok"] is False and res["revision"] == 0
+    assert res["issues"][0]["path"] == "expectedRevision"
+
+
+def test_unknown_action(factory):
+    res = _submit(factory, 0, CHOOSE, action_id="nope")
+    assert res["ok"] is False
+
+
+def test_rejected_step_keeps_revision(factory):
+    _start(factory)
+    # ГМ не может выбирать действие за инициатора
+    res = _submit(factory, 0, (GM, CHOOSE[1]))
+    assert res["ok"] is False
+    assert factory.workflow_store.get("a1").revision == 0
+    assert _submit(factory, 0, CHOOSE)["ok"]
+
+
+def test_delta_from_applies_to_previous_workflow(factory):
+    wf = _start(factory)["workflow"]
+    res = _submit(factory, 0, CHOOSE, deltaFrom=0)
+    assert res["ok"]
+    assert apply_patch(wf, res["workflowPatch"]) == factory.workflow_store.get("a1").workflow
+
+
+def test_compare_and_set_conflict():
+    store = WorkflowStore()
+    first = StoredAction("blades.roll_action", {"revision": 0})
+    store.put("a", first)
+    assert store.compare_and_set("a", 0, StoredAction("blades.roll_action", {"revision": 1}))
+    # второй писатель с той же ожидаемой ревизией проигрывает
+    assert not store.compare_and_set("a", 0, StoredAction("blades.roll_action", {"revision": 1}))
+    assert not store.compare_and_set("missing", 0, first)
+    assert store.get("a").revision == 1
+    assert store.stats()["conflicts"] == 2
+
+
+def test_on_commit_runs_only_for_the_winner():
+    store = WorkflowStore()
+    store.put("a", StoredAction("k", {"revision": 0}))
+    commits = []
+    assert store.compare_and_set("a", 0, StoredAction("k", {"revision": 1}), on_commit=lambda: commits.append(1))
+    assert not store.compare_and_set("a", 0, StoredAction("k", {"revision": 1}), on_commit=lambda: commits.append(2))
+    assert commits == [1]
+
+
+def test_restore_does_not_overwrite_newer_revision(factory):
+    _start(factory)
+    snap = factory.handle("workflow.snapshot", None, {}, {})["actions"]
+    assert _submit(factory, 0, CHOOSE)["ok"]
+
+    assert factory.handle("workflow.restore", None, {"actions": snap}, {})["restored"] == 0
+    assert factory.workflow_store.get("a1").revision == 1
+
+
+def test_snapshot_restore_keeps_journal(factory):
+    _start(factory)
+    assert _submit(factory, 0, CHOOSE)["ok"]
+    snap = factory.handle("workflow.snapshot", None, {}, {})["actions"]
+    journal = factory.handle("workflow.journal", None, {"actionId": "a1"}, {})["journal"]
+
+    other = RulesFactory()
+    assert other.handle("workflow.restore", None, {"actions": snap}, {})["restored"] == 1
+    assert other.handle("workflow.journal", None, {"actionId": "a1"}, {})["journal"] == journal
+    # восстановленная запись продолжает журнал с той же ревизии
+    assert _submit(other, 1, SET_POSITION)["ok"]
+    restored = other.handle("workflow.journal", None, {"actionId": "a1"}, {})
+    assert restored["revision"] == 2 and len(restored["journal"]["events"]) == len(journal["events"]) + 1
+
+
+def test_eviction_hook():
+    evicted = []
+    store = WorkflowStore(2, on_evict=lambda action_id, entry: evicted.append(action_id))
+    entry = StoredAction("k", {"revision": 0})
+    for action_id in ("x", "y", "z"):
+        store.put(action_id, entry)
+    store.get("y")
+    store.put("w", entry)
+    assert evicted == ["x", "z"]
+    assert len(store) == 2